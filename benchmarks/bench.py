@@ -0,0 +1,368 @@
+"""End-to-end benchmark suite for the fetch/store/rules pipeline.
+
+Runs each benchmark against a synthetic mailbox (`gmail_client.emulator`)
+at several mailbox sizes and rule counts, writes machine-readable results,
+and compares them with a stored baseline to flag regressions.
+
+Usage:
+    python -m benchmarks.bench run --sizes 1000,100000 --rules 10,100
+    python -m benchmarks.bench run --update-baseline
+    python -m benchmarks.bench compare --threshold 0.25
+
+Timings only compare on one machine, so each machine records its own
+baseline (`run --update-baseline`); none is committed. Comparisons use the
+median of `--repeat` runs. Benchmarks faster than
+`MIN_SECONDS` in the baseline are reported but never flagged, since at
+that scale timer and scheduler noise exceeds any real change.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client import email_repository
+from gmail_client.emulator import FakeGmail, SENDERS, SUBJECTS
+from gmail_client.email_fetch import parse_headers, extract_received_at, process_message_response
+from gmail_client.rule_processor.rule_engine import check_condition, process_rules
+from gmail_client.rule_processor.simulate import simulate_rules
+from gmail_client.metrics import METRICS
+from gmail_client.models import Email
+
+# Results and the baseline are machine-specific timings, so both are git-ignored
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, "latest.json")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Defaults sized so every timed benchmark runs well above scheduler noise
+DEFAULT_SIZES = [10000]
+DEFAULT_RULES = [10]
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.25
+# Baseline medians below this are too short to compare reliably
+MIN_SECONDS = 0.1
+
+# Distinct synthetic messages generated per run; larger sizes cycle through them
+POOL_SIZE = 5000
+
+
+# --- synthetic inputs ---
+def make_responses(gmail: FakeGmail, count: int) -> List[Dict]:
+    """Metadata responses as returned by `messages.get(format="metadata")`."""
+    messages = gmail.users().messages()
+    return [
+        messages.get(userId="me", id=FakeGmail.message_id(seq), format="metadata").execute()
+        for seq in range(min(count, gmail.size))
+    ]
+
+
+def make_emails(gmail: FakeGmail, size: int) -> List[Email]:
+    """`size` parsed email records whose IDs all exist in `gmail`."""
+    pool: List[Email] = []
+    for response in make_responses(gmail, POOL_SIZE):
+        process_message_response(pool, response["id"], response, None)
+    return [pool[seq % len(pool)].replace(id=FakeGmail.message_id(seq)) for seq in range(size)]
+
+
+def make_rules(count: int) -> List[Dict]:
+    """A mix of rule shapes resembling `config/rules.json`."""
+    rules = []
+    for i in range(count):
+        sender = SENDERS[i % len(SENDERS)]
+        subject = SUBJECTS[i % len(SUBJECTS)]
+        rules.append({
+            "description": f"Rule {i}",
+            "predicate": "all" if i % 2 else "any",
+            "conditions": [
+                {"field": "From", "operator": "equals" if i % 3 else "contains", "value": sender},
+                {"field": "Subject", "operator": "contains", "value": f"{subject} #{i}"},
+                {"field": "DateReceived", "operator": "less_than_days", "value": 1 + i % 30},
+            ],
+            "actions": [{"type": "mark_as_read"}, {"type": "move", "destination": "IMPORTANT"}],
+        })
+    return rules
+
+
+# --- benchmarks: each returns (operations, elapsed seconds) ---
+def bench_parse_headers(gmail: FakeGmail, size: int, rules: int) -> Tuple[int, float]:
+    headers = [r["payload"]["headers"] for r in make_responses(gmail, POOL_SIZE)]
+    start = time.perf_counter()
+    for i in range(size):
+        parse_headers(headers[i % len(headers)])
+    return size, time.perf_counter() - start
+
+
+def bench_extract_received_at(gmail: FakeGmail, size: int, rules: int) -> Tuple[int, float]:
+    responses = make_responses(gmail, POOL_SIZE)
+    dates = [parse_headers(r["payload"]["headers"]).get("date") for r in responses]
+    start = time.perf_counter()
+    for i in range(size):
+        j = i % len(dates)
+        extract_received_at(dates[j], responses[j])
+    return size, time.perf_counter() - start
+
+
+def bench_process_message_response(gmail: FakeGmail, size: int, rules: int) -> Tuple[int, float]:
+    responses = make_responses(gmail, POOL_SIZE)
+    emails: List[Email] = []
+    start = time.perf_counter()
+    for i in range(size):
+        response = responses[i % len(responses)]
+        process_message_response(emails, response["id"], response, None)
+    return size, time.perf_counter() - start
+
+
+def bench_save_emails(gmail: FakeGmail, size: int, rules: int, db_file: str) -> Tuple[int, float]:
+    emails = make_emails(gmail, size)
+    conn = email_repository.connect(db_file)
+    email_repository.init_db(conn)
+    start = time.perf_counter()
+    email_repository.save_emails(emails, conn=conn)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return size, elapsed
+
+
+def bench_fetch_all_emails(gmail: FakeGmail, size: int, rules: int, db_file: str) -> Tuple[int, float]:
+    conn = email_repository.connect(db_file)
+    email_repository.init_db(conn)
+    email_repository.save_emails(make_emails(gmail, size), conn=conn)
+    start = time.perf_counter()
+    count = len(email_repository.fetch_all_emails(conn))
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return count, elapsed
+
+
+def bench_check_condition(gmail: FakeGmail, size: int, rules: int) -> Tuple[int, float]:
+    emails = make_emails(gmail, size)
+    conditions = [c for rule in make_rules(rules) for c in rule["conditions"]]
+    start = time.perf_counter()
+    for email in emails:
+        for condition in conditions:
+            check_condition(email, condition)
+    return size * len(conditions), time.perf_counter() - start
+
+
+def bench_process_rules(gmail: FakeGmail, size: int, rules: int) -> Tuple[int, float]:
+    emails = make_emails(gmail, size)
+    rule_set = make_rules(rules)
+    start = time.perf_counter()
+    process_rules(gmail, emails=emails, rules=rule_set)
+    return size * rules, time.perf_counter() - start
+
+
+def bench_simulate_rules(gmail: FakeGmail, size: int, rules: int) -> Tuple[int, float]:
+    emails = make_emails(gmail, size)
+    rule_set = make_rules(rules)
+    start = time.perf_counter()
+    simulate_rules(emails, rule_set)
+    return size * rules, time.perf_counter() - start
+
+
+def bench_main(gmail: FakeGmail, size: int, rules: int, db_file: str) -> Tuple[int, float]:
+    import main as app
+
+    rules_path = os.path.join(os.path.dirname(db_file), "rules.json")
+    with open(rules_path, "w") as f:
+        json.dump(make_rules(rules), f)
+    start = time.perf_counter()
+    app.main(fetch_all=True, batch_size=500, service=gmail, rules_path=rules_path)
+    return size, time.perf_counter() - start
+
+
+BENCHMARKS: Dict[str, Tuple[Callable, bool, bool]] = {
+    # name: (function, uses rule count, needs a database)
+    "parse_headers": (bench_parse_headers, False, False),
+    "extract_received_at": (bench_extract_received_at, False, False),
+    "process_message_response": (bench_process_message_response, False, False),
+    "save_emails": (bench_save_emails, False, True),
+    "fetch_all_emails": (bench_fetch_all_emails, False, True),
+    "check_condition": (bench_check_condition, True, False),
+    "process_rules": (bench_process_rules, True, False),
+    "simulate_rules": (bench_simulate_rules, True, False),
+    "main": (bench_main, True, True),
+}
+
+
+def run_one(name: str, size: int, rules: Optional[int], repeat: int) -> Dict:
+    """Run a benchmark `repeat` times on fresh state; records the best and median times."""
+    func, _, needs_db = BENCHMARKS[name]
+    timings = []
+    ops = 0
+    for _ in range(repeat):
+        gmail = FakeGmail(size=size, seed=42)
+        METRICS.reset()
+        with tempfile.TemporaryDirectory(prefix="gmail-bench-") as tmp:
+            db_file = os.path.join(tmp, "emails.db")
+            kwargs = {"db_file": db_file} if needs_db else {}
+            # Point the default DB at the scratch file so nothing touches data/emails.db
+            with mock.patch.object(email_repository, "DB_FILE", db_file), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                ops, elapsed = func(gmail, size, rules or 0, **kwargs)
+        timings.append(elapsed)
+
+    best = min(timings)
+    return {
+        "name": name,
+        "size": size,
+        "rules": rules,
+        "ops": ops,
+        "seconds": round(best, 6),
+        "median_seconds": round(sorted(timings)[len(timings) // 2], 6),
+        "ops_per_sec": round(ops / best, 1) if best else None,
+        "repeat": repeat,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def run_suite(sizes: List[int], rule_counts: List[int], only: Optional[List[str]] = None,
+              repeat: int = DEFAULT_REPEAT, progress: bool = True) -> Dict:
+    """Run the selected benchmarks over every size (and rule count where relevant)."""
+    results = []
+    for name, (_, uses_rules, _) in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        for size in sizes:
+            for rules in (rule_counts if uses_rules else [None]):
+                result = run_one(name, size, rules, repeat)
+                results.append(result)
+                if progress:
+                    print(f"{name:<26} size={size:<9} rules={str(rules):<6} "
+                          f"{result['seconds']:>10.4f}s {result['ops_per_sec'] or 0:>14,.0f} ops/s")
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def _key(result: Dict) -> Tuple:
+    return result["name"], result["size"], result["rules"]
+
+
+def _median(result: Dict) -> float:
+    return result.get("median_seconds", result["seconds"])
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD,
+                    min_seconds: float = MIN_SECONDS) -> List[Dict]:
+    """Pair results by (name, size, rules) and compare median times.
+
+    A slowdown above `threshold` is a regression, unless the baseline
+    median is under `min_seconds` (marked `too_short` instead).
+    """
+    base = {_key(r): r for r in baseline.get("results", [])}
+    rows = []
+    for result in current.get("results", []):
+        previous = base.get(_key(result))
+        if not previous or not _median(previous):
+            continue
+        change = _median(result) / _median(previous) - 1
+        too_short = _median(previous) < min_seconds
+        rows.append({
+            "name": result["name"],
+            "size": result["size"],
+            "rules": result["rules"],
+            "baseline_seconds": _median(previous),
+            "seconds": _median(result),
+            "change": round(change, 4),
+            "too_short": too_short,
+            "regression": change > threshold and not too_short,
+        })
+    return rows
+
+
+def _load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write(path: str, data: Dict) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="GmailFetchEngine benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the benchmark suite")
+    run_parser.add_argument("--sizes", type=_int_list, default=DEFAULT_SIZES,
+                            help="Mailbox sizes, e.g. 1000,100000,1000000")
+    run_parser.add_argument("--rules", type=_int_list, default=DEFAULT_RULES, help="Rule counts, e.g. 10,100,1000")
+    run_parser.add_argument("--only", help="Comma-separated benchmark names: " + ", ".join(BENCHMARKS))
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                            help="Runs per benchmark; the median is compared")
+    run_parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    run_parser.add_argument("--update-baseline", action="store_true", help="Also store the results as the baseline")
+
+    cmp_parser = sub.add_parser("compare", help="Compare results against the stored baseline")
+    cmp_parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    cmp_parser.add_argument("--current", default=DEFAULT_OUTPUT)
+    cmp_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown fraction")
+    cmp_parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS,
+                            help="Never flag benchmarks whose baseline median is shorter than this")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        # Keep the pipeline's log formatting cost in the numbers, but not on screen
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s",
+                            stream=open(os.devnull, "w"))
+        only = args.only.split(",") if args.only else None
+        data = run_suite(args.sizes, args.rules, only=only, repeat=args.repeat)
+        _write(args.output, data)
+        print(f"Results written to {args.output}")
+        if args.update_baseline:
+            _write(DEFAULT_BASELINE, data)
+            print(f"Baseline updated: {DEFAULT_BASELINE}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one on this machine with: "
+              "python -m benchmarks.bench run --update-baseline")
+        return 2
+    rows = compare_results(_load(args.baseline), _load(args.current), args.threshold, args.min_seconds)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "too short" if row["too_short"] else "ok"
+        print(f"{row['name']:<26} size={row['size']:<9} rules={str(row['rules']):<6} "
+              f"{row['baseline_seconds']:>10.4f}s -> {row['seconds']:>10.4f}s {row['change']:>+8.1%}  {flag}")
+    regressions = sum(row["regression"] for row in rows)
+    print(f"{len(rows)} compared, {regressions} regressions (threshold {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
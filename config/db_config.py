@@ -3,3 +3,18 @@ import os
 # Default DB file (can be overridden via environment variable)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_FILE = os.getenv("GMAIL_DB_FILE", os.path.join(BASE_DIR, "../data/emails.db"))
+
+# Compressed blob store for message bodies/attachments (full/raw fetch modes), next to the DB
+BLOB_DIR = os.getenv("GMAIL_BLOB_DIR", os.path.join(os.path.dirname(DB_FILE), "blobs"))
+# "zlib" (built in) or "zstd" (needs the zstandard package)
+BLOB_CODEC = os.getenv("GMAIL_BLOB_CODEC", "zlib")
+
+# Rows fetched per cursor step (and per Parquet row group) when exporting
+EXPORT_CHUNK_SIZE = int(os.getenv("GMAIL_EXPORT_CHUNK_SIZE", "10000"))
+
+# Store new databases as monthly partition tables (emails_YYYYMM) behind an `emails` view
+DB_PARTITIONED = os.getenv("GMAIL_DB_PARTITIONED", "").lower() in ("1", "true", "yes")
+# Retention for `main.py maintain`: keep this many whole months before the current one (0 keeps everything)
+RETENTION_MONTHS = int(os.getenv("GMAIL_RETENTION_MONTHS", "0"))
+# Where expired months are copied (one SQLite file each) before being dropped; unset discards them
+ARCHIVE_DIR = os.getenv("GMAIL_ARCHIVE_DIR")
@@ -1,6 +1,44 @@
 """Configuration constants for Gmail client."""
 
+import os
+
 # SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
 SCOPES = ["https://www.googleapis.com/auth/gmail.modify"]
 CREDENTIALS_FILE = "credentials.json"
 TOKEN_FILE = "token.json"
+
+# HTTP transport ("httplib2" or "requests") and its tuning knobs
+HTTP_BACKEND = os.getenv("GMAIL_HTTP_BACKEND", "httplib2")
+HTTP_TIMEOUT = int(os.getenv("GMAIL_HTTP_TIMEOUT", "60"))
+HTTP_POOL_SIZE = int(os.getenv("GMAIL_HTTP_POOL_SIZE", "10"))
+
+# Refresh the access token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = int(os.getenv("GMAIL_TOKEN_REFRESH_MARGIN", "300"))
+
+# Daemon (serve) mode: seconds between sync cycles and +/- jitter fraction
+SYNC_INTERVAL = float(os.getenv("GMAIL_SYNC_INTERVAL", "300"))
+SYNC_JITTER = float(os.getenv("GMAIL_SYNC_JITTER", "0.1"))
+
+# Interface the serve-mode /metrics endpoint listens on (it has no auth: keep it local
+# unless a firewall or proxy guards it)
+METRICS_HOST = os.getenv("GMAIL_METRICS_HOST", "127.0.0.1")
+
+# Seconds a loaded label name -> ID mapping is trusted before labels.list is called again
+LABEL_CACHE_TTL = float(os.getenv("GMAIL_LABEL_CACHE_TTL", "3600"))
+
+# Full syncs list the next page while the current one's batches run (0 to page strictly one by one)
+FETCH_PIPELINE = os.getenv("GMAIL_FETCH_PIPELINE", "1").lower() not in ("0", "false", "no")
+
+# messages.get format: "metadata" (headers only), or "full"/"raw" to archive bodies in the blob store
+FETCH_FORMAT = os.getenv("GMAIL_FETCH_FORMAT", "metadata")
+
+# Most messages per get batch in raw format: a batch's raw responses (whole messages,
+# attachments included) are held in memory together
+RAW_BATCH_LIMIT = int(os.getenv("GMAIL_RAW_BATCH_LIMIT", "5"))
+
+# Multi-account sync: accounts list, worker processes (default: CPU count) and
+# each account's quota budget (Gmail allows 250 units/second per user)
+ACCOUNTS_FILE = os.getenv("GMAIL_ACCOUNTS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "accounts.json"))
+ACCOUNT_WORKERS = int(os.getenv("GMAIL_ACCOUNT_WORKERS", "0")) or os.cpu_count() or 1
+QUOTA_RATE = float(os.getenv("GMAIL_QUOTA_RATE", "250"))
+QUOTA_BURST = float(os.getenv("GMAIL_QUOTA_BURST", "250"))
@@ -0,0 +1,8 @@
+import os
+
+# Root log level, and "text" (human-readable) or "json" (one JSON object per line)
+LOG_LEVEL = os.getenv("GMAIL_LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("GMAIL_LOG_FORMAT", "text")
+
+# Keep 1 in N of each per-item event (rule matches, actions); warnings and errors are always kept
+LOG_SAMPLE_EVERY = int(os.getenv("GMAIL_LOG_SAMPLE_EVERY", "1"))
@@ -0,0 +1,90 @@
+"""Mailbox accounts for multi-account sync.
+
+The accounts file is a JSON list; each entry names one mailbox and where
+its state lives:
+
+    [
+      {"name": "alice", "token_file": "tokens/alice.json", "db_file": "shards/alice.db"},
+      {"name": "bob", "token_file": "tokens/bob.json", "rules_file": "rules-bob.json"}
+    ]
+
+Relative paths are resolved against the accounts file's directory. Only
+`name` is required: `db_file` defaults to `data/accounts/<name>.db`,
+`token_file` to `tokens/<name>.json` and `credentials_file` to the shared
+OAuth client. An `emulator` entry (keyword arguments for `FakeGmail`)
+replaces the real mailbox for offline load tests.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+from config.db_config import DB_FILE
+from config.gmail_config import ACCOUNTS_FILE, CREDENTIALS_FILE
+from gmail_client.errors import ACCOUNTS_INVALID
+
+
+class Account:
+    """One mailbox: its OAuth token, SQLite shard and optional rules/blob paths."""
+
+    def __init__(
+        self,
+        name: str,
+        db_file: str,
+        token_file: str,
+        credentials_file: str = CREDENTIALS_FILE,
+        rules_file: Optional[str] = None,
+        blob_dir: Optional[str] = None,
+        emulator: Optional[Dict] = None,
+    ):
+        self.name = name
+        self.db_file = db_file
+        self.token_file = token_file
+        self.credentials_file = credentials_file
+        self.rules_file = rules_file
+        self.blob_dir = blob_dir or os.path.join(os.path.dirname(db_file), "blobs", name)
+        self.emulator = emulator
+
+    def __repr__(self) -> str:
+        return f"Account(name={self.name!r}, db_file={self.db_file!r})"
+
+
+def _resolve(base_dir: str, path: Optional[str]) -> Optional[str]:
+    if path is None:
+        return None
+    return path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+
+def load_accounts(path: Optional[str] = None) -> List[Account]:
+    """Read the accounts file. Raises ValueError if it is malformed."""
+    path = path or ACCOUNTS_FILE
+    base_dir = os.path.dirname(os.path.abspath(path))
+    try:
+        with open(path) as f:
+            entries = json.load(f)
+    except json.JSONDecodeError as e:
+        raise ValueError(ACCOUNTS_INVALID % (path, e)) from None
+    if not isinstance(entries, list):
+        raise ValueError(ACCOUNTS_INVALID % (path, "expected a list of accounts"))
+
+    accounts: List[Account] = []
+    seen = set()
+    for entry in entries:
+        name = entry.get("name") if isinstance(entry, dict) else None
+        if not name:
+            raise ValueError(ACCOUNTS_INVALID % (path, f"account without a name: {entry!r}"))
+        if name in seen:
+            raise ValueError(ACCOUNTS_INVALID % (path, f"duplicate account {name!r}"))
+        seen.add(name)
+
+        accounts.append(Account(
+            name=name,
+            db_file=_resolve(base_dir, entry.get("db_file"))
+            or os.path.join(os.path.dirname(DB_FILE), "accounts", f"{name}.db"),
+            token_file=_resolve(base_dir, entry.get("token_file")) or os.path.join(base_dir, "tokens", f"{name}.json"),
+            credentials_file=_resolve(base_dir, entry.get("credentials_file")) or CREDENTIALS_FILE,
+            rules_file=_resolve(base_dir, entry.get("rules_file")),
+            blob_dir=_resolve(base_dir, entry.get("blob_dir")),
+            emulator=entry.get("emulator"),
+        ))
+    return accounts
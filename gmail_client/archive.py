@@ -0,0 +1,116 @@
+"""Archive message bodies and attachments from full/raw `messages.get` responses.
+
+`full` stores the text body as one blob and every attachment as its own,
+so an attachment sent many times is kept once. Attachments Gmail returns
+by reference are downloaded one at a time after each batch, keeping memory
+bounded by the largest single part. It is the recommended archive format.
+
+`raw` stores the whole RFC 2822 message as one blob and reads its headers
+back from the blob's first bytes. Attachments stay inside that blob, so
+they are not deduplicated, and every response carries the whole message:
+raw batches are capped at `RAW_BATCH_LIMIT` messages (see `email_fetch`).
+
+Encoded content is dropped from the response once stored, so a parsed
+batch does not keep a second copy alive.
+"""
+
+import logging
+from email.parser import BytesHeaderParser
+from email.policy import default as default_policy
+from itertools import chain
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from gmail_client.blob_store import BlobStore, b64_chunks
+from gmail_client.errors import ARCHIVE_ATTACHMENT_FAILED
+from gmail_client.metrics import METRICS
+from gmail_client.models import Attachment, Email
+from gmail_client.quota import charge
+
+# Raw headers are parsed from at most this many leading bytes of the message
+HEADER_LIMIT = 64 * 1024
+
+
+def raw_headers(head: bytes) -> List[Dict[str, str]]:
+    """Headers of a raw message, in the `payload.headers` shape Gmail uses."""
+    end = head.find(b"\r\n\r\n")
+    if end < 0:
+        end = head.find(b"\n\n")
+    block = head if end < 0 else head[:end]
+    message = BytesHeaderParser(policy=default_policy).parsebytes(block)
+    return [{"name": name, "value": str(value)} for name, value in message.items()]
+
+
+def _walk(part: Dict) -> Iterator[Dict]:
+    yield part
+    for sub in part.get("parts") or []:
+        yield from _walk(sub)
+
+
+def _body_parts(payload: Dict) -> List[Dict]:
+    """Inline text parts making up the body: text/plain, else text/html."""
+    parts = [p for p in _walk(payload) if not p.get("filename") and p.get("body", {}).get("data")]
+    for mime_type in ("text/plain", "text/html"):
+        matching = [p for p in parts if p.get("mimeType") == mime_type]
+        if matching:
+            return matching
+    return []
+
+
+def _attachments(payload: Dict, store: BlobStore) -> List[Attachment]:
+    attachments = []
+    for part in _walk(payload):
+        if not part.get("filename"):
+            continue
+        body = part.get("body", {})
+        attachment = Attachment(
+            part_id=part.get("partId", ""),
+            filename=part["filename"],
+            mime_type=part.get("mimeType", ""),
+            size=body.get("size", 0),
+            attachment_id=body.get("attachmentId"),
+        )
+        if body.get("data"):
+            attachment.blob, _ = store.put_base64(body.pop("data"))
+        attachments.append(attachment)
+    return attachments
+
+
+def archive_message(
+    response: Dict, store: BlobStore
+) -> Tuple[List[Dict[str, str]], Optional[str], List[Attachment]]:
+    """Store the body of a `messages.get` response.
+
+    Returns (headers, body blob digest, attachments). Attachments given by
+    `attachmentId` come back with `blob=None`; see `download_attachments`.
+    The stored base64 content is removed from `response`.
+    Metadata-only responses are returned unchanged with no blob.
+    """
+    if "raw" in response:
+        digest, _ = store.put_base64(response.pop("raw"))
+        return raw_headers(store.read_head(digest, HEADER_LIMIT)), digest, []
+
+    payload = response.get("payload", {})
+    headers = payload.get("headers", [])
+    body_parts = _body_parts(payload)
+    body_blob = None
+    if body_parts:
+        body_blob, _ = store.put_stream(chain.from_iterable(b64_chunks(p["body"].pop("data")) for p in body_parts))
+    return headers, body_blob, _attachments(payload, store)
+
+
+def download_attachments(service, emails: List[Email], store: BlobStore) -> None:
+    """Fetch and store attachments that `archive_message` left by reference."""
+    for email in emails:
+        for attachment in email.attachments:
+            if attachment.blob is not None or not attachment.attachment_id:
+                continue
+            try:
+                charge("messages.attachments.get")
+                with METRICS.timer("attachment_download"):
+                    data = service.users().messages().attachments().get(
+                        userId="me", messageId=email.id, id=attachment.attachment_id
+                    ).execute()
+                attachment.blob, _ = store.put_base64(data.get("data", ""))
+            except Exception as e:
+                METRICS.inc("attachment_errors")
+                logging.error(ARCHIVE_ATTACHMENT_FAILED, attachment.attachment_id, email.id, e)
@@ -2,32 +2,53 @@
 
 import os
 import logging
-from google.auth.transport.requests import Request
+from typing import Optional
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from config.gmail_config import SCOPES, CREDENTIALS_FILE, TOKEN_FILE
+from gmail_client.transport import refresh_request
+from gmail_client.errors import AUTH_LOGIN_REQUIRED
 
 
-def authenticate() -> Credentials:
-    """Authenticate user via OAuth and return valid Gmail credentials."""
+def save_credentials(creds: Credentials, token_file: Optional[str] = None) -> None:
+    """Persist credentials so the next run can skip the OAuth flow."""
+    token_file = token_file or TOKEN_FILE
+    with open(token_file, "w") as token:
+        token.write(creds.to_json())
+        logging.info(f"Saved new credentials to {token_file}")
+
+
+def authenticate(
+    token_file: Optional[str] = None,
+    credentials_file: Optional[str] = None,
+    interactive: bool = True,
+) -> Credentials:
+    """Authenticate user via OAuth and return valid Gmail credentials.
+
+    `token_file`/`credentials_file` default to the single-account paths in
+    `config/gmail_config.py`. With `interactive=False` (background workers)
+    a missing or unusable token raises instead of opening a browser.
+    """
+    token_file = token_file or TOKEN_FILE
+    credentials_file = credentials_file or CREDENTIALS_FILE
     creds = None
 
-    if os.path.exists(TOKEN_FILE):
-        creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+    if os.path.exists(token_file):
+        creds = Credentials.from_authorized_user_file(token_file, SCOPES)
 
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
             logging.info("Refreshing expired credentials...")
-            creds.refresh(Request())
+            creds.refresh(refresh_request())
         else:
-            if not os.path.exists(CREDENTIALS_FILE):
-                raise FileNotFoundError(f"Missing credentials file: {CREDENTIALS_FILE}")
+            if not interactive:
+                raise PermissionError(AUTH_LOGIN_REQUIRED % token_file)
+            if not os.path.exists(credentials_file):
+                raise FileNotFoundError(f"Missing credentials file: {credentials_file}")
             logging.info("Launching browser for OAuth login...")
-            flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
+            flow = InstalledAppFlow.from_client_secrets_file(credentials_file, SCOPES)
             creds = flow.run_local_server(port=0)
 
-        with open(TOKEN_FILE, "w") as token:
-            token.write(creds.to_json())
-            logging.info(f"Saved new credentials to {TOKEN_FILE}")
+        save_credentials(creds, token_file)
 
     return creds
@@ -0,0 +1,141 @@
+"""Content-addressed, compressed blob store for message bodies and attachments.
+
+Blobs are keyed by the SHA-256 of their uncompressed content and kept as
+`<root>/<aa>/<digest>`, so identical attachments (the same PDF sent to a
+whole list, newsletter images, ...) are stored once. Content is streamed
+in chunks: hashed and compressed into a temp file, then renamed into
+place, so a message is never held decoded in memory as a whole.
+
+zlib is always available; zstd is used when `zstandard` is installed and
+the `zstd` codec is selected. Readers detect the codec from the stored
+frame, so both can coexist in one store.
+"""
+
+import base64
+import hashlib
+import os
+import tempfile
+import zlib
+from contextlib import closing
+from typing import Iterable, Iterator, Optional, Tuple
+
+from config.db_config import BLOB_DIR, BLOB_CODEC
+from gmail_client.errors import BLOB_UNKNOWN_CODEC, BLOB_ZSTD_MISSING
+from gmail_client.metrics import METRICS
+
+CHUNK_SIZE = 64 * 1024
+# Base64 text decoded per step; a multiple of 4 so each slice decodes on its own
+B64_CHUNK_SIZE = 4 * 16 * 1024
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError(BLOB_ZSTD_MISSING) from None
+    return zstandard
+
+
+def _compressor(codec: str):
+    if codec == "zlib":
+        return zlib.compressobj(6)
+    if codec == "zstd":
+        return _zstandard().ZstdCompressor(level=3).compressobj()
+    raise ValueError(BLOB_UNKNOWN_CODEC % codec)
+
+
+def _decompressor(head: bytes):
+    if head.startswith(_ZSTD_MAGIC):
+        return _zstandard().ZstdDecompressor().decompressobj()
+    return zlib.decompressobj()
+
+
+def b64_chunks(data: str, chunk_size: int = B64_CHUNK_SIZE) -> Iterator[bytes]:
+    """Decode Gmail's URL-safe base64 `data` a slice at a time."""
+    for i in range(0, len(data), chunk_size):
+        piece = data[i:i + chunk_size]
+        yield base64.urlsafe_b64decode(piece + "=" * (-len(piece) % 4))
+
+
+class BlobStore:
+    """Compressed blobs on disk, addressed by the SHA-256 of their content."""
+
+    def __init__(self, root: Optional[str] = None, codec: Optional[str] = None):
+        self.root = root or BLOB_DIR
+        self.codec = codec or BLOB_CODEC
+        _compressor(self.codec)  # fail early on an unknown or unavailable codec
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def put_stream(self, chunks: Iterable[bytes]) -> Tuple[str, int]:
+        """Store the concatenated `chunks`. Returns (digest, uncompressed size).
+
+        Content that is already stored is not written again.
+        """
+        sha = hashlib.sha256()
+        size = 0
+        compressor = _compressor(self.codec)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in chunks:
+                    sha.update(chunk)
+                    size += len(chunk)
+                    tmp.write(compressor.compress(chunk))
+                tmp.write(compressor.flush())
+
+            digest = sha.hexdigest()
+            if self.exists(digest):
+                os.remove(tmp_path)
+                METRICS.inc("blobs_deduplicated")
+            else:
+                os.makedirs(os.path.dirname(self.path(digest)), exist_ok=True)
+                os.replace(tmp_path, self.path(digest))
+                METRICS.inc("blobs_written")
+            return digest, size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put_bytes(self, data: bytes) -> Tuple[str, int]:
+        return self.put_stream(data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE))
+
+    def put_base64(self, data: str) -> Tuple[str, int]:
+        """Store the content of a URL-safe base64 string (Gmail `raw`/`data`)."""
+        return self.put_stream(b64_chunks(data))
+
+    def open(self, digest: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield the uncompressed content of blob `digest` in chunks."""
+        with open(self.path(digest), "rb") as f:
+            compressed = f.read(chunk_size)
+            decompressor = _decompressor(compressed)
+            while compressed:
+                chunk = decompressor.decompress(compressed)
+                if chunk:
+                    yield chunk
+                compressed = f.read(chunk_size)
+            tail = decompressor.flush() if hasattr(decompressor, "flush") else b""
+            if tail:
+                yield tail
+
+    def read(self, digest: str) -> bytes:
+        """Whole uncompressed content; for small blobs and tests."""
+        return b"".join(self.open(digest))
+
+    def read_head(self, digest: str, limit: int = CHUNK_SIZE) -> bytes:
+        """Up to `limit` leading bytes, without decompressing the rest."""
+        head = b""
+        with closing(self.open(digest)) as chunks:
+            for chunk in chunks:
+                head += chunk
+                if len(head) >= limit:
+                    break
+        return head[:limit]
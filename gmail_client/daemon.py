@@ -0,0 +1,141 @@
+"""Long-running sync loop that keeps service, DB and rules warm between cycles."""
+
+import logging
+import random
+import signal
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional, Set
+
+from gmail_client.email_fetch import fetch_new_emails_from_gmail, get_messages
+from gmail_client.email_repository import fetch_all_emails, fetch_email_ids, fetch_ids_without_recipient, save_emails
+from gmail_client.rule_processor.rule_engine import RuleCache, process_rules
+from gmail_client.metrics import METRICS
+from gmail_client.projection import build_projection
+from gmail_client.blob_store import BlobStore
+from gmail_client.labels import LabelRegistry
+from gmail_client.errors import DAEMON_CYCLE_FAILED
+
+
+class SyncState:
+    """Warm state reused by every cycle: DB connection, known IDs, rules, labels and projection.
+
+    With `fetch_format` "full" or "raw", bodies and attachments are archived
+    in `store` (the default blob store if not given). `rules_mtime` marks a
+    rules file version already applied to the stored mail.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        rules_path: Optional[str] = None,
+        fetch_format: str = "metadata",
+        store: Optional[BlobStore] = None,
+        rules_mtime: Optional[int] = None,
+    ):
+        self.conn = conn
+        self.known_ids: Set[str] = fetch_email_ids(conn)
+        self.rule_cache = RuleCache(rules_path, mtime=rules_mtime)
+        self.fetch_format = fetch_format
+        self.projection = None  # built from the rules on the first cycle
+        self.labels = None  # label registry, bound to the service on the first cycle
+        self.store = None
+        if fetch_format != "metadata":
+            self.store = store or BlobStore()
+
+
+def backfill_recipients(service, state: SyncState, rules, batch_limit: int = 10) -> int:
+    """Fetch the To header of stored emails saved while no rule needed it.
+
+    Uses metadata requests whatever the fetch format; archived bodies are
+    kept. Returns the number of emails updated.
+    """
+    ids = fetch_ids_without_recipient(state.conn)
+    if not ids:
+        return 0
+    emails = get_messages(service, ids, batch_limit, build_projection(rules))
+    save_emails(emails, conn=state.conn)
+    METRICS.inc("recipients_backfilled", len(emails))
+    logging.info("Backfilled the To header of %d stored emails", len(emails))
+    return len(emails)
+
+
+def run_cycle(service, state: SyncState, batch_size: int = 50, batch_limit: int = 10) -> int:
+    """Fetch new mail, store it and run rules. Returns the number of new emails.
+
+    Rules normally run only on the new emails; after `rules.json` changes
+    they run once over the whole store so edited rules see existing mail,
+    after backfilling `To` if the new rules read it.
+    """
+    rules, reloaded = state.rule_cache.get()
+    if reloaded or state.projection is None:
+        state.projection = build_projection(rules, state.fetch_format)
+    if state.labels is None:
+        state.labels = LabelRegistry(service)
+
+    new_emails = fetch_new_emails_from_gmail(
+        service, state.known_ids, batch_size=batch_size, batch_limit=batch_limit,
+        projection=state.projection, store=state.store,
+    )
+    if new_emails:
+        save_emails(new_emails, conn=state.conn)
+
+    if reloaded:
+        if "To" in state.projection.headers:
+            backfill_recipients(service, state, rules, batch_limit)
+        process_rules(service, emails=fetch_all_emails(state.conn), rules=rules, labels=state.labels)
+    elif new_emails:
+        process_rules(service, emails=new_emails, rules=rules, labels=state.labels)
+
+    return len(new_emails)
+
+
+def next_delay(interval: float, jitter: float) -> float:
+    """Interval randomised by +/- `jitter` (a fraction) to spread API load."""
+    return max(0.0, interval * (1 + random.uniform(-jitter, jitter)))
+
+
+def install_signal_handlers(stop_event: threading.Event) -> None:
+    """Set `stop_event` on SIGTERM/SIGINT so the current cycle finishes cleanly."""
+    def _handle(signum, frame):
+        logging.info("Received signal %s, shutting down after current cycle...", signum)
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, _handle)
+    signal.signal(signal.SIGINT, _handle)
+
+
+def run_daemon(
+    service,
+    state: SyncState,
+    interval: float = 300,
+    jitter: float = 0.1,
+    batch_size: int = 50,
+    batch_limit: int = 10,
+    stop_event: Optional[threading.Event] = None,
+    max_cycles: Optional[int] = None,
+    after_cycle: Optional[Callable[[], None]] = None,
+) -> int:
+    """Run sync cycles until `stop_event` is set. Returns the number of cycles run."""
+    stop_event = stop_event or threading.Event()
+    cycles = 0
+
+    while not stop_event.is_set():
+        started = time.monotonic()
+        try:
+            with METRICS.timer("cycle"):
+                count = run_cycle(service, state, batch_size=batch_size, batch_limit=batch_limit)
+            logging.info("Cycle %d: %d new emails in %.2fs", cycles + 1, count, time.monotonic() - started)
+        except Exception as e:
+            METRICS.inc("cycle_errors")
+            logging.error(DAEMON_CYCLE_FAILED, e)
+
+        cycles += 1
+        if after_cycle:
+            after_cycle()
+        if max_cycles is not None and cycles >= max_cycles:
+            break
+        stop_event.wait(next_delay(interval, jitter))
+
+    return cycles
@@ -0,0 +1,102 @@
+"""Date normalization: parse once at ingest, store UTC epoch seconds.
+
+Gmail Date headers are parsed with a fast path for the common RFC 2822
+shapes ("Mon, 1 Jan 2024 10:00:00 +0000", optional weekday/seconds,
+numeric or GMT/UTC zones, trailing comments) and a memo cache, since bulk
+and newsletter mail repeats the same header strings. Anything else falls
+back to `email.utils.parsedate_to_datetime`.
+"""
+
+import calendar
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Optional, Tuple
+
+_MONTHS = {m: i for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1)}
+
+_RFC2822 = re.compile(
+    r"\s*(?:[A-Za-z]{3},\s*)?"
+    r"(\d{1,2})\s+([A-Za-z]{3})\s+(\d{4})\s+"
+    r"(\d{1,2}):(\d{2})(?::(\d{2}))?\s*"
+    r"(?:([+-])(\d{2})(\d{2})|(GMT|UTC|UT|Z))?"
+    r"\s*(?:\(.*\))?\s*$"
+)
+
+DAY_SECONDS = 86400
+
+
+def to_epoch(value: Optional[datetime]) -> Optional[int]:
+    """Whole UTC seconds for `value`; naive datetimes are taken to be UTC."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def iso_to_epoch(value: Optional[str]) -> Optional[int]:
+    """Epoch seconds for a stored ISO 8601 `received_at`, or None if unparsable."""
+    if not value:
+        return None
+    try:
+        return to_epoch(datetime.fromisoformat(value))
+    except ValueError:
+        return None
+
+
+def epoch_to_iso(epoch: int) -> str:
+    """ISO 8601 text (UTC) for an epoch timestamp."""
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def _fast_rfc2822(date_str: str) -> Optional[Tuple[str, int]]:
+    match = _RFC2822.match(date_str)
+    if not match:
+        return None
+    day, mon, year, hour, minute, second, sign, off_h, off_m, named = match.groups()
+    month = _MONTHS.get(mon.lower())
+    if not month:
+        return None
+    day, year, hour, minute = int(day), int(year), int(hour), int(minute)
+    second = int(second or 0)
+    try:
+        # Validates the calendar date and time fields
+        datetime(year, month, day, hour, minute, second)
+    except ValueError:
+        return None
+
+    local = calendar.timegm((year, month, day, hour, minute, second))
+    iso = f"{year:04d}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:{second:02d}"
+    if sign is None:
+        # No zone, or a named one: UTC for GMT/UTC/UT/Z and naive otherwise (as parsedate does)
+        return (iso + "+00:00" if named else iso), local
+    offset = int(off_h) * 3600 + int(off_m) * 60
+    if sign == "-" and offset == 0:
+        # RFC 2822 "-0000": UTC time with no known local zone
+        return iso, local
+    if sign == "-":
+        offset = -offset
+    return f"{iso}{sign}{off_h}:{off_m}", local - offset
+
+
+@lru_cache(maxsize=65536)
+def parse_email_date(date_str: str) -> Optional[Tuple[str, int]]:
+    """Parse a Date header into (ISO 8601 text, UTC epoch seconds), memoized."""
+    parsed = _fast_rfc2822(date_str)
+    if parsed is not None:
+        return parsed
+    try:
+        value = parsedate_to_datetime(date_str)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if value is None:
+        return None
+    return value.isoformat(), to_epoch(value)
+
+
+def age_days(received_ts: int, now: int) -> int:
+    """Whole days between `received_ts` and `now` (floored, like timedelta.days)."""
+    return (now - received_ts) // DAY_SECONDS
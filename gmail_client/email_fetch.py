@@ -1,8 +1,16 @@
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Optional, Set, Tuple
 import logging, time, random
 from googleapiclient.errors import HttpError
-from datetime import datetime
-from email.utils import parsedate_to_datetime
+from config.gmail_config import FETCH_PIPELINE, RAW_BATCH_LIMIT
+from gmail_client.dates import parse_email_date, epoch_to_iso
+from gmail_client.metrics import METRICS
+from gmail_client.quota import charge
+from gmail_client.models import Email
+from gmail_client.projection import Projection, DEFAULT_PROJECTION
+from gmail_client.archive import archive_message, download_attachments
+from gmail_client.blob_store import BlobStore
+from gmail_client.transport import http_for_thread
 from gmail_client.errors import (
     EMAIL_PARSE_HEADER_FAILED,
     EMAIL_PARSE_INTERNALDATE_FAILED,
@@ -19,62 +27,88 @@ def parse_headers(headers: List[Dict]) -> Dict[str, str]:
     """Convert Gmail headers list to a dictionary with lowercase keys."""
     return {header["name"].lower(): header["value"] for header in headers}
 
-def extract_received_at(date_str: Optional[str], message: Dict) -> Optional[str]:
+def normalize_received(date_str: Optional[str], message: Dict) -> Tuple[Optional[str], Optional[int]]:
     """
-    Extract and normalize Gmail 'received_at' timestamp as ISO 8601 string.
+    Normalize Gmail 'received_at' once at ingest.
+    Returns (ISO 8601 text, UTC epoch seconds) from the Date header,
+    falling back to Gmail's internalDate.
     """
-    received_at: Optional[datetime] = None
-
     if date_str:
-        try:
-            received_at = parsedate_to_datetime(date_str)
-        except Exception as e:
-            logging.warning(EMAIL_PARSE_HEADER_FAILED, date_str, e)
+        parsed = parse_email_date(date_str)
+        if parsed is not None:
+            return parsed
+        logging.warning(EMAIL_PARSE_HEADER_FAILED, date_str, "unrecognized date format")
+
+    try:
+        internal_ts = int(message.get("internalDate", 0)) // 1000
+        return epoch_to_iso(internal_ts), internal_ts
+    except Exception as e:
+        logging.error(EMAIL_PARSE_INTERNALDATE_FAILED, e)
+        return None, None
 
-    if not received_at:
-        try:
-            internal_ts = int(message.get("internalDate", 0)) / 1000
-            received_at = datetime.utcfromtimestamp(internal_ts)
-        except Exception as e:
-            logging.error(EMAIL_PARSE_INTERNALDATE_FAILED, e)
-            received_at = None
 
-    return received_at.isoformat() if received_at else None
+def extract_received_at(date_str: Optional[str], message: Dict) -> Optional[str]:
+    """
+    Extract and normalize Gmail 'received_at' timestamp as ISO 8601 string.
+    """
+    return normalize_received(date_str, message)[0]
 
 
 def process_message_response(
-    emails: List[Dict],
+    emails: List[Email],
     request_id: str,
     response: Dict,
-    exception: Optional[Exception]
+    exception: Optional[Exception],
+    store: Optional[BlobStore] = None,
+    has_recipient: bool = True,
 ) -> None:
-    """Callback for handling each Gmail message in batch request."""
+    """Callback for handling each Gmail message in batch request.
+
+    With a `store` (full/raw fetch modes) the body and attachments are
+    archived and referenced from the record. `has_recipient` is False when
+    the To header was not requested; the recipient is then left as None
+    (unknown) rather than "" (no To header).
+    """
     if exception:
+        METRICS.inc("messages_dropped")
+        if isinstance(exception, HttpError) and exception.resp.status == 429:
+            METRICS.inc("rate_limited_429")
         logging.error(EMAIL_FETCH_ERROR, request_id, exception)
         return
 
     try:
-        headers = response.get("payload", {}).get("headers", [])
+        body_blob, attachments = None, []
+        if store is not None:
+            headers, body_blob, attachments = archive_message(response, store)
+        else:
+            headers = response.get("payload", {}).get("headers", [])
         headers_dict = parse_headers(headers)
 
         subject = headers_dict.get("subject", "(No Subject)")
         sender = headers_dict.get("from", "(Unknown Sender)")
+        recipient = headers_dict.get("to", "") if has_recipient else None
         date_str = headers_dict.get("date")
-        received_at = extract_received_at(date_str, response)
+        received_at, received_ts = normalize_received(date_str, response)
 
         labels = response.get("labelIds", [])
         is_read = 0 if "UNREAD" in labels else 1
 
-        emails.append({
-            "id": response["id"],
-            "subject": subject,
-            "from": sender,
-            "snippet": response.get("snippet"),
-            "received_at": received_at,
-            "is_read": is_read,
-            "labels": labels,
-        })
+        emails.append(Email(
+            id=response["id"],
+            sender=sender,
+            recipient=recipient,
+            subject=subject,
+            snippet=response.get("snippet"),
+            received_at=received_at,
+            received_ts=received_ts,
+            is_read=is_read,
+            labels=labels,
+            body_blob=body_blob,
+            attachments=attachments,
+        ))
+        METRICS.inc("messages_fetched")
     except Exception as e:
+        METRICS.inc("messages_dropped")
         logging.error(EMAIL_PROCESS_FAILED, e)
 
 
@@ -82,87 +116,270 @@ def safe_execute(batch, retries: int = 5):
     """Execute Gmail batch request with exponential backoff on rate limits."""
     for i in range(retries):
         try:
-            return batch.execute()
+            with METRICS.timer("batch_execute"):
+                return batch.execute()
         except HttpError as e:
             if e.resp.status == 429:  # rate limit exceeded
+                METRICS.inc("rate_limited_429")
+                METRICS.inc("batch_retries")
                 wait = (2 ** i) + random.random() # to avoids lots of retries
-                logging.warning(EMAIL_RATE_LIMITED, f"{wait:.1f}s")
+                logging.warning(EMAIL_RATE_LIMITED, "%.1fs" % wait)
                 time.sleep(wait)
             else:
                 raise # Pass it back to the caller
     raise RuntimeError(EMAIL_MAX_RETRIES_EXCEEDED)
 
 
-def fetch_inbox_messages(
+def list_message_ids(
     service,
     max_results: int = 50,
     page_token: Optional[str] = None,
-    batch_limit: int = 10,  # 👈 throttle batch size to avoid 429s
-) -> Tuple[List[Dict], Optional[str]]:
-    """
-    Fetch one page of emails from Gmail inbox using batch requests.
-    Handles Gmail rate limits with retries and smaller batch sizes.
-    Returns:
-        (emails, nextPageToken)
+    projection: Projection = DEFAULT_PROJECTION,
+    http=None,
+) -> Tuple[List[str], Optional[str]]:
+    """List one page of inbox message IDs. Returns (ids, nextPageToken).
+
+    `http` overrides the service's HTTP object (for calls from another thread).
     """
-    try:
-        results: Dict = service.users().messages().list(
+    charge("messages.list")
+    with METRICS.timer("list"):
+        request = service.users().messages().list(
             userId="me",
             labelIds=["INBOX"],
             maxResults=max_results,
-            pageToken=page_token
-        ).execute()
+            pageToken=page_token,
+            **projection.list_kwargs()
+        )
+        results: Dict = request.execute(http=http) if http is not None else request.execute()
+
+    messages: List[Dict] = results.get("messages", [])
+    return [msg["id"] for msg in messages], results.get("nextPageToken")
+
+
+def _execute_gets(service, message_ids: List[str], get_kwargs: Dict) -> List[Tuple]:
+    """Run one batch of `messages.get`; returns the raw (request_id, response, exception) triples."""
+    responses: List[Tuple] = []
+    batch = service.new_batch_http_request() # sending multiple requests in a single HTTP request
+    for msg_id in message_ids:
+        batch.add(
+            service.users().messages().get(userId="me", id=msg_id, **get_kwargs),
+            callback=lambda request_id, response, exception: responses.append((request_id, response, exception))
+        )
+
+    charge("messages.get", len(message_ids))
+    safe_execute(batch)  # 👈 use retry wrapper
+    return responses
+
 
-        messages: List[Dict] = results.get("messages", [])
-        next_page_token: Optional[str] = results.get("nextPageToken")
+def _gets_per_batch(projection: Projection, batch_limit: int) -> int:
+    """Batch size for `messages.get`; raw responses hold whole messages, so their batches are capped."""
+    return min(batch_limit, RAW_BATCH_LIMIT) if projection.fmt == "raw" else batch_limit
 
-        if not messages:
-            return [], next_page_token
 
-        emails: List[Dict] = []
+def _parse_responses(
+    responses: List[Tuple], store: Optional[BlobStore] = None, has_recipient: bool = True
+) -> List[Email]:
+    emails: List[Email] = []
+    for request_id, response, exception in responses:
+        process_message_response(emails, request_id, response, exception, store, has_recipient)
+    return emails
 
-        # Process in smaller chunks to avoid hitting Gmail concurrency limits
-        for i in range(0, len(messages), batch_limit):
-            chunk = messages[i:i + batch_limit]
-            batch = service.new_batch_http_request() # sending multiple requests in a single HTTP request
 
-            for msg in chunk:
-                batch.add(
-                    service.users().messages().get(userId="me", id=msg["id"], format="metadata"),
-                    callback=lambda request_id, response, exception: process_message_response(
-                        emails, request_id, response, exception
-                    )
-                )
+def get_messages(
+    service,
+    message_ids: List[str],
+    batch_limit: int = 10,
+    projection: Projection = DEFAULT_PROJECTION,
+    store: Optional[BlobStore] = None,
+) -> List[Email]:
+    """Fetch metadata for the given message IDs using throttled batch requests.
+
+    Only the headers and fields in `projection` are requested. With a
+    `store`, bodies and attachments are archived there as they arrive.
+    """
+    emails: List[Email] = []
+    get_kwargs = projection.get_kwargs()
+    batch_limit = _gets_per_batch(projection, batch_limit)
+
+    # Process in smaller chunks to avoid hitting Gmail concurrency limits
+    for i in range(0, len(message_ids), batch_limit):
+        responses = _execute_gets(service, message_ids[i:i + batch_limit], get_kwargs)
+        chunk = _parse_responses(responses, store, projection.fetches("To"))
+        emails.extend(chunk)
+        if store is not None:
+            download_attachments(service, chunk, store)
+
+    return emails
+
+
+def fetch_inbox_messages(
+    service,
+    max_results: int = 50,
+    page_token: Optional[str] = None,
+    batch_limit: int = 10,  # 👈 throttle batch size to avoid 429s
+    projection: Projection = DEFAULT_PROJECTION,
+    store: Optional[BlobStore] = None,
+) -> Tuple[List[Email], Optional[str]]:
+    """
+    Fetch one page of emails from Gmail inbox using batch requests.
+    Handles Gmail rate limits with retries and smaller batch sizes.
+    Returns:
+        (emails, nextPageToken)
+    """
+    try:
+        with METRICS.timer("fetch_page"):
+            message_ids, next_page_token = list_message_ids(service, max_results, page_token, projection)
 
-            safe_execute(batch)  # 👈 use retry wrapper
+            if not message_ids:
+                return [], next_page_token
 
-        return emails, next_page_token
+            return get_messages(service, message_ids, batch_limit, projection, store), next_page_token
 
     except HttpError as e:
+        METRICS.inc("fetch_errors")
         logging.error(EMAIL_GMAIL_API_ERROR, e)
         return [], None
     except Exception as e:
+        METRICS.inc("fetch_errors")
         logging.error(EMAIL_UNEXPECTED_FETCH_ERROR, e)
         return [], None
 
 
-def fetch_all_emails_from_gmail(service, batch_size: int = 50, batch_limit: int = 10) -> List[Dict]:
+def fetch_all_pipelined(
+    service,
+    batch_size: int = 50,
+    batch_limit: int = 10,
+    projection: Projection = DEFAULT_PROJECTION,
+    store: Optional[BlobStore] = None,
+) -> List[Email]:
+    """Fetch the whole inbox with listing, batch gets and parsing overlapped.
+
+    As soon as a page's listing returns, a lister thread requests the next
+    page with its `nextPageToken` while this page's get batches run here. A
+    parser thread turns each batch's responses into records while the next
+    batch is on the wire, and must finish before that batch is handed
+    over, so at most two batches of responses are held at a time. The
+    lister gets its own HTTP object, since httplib2 connections must not be
+    shared between threads. Records come back in inbox order.
+    """
+    get_kwargs = projection.get_kwargs()
+    has_recipient = projection.fetches("To")
+    batch_limit = _gets_per_batch(projection, batch_limit)
+    parsed: List[Future] = []
+    previous: Optional[Future] = None
+    list_http = http_for_thread(service)
+
+    with ThreadPoolExecutor(1, thread_name_prefix="gmail-list") as lister, \
+            ThreadPoolExecutor(1, thread_name_prefix="gmail-parse") as parser:
+        listing: Optional[Future] = lister.submit(list_message_ids, service, batch_size, None, projection, list_http)
+        try:
+            while listing is not None:
+                with METRICS.timer("list_wait"):  # near zero once the lister runs ahead
+                    message_ids, next_token = listing.result()
+                listing = None
+                if next_token:
+                    listing = lister.submit(list_message_ids, service, batch_size, next_token, projection, list_http)
+
+                page: List[Future] = []
+                for i in range(0, len(message_ids), batch_limit):
+                    responses = _execute_gets(service, message_ids[i:i + batch_limit], get_kwargs)
+                    if previous is not None:
+                        # At most one batch waits for the parser, so unparsed responses never pile up
+                        previous.result()
+                    previous = parser.submit(_parse_responses, responses, store, has_recipient)
+                    page.append(previous)
+                parsed.extend(page)
+                if store is not None:
+                    # Attachment downloads need the parsed records and stay on this thread's connection
+                    download_attachments(service, [email for future in page for email in future.result()], store)
+        except HttpError as e:
+            METRICS.inc("fetch_errors")
+            logging.error(EMAIL_GMAIL_API_ERROR, e)
+        except Exception as e:
+            METRICS.inc("fetch_errors")
+            logging.error(EMAIL_UNEXPECTED_FETCH_ERROR, e)
+        if listing is not None:
+            listing.cancel()
+
+        all_emails = [email for future in parsed for email in future.result()]
+
+    logging.info("Total emails fetched: %d", len(all_emails))
+    return all_emails
+
+
+def fetch_all_emails_from_gmail(
+    service,
+    batch_size: int = 50,
+    batch_limit: int = 10,
+    projection: Projection = DEFAULT_PROJECTION,
+    store: Optional[BlobStore] = None,
+    pipeline: bool = FETCH_PIPELINE,
+) -> List[Email]:
     """
     Fetch all emails from Gmail inbox using batch requests and nextPageToken.
-    Returns a list of email dictionaries.
+    With `pipeline` (the default), see `fetch_all_pipelined`.
+    Returns a list of `Email` records.
     """
-    all_emails: List[Dict] = []
+    if pipeline:
+        return fetch_all_pipelined(service, batch_size, batch_limit, projection, store)
+
+    all_emails: List[Email] = []
 
-    emails, next_token = fetch_inbox_messages(service, max_results=batch_size, batch_limit=batch_limit)
+    emails, next_token = fetch_inbox_messages(
+        service, max_results=batch_size, batch_limit=batch_limit, projection=projection, store=store
+    )
     if emails:
-        logging.info(f"Fetched {len(emails)} emails from Gmail (first batch).")
+        logging.info("Fetched %d emails from Gmail (first batch).", len(emails))
         all_emails.extend(emails)
 
     while next_token:
-        emails, next_token = fetch_inbox_messages(service, max_results=batch_size, page_token=next_token, batch_limit=batch_limit)
+        emails, next_token = fetch_inbox_messages(
+            service, max_results=batch_size, page_token=next_token, batch_limit=batch_limit,
+            projection=projection, store=store
+        )
         if emails:
-            logging.info(f"Fetched {len(emails)} emails from Gmail (next batch).")
+            logging.info("Fetched %d emails from Gmail (next batch).", len(emails))
             all_emails.extend(emails)
 
-    logging.info(f"Total emails fetched: {len(all_emails)}")
+    logging.info("Total emails fetched: %d", len(all_emails))
     return all_emails
+
+
+def fetch_new_emails_from_gmail(
+    service,
+    known_ids: Set[str],
+    batch_size: int = 50,
+    batch_limit: int = 10,
+    projection: Projection = DEFAULT_PROJECTION,
+    store: Optional[BlobStore] = None,
+) -> List[Email]:
+    """
+    Fetch only inbox messages whose IDs are not in `known_ids`.
+
+    Pages newest-first and stops at the first page with nothing new, so an
+    idle mailbox costs a single list call. `known_ids` is updated in place.
+    """
+    new_emails: List[Email] = []
+    page_token: Optional[str] = None
+
+    try:
+        while True:
+            message_ids, page_token = list_message_ids(service, batch_size, page_token, projection)
+            new_ids = [msg_id for msg_id in message_ids if msg_id not in known_ids]
+            if not new_ids:
+                break
+
+            emails = get_messages(service, new_ids, batch_limit, projection, store)
+            known_ids.update(email.id for email in emails)
+            new_emails.extend(emails)
+            if not page_token:
+                break
+    except HttpError as e:
+        METRICS.inc("fetch_errors")
+        logging.error(EMAIL_GMAIL_API_ERROR, e)
+    except Exception as e:
+        METRICS.inc("fetch_errors")
+        logging.error(EMAIL_UNEXPECTED_FETCH_ERROR, e)
+
+    logging.info("New emails fetched: %d", len(new_emails))
+    return new_emails
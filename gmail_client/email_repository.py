@@ -1,87 +1,417 @@
-"""Database layer for storing Gmail emails using SQLite3."""
+"""Database layer for storing Gmail emails using SQLite3.
 
+Emails live in one `emails` table, or (optionally) in monthly partition
+tables `emails_YYYYMM` keyed on the UTC month of `received_ts`, plus
+`emails_undated` for mail without a date. In the partitioned layout
+`emails` is a UNION ALL view over the partitions, so readers do not
+change. Filters on `received_ts` or `id` are pushed into each partition's
+indexes. Saves are routed to the matching partition, and a whole month
+can be dropped at once (see `gmail_client.maintenance`).
+"""
+
+import calendar
 import sqlite3
 import logging
-from typing import Dict, List
-from config.db_config import DB_FILE
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple, Union
+from config.db_config import DB_FILE, DB_PARTITIONED
+from gmail_client.errors import DB_FETCH_FAILED, DB_INIT_FAILED, DB_SAVE_FAILED
+from gmail_client.metrics import METRICS
+from gmail_client.models import Attachment, Email, labels_from_string
+from gmail_client.dates import iso_to_epoch
+
+# Original schema of the emails table: (name, type)
+BASE_COLUMNS = [
+    ("id", "TEXT PRIMARY KEY"),
+    ("sender", "TEXT"),
+    ("subject", "TEXT"),
+    ("snippet", "TEXT"),
+    ("received_at", "DATETIME"),
+    ("is_read", "INTEGER"),
+    ("labels", "TEXT"),
+]
+
+# Columns added after the original schema: (name, type). init_db adds any missing ones.
+ADDED_COLUMNS = [
+    ("received_ts", "INTEGER"),  # UTC epoch seconds of received_at
+    ("recipient", "TEXT"),  # To header, fetched when a rule needs it; NULL if never fetched
+    ("body_blob", "TEXT"),  # blob store digest of the body (full/raw fetch modes)
+    ("updated_at", "INTEGER"),  # UTC epoch microseconds of the last save; incremental export mark
+]
+
+EMAIL_FIELDS = [name for name, _ in BASE_COLUMNS + ADDED_COLUMNS]
+
+# Fields written by save_emails; an existing row is updated in place rather than deleted and re-inserted
+_SAVE_FIELDS = [
+    "id", "sender", "recipient", "subject", "snippet", "received_at", "received_ts", "is_read", "labels",
+    "body_blob", "updated_at",
+]
+# A save that did not fetch these (e.g. metadata after a full-format sync) keeps the stored value
+_KEEP_IF_NULL = {"recipient", "body_blob"}
+
+PARTITION_PREFIX = "emails_"
+UNDATED_PARTITION = "emails_undated"
+
+# IDs per `IN (...)` lookup, well under SQLite's bound-parameter limit
+_LOOKUP_CHUNK = 500
+
+
+def connect(db_file: Optional[str] = None, read_only: bool = False) -> sqlite3.Connection:
+    """Open a connection to the email database (long-lived callers keep it open).
+
+    `read_only` opens an existing file without the ability to change it,
+    e.g. for simulating rules against a snapshot.
+    """
+    if read_only:
+        return sqlite3.connect(f"file:{db_file or DB_FILE}?mode=ro", uri=True)
+    return sqlite3.connect(db_file or DB_FILE)
 
-def init_db():
-    """Initialize SQLite3 database and create table if not exists."""
+
+@contextmanager
+def _connection(conn: Optional[sqlite3.Connection]):
+    """Yield `conn`, or a fresh connection that is closed afterwards."""
+    if conn is not None:
+        yield conn
+        return
+    own = connect()
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS emails (
-                id TEXT PRIMARY KEY,
-                sender TEXT,
-                subject TEXT,
-                snippet TEXT,
-                received_at DATETIME,
-                is_read INTEGER,
-                labels TEXT
-            )
-        """)
+        yield own
+    finally:
+        own.close()
+
+
+def _columns_sql(columns: List[Tuple[str, str]]) -> str:
+    return ", ".join(f"{name} {col_type}" for name, col_type in columns)
+
+
+@lru_cache(maxsize=None)
+def _save_sql(table: str) -> str:
+    updates = ", ".join(
+        f"{name} = COALESCE(excluded.{name}, {name})" if name in _KEEP_IF_NULL else f"{name} = excluded.{name}"
+        for name in _SAVE_FIELDS[1:]
+    )
+    return (
+        f"INSERT INTO {table} ({', '.join(_SAVE_FIELDS)}) VALUES ({', '.join('?' * len(_SAVE_FIELDS))}) "
+        f"ON CONFLICT(id) DO UPDATE SET {updates}"
+    )
+
+
+def partition_name(received_ts: Optional[int]) -> str:
+    """Partition table holding mail received at `received_ts` (UTC month)."""
+    if received_ts is None:
+        return UNDATED_PARTITION
+    t = time.gmtime(received_ts)
+    return f"{PARTITION_PREFIX}{t.tm_year:04d}{t.tm_mon:02d}"
+
+
+def partition_range(name: str) -> Tuple[int, int]:
+    """[start, end) epoch seconds covered by the monthly partition `name`."""
+    year, month = int(name[-6:-2]), int(name[-2:])
+    start = calendar.timegm((year, month, 1, 0, 0, 0))
+    end = calendar.timegm((year + month // 12, month % 12 + 1, 1, 0, 0, 0))
+    return start, end
+
+
+def is_partitioned(conn: sqlite3.Connection) -> bool:
+    """True if `emails` is the view over monthly partitions."""
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'emails'").fetchone()
+    return bool(row) and row[0] == "view"
+
+
+def list_partitions(conn: sqlite3.Connection) -> List[str]:
+    """Partition table names, oldest month first and `emails_undated` last."""
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' "
+        "AND (name GLOB 'emails_[0-9][0-9][0-9][0-9][0-9][0-9]' OR name = ?) ORDER BY name",
+        (UNDATED_PARTITION,),
+    )
+    return [row[0] for row in rows]
+
+
+def create_partition(conn: sqlite3.Connection, name: str, schema: str = "main") -> None:
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {schema}.{name} ({_columns_sql(BASE_COLUMNS + ADDED_COLUMNS)})")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_{name}_received_ts ON {name}(received_ts)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_{name}_updated_at ON {name}(updated_at)")
+
+
+def rebuild_emails_view(conn: sqlite3.Connection) -> None:
+    """(Re)create the `emails` view over the current partitions."""
+    create_partition(conn, UNDATED_PARTITION)  # the view always has at least one table
+    fields = ", ".join(EMAIL_FIELDS)
+    # SQLite allows up to 500 compound terms: about 40 years of monthly partitions
+    union = " UNION ALL ".join(f"SELECT {fields} FROM {name}" for name in list_partitions(conn))
+    conn.execute("DROP VIEW IF EXISTS emails")
+    conn.execute(f"CREATE VIEW emails AS {union}")
+
+
+def partition_emails(conn: sqlite3.Connection) -> int:
+    """Move a single `emails` table into monthly partitions (one-time conversion).
+
+    Returns the number of partitions created. Does nothing if the database
+    is already partitioned.
+    """
+    if is_partitioned(conn):
+        return 0
+    fields = ", ".join(EMAIL_FIELDS)
+    months = [row[0] for row in conn.execute(
+        "SELECT DISTINCT strftime('%Y%m', received_ts, 'unixepoch') FROM emails WHERE received_ts IS NOT NULL"
+    )]
+    for month in months:
+        name = PARTITION_PREFIX + month
+        create_partition(conn, name)
+        conn.execute(
+            f"INSERT INTO {name} ({fields}) SELECT {fields} FROM emails WHERE received_ts >= ? AND received_ts < ?",
+            partition_range(name),
+        )
+    create_partition(conn, UNDATED_PARTITION)
+    conn.execute(f"INSERT INTO {UNDATED_PARTITION} ({fields}) SELECT {fields} FROM emails WHERE received_ts IS NULL")
+    conn.execute("DROP TABLE emails")
+    rebuild_emails_view(conn)
+    conn.commit()
+    logging.info("Partitioned emails into %d tables.", len(months) + 1)
+    return len(months) + 1
+
+
+def _migrate_table(conn: sqlite3.Connection, table: str) -> bool:
+    """Add columns missing from a table created by an older version; True if any were added."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    added = False
+    for name, col_type in ADDED_COLUMNS:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+            logging.info("Added column %s to %s table.", name, table)
+            added = True
+
+    if "received_ts" not in existing:
+        # Parse stored ISO dates once so readers never have to
+        conn.create_function("iso_to_epoch", 1, iso_to_epoch, deterministic=True)
+        conn.execute(f"UPDATE {table} SET received_ts = iso_to_epoch(received_at) WHERE received_at IS NOT NULL")
+
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_received_ts ON {table}(received_ts)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_updated_at ON {table}(updated_at)")
+    return added
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Add columns missing from databases created by older versions."""
+    if not is_partitioned(conn):
+        _migrate_table(conn, "emails")
+        return
+    added = [_migrate_table(conn, name) for name in list_partitions(conn)]
+    if any(added):
+        rebuild_emails_view(conn)
 
-        conn.commit()
-        conn.close()
+
+def open_snapshot(db_file: Optional[str] = None) -> sqlite3.Connection:
+    """Open a database (or snapshot of one) for reading without modifying it.
+
+    A file written by an older version is copied into memory and migrated
+    there, so readers always see the current columns.
+    """
+    conn = connect(db_file, read_only=True)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(emails)")}
+    if all(name in existing for name, _ in ADDED_COLUMNS):
+        return conn
+    memory = sqlite3.connect(":memory:")
+    conn.backup(memory)
+    conn.close()
+    init_db(memory, partitioned=False)
+    return memory
+
+
+def init_db(conn: Optional[sqlite3.Connection] = None, partitioned: Optional[bool] = None):
+    """Initialize SQLite3 database and create table if not exists.
+
+    With `partitioned` (default: `DB_PARTITIONED`) a single `emails` table
+    is converted to monthly partitions. A partitioned database stays
+    partitioned either way.
+    """
+    partitioned = DB_PARTITIONED if partitioned is None else partitioned
+    try:
+        with _connection(conn) as conn:
+            cursor = conn.cursor()
+
+            # Only takes effect on a new, empty file; lets `maintain` reclaim free pages incrementally
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            if not is_partitioned(conn):
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS emails ({_columns_sql(BASE_COLUMNS)})")
+            _migrate(conn)
+            if partitioned:
+                partition_emails(conn)
+
+            # Attachments of archived messages; `blob` is shared by identical files
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS attachments (
+                    message_id TEXT,
+                    part_id TEXT,
+                    filename TEXT,
+                    mime_type TEXT,
+                    size INTEGER,
+                    attachment_id TEXT,
+                    blob TEXT,
+                    PRIMARY KEY (message_id, part_id)
+                )
+            """)
+
+            # High-water marks of named incremental exports (see gmail_client.export)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS export_state (
+                    name TEXT PRIMARY KEY,
+                    high_water INTEGER,
+                    exported_at INTEGER
+                )
+            """)
+
+            conn.commit()
         logging.info("Database initialized successfully.")
     except Exception as e:
-        logging.error(f"Failed to initialize database: {e}")
+        logging.error(DB_INIT_FAILED, e)
+
+
+def _stored_partitions(conn: sqlite3.Connection, ids: List[str]) -> Dict[str, str]:
+    """Partition currently holding each of `ids` that is already stored."""
+    found = {}
+    for start in range(0, len(ids), _LOOKUP_CHUNK):
+        chunk = ids[start:start + _LOOKUP_CHUNK]
+        rows = conn.execute(
+            f"SELECT id, received_ts FROM emails WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+        )
+        found.update((row[0], partition_name(row[1])) for row in rows)
+    return found
 
 
-def save_emails(emails: List[Dict]):
-    """Save list of emails to database."""
+def _move_row(conn: sqlite3.Connection, message_id: str, source: str, target: str) -> None:
+    """Move a stored row between partitions, so the upsert that follows updates it in place."""
+    fields = ", ".join(EMAIL_FIELDS)
+    conn.execute(f"INSERT INTO {target} ({fields}) SELECT {fields} FROM {source} WHERE id = ?", (message_id,))
+    conn.execute(f"DELETE FROM {source} WHERE id = ?", (message_id,))
+
+
+def save_emails(emails: List[Union[Email, Dict]], conn: Optional[sqlite3.Connection] = None):
+    """Save list of emails (`Email` records or legacy dicts) to database.
+
+    With partitions, an email whose received date moved it to another
+    month is moved out of its old partition rather than stored twice.
+    """
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
+        with METRICS.timer("db_write"), _connection(conn) as conn:
+            cursor = conn.cursor()
+            updated_at = time.time_ns() // 1000
+            emails = [Email.from_dict(email) if isinstance(email, dict) else email for email in emails]
+            partitions = set(list_partitions(conn)) if is_partitioned(conn) else None
+            stored = _stored_partitions(conn, [email.id for email in emails]) if partitions is not None else {}
+            new_partitions = False
 
-        for email in emails:
-            print("*:", email)
-            cursor.execute("""
-                INSERT OR REPLACE INTO emails (id, sender, subject, snippet, received_at, is_read, labels)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                email.get("id"),
-                email.get("from"),
-                email.get("subject"),
-                email.get("snippet"),
-                email.get("received_at"),
-                0,
-                ",".join(email.get("labels", []))
-            ))
+            for email in emails:
+                table = "emails"
+                if partitions is not None:
+                    table = partition_name(email.received_ts)
+                    if table not in partitions:
+                        create_partition(conn, table)
+                        partitions.add(table)
+                        new_partitions = True
+                    current = stored.get(email.id)
+                    if current is not None and current != table:
+                        _move_row(conn, email.id, current, table)
+                        METRICS.inc("emails_repartitioned")
+                    stored[email.id] = table
+                cursor.execute(_save_sql(table), (
+                    email.id,
+                    email.sender,
+                    email.recipient,
+                    email.subject,
+                    email.snippet,
+                    email.received_at,
+                    email.received_ts,
+                    email.is_read,
+                    ",".join(email.labels),
+                    email.body_blob,
+                    updated_at
+                ))
+                if email.attachments:
+                    cursor.executemany("""
+                        INSERT OR REPLACE INTO attachments (message_id, part_id, filename, mime_type, size, attachment_id, blob)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, [
+                        (email.id, a.part_id, a.filename, a.mime_type, a.size, a.attachment_id, a.blob)
+                        for a in email.attachments
+                    ])
 
-        conn.commit()
-        conn.close()
-        logging.info(f"Saved {len(emails)} emails to database.")
+            if new_partitions:
+                rebuild_emails_view(conn)
+            conn.commit()
+        METRICS.inc("emails_saved", len(emails))
+        logging.info("Saved %d emails to database.", len(emails))
     except Exception as e:
-        logging.error(f"Failed to save emails: {e}")
+        METRICS.inc("db_write_errors")
+        logging.error(DB_SAVE_FAILED, e)
 
 
-def fetch_all_emails() -> List[Dict]:
+def fetch_all_emails(conn: Optional[sqlite3.Connection] = None) -> List[Email]:
     """Retrieve all stored emails from the database."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT id, sender, subject, snippet, received_at, is_read, labels FROM emails")
-        rows = cursor.fetchall()
+        with _connection(conn) as conn:
+            cursor = conn.cursor()
 
-        conn.close()
+            cursor.execute(
+                "SELECT id, sender, recipient, subject, snippet, received_at, received_ts, is_read, labels, body_blob "
+                "FROM emails"
+            )
+            rows = cursor.fetchall()
 
         emails = []
         for row in rows:
-            emails.append({
-                "id": row[0],
-                "from": row[1],
-                "subject": row[2],
-                "snippet": row[3],
-                "received_at": row[4],
-                "is_read": bool(row[5]),
-                "labels": row[6].split(",") if row[6] else []
-            })
+            emails.append(Email(
+                id=row[0],
+                sender=row[1],
+                recipient=row[2],
+                subject=row[3],
+                snippet=row[4],
+                received_at=row[5],
+                received_ts=row[6],
+                is_read=row[7] or 0,
+                labels=labels_from_string(row[8]),
+                body_blob=row[9],
+            ))
 
         return emails
     except Exception as e:
-        logging.error(f"Failed to fetch emails from DB: {e}")
+        logging.error(DB_FETCH_FAILED, e)
+        return []
+
+
+def fetch_email_ids(conn: Optional[sqlite3.Connection] = None) -> Set[str]:
+    """Return the set of message IDs already stored in the database."""
+    try:
+        with _connection(conn) as conn:
+            return {row[0] for row in conn.execute("SELECT id FROM emails")}
+    except Exception as e:
+        logging.error(DB_FETCH_FAILED, e)
+        return set()
+
+
+def fetch_ids_without_recipient(conn: Optional[sqlite3.Connection] = None) -> List[str]:
+    """Return the IDs of stored emails whose To header was never fetched."""
+    try:
+        with _connection(conn) as conn:
+            return [row[0] for row in conn.execute("SELECT id FROM emails WHERE recipient IS NULL ORDER BY id")]
+    except Exception as e:
+        logging.error(DB_FETCH_FAILED, e)
+        return []
+
+
+def fetch_email_attachments(message_id: str, conn: Optional[sqlite3.Connection] = None) -> List[Attachment]:
+    """Return the stored attachments of one message."""
+    try:
+        with _connection(conn) as conn:
+            rows = conn.execute(
+                "SELECT part_id, filename, mime_type, size, attachment_id, blob FROM attachments "
+                "WHERE message_id = ? ORDER BY part_id",
+                (message_id,),
+            ).fetchall()
+        return [Attachment(*row) for row in rows]
+    except Exception as e:
+        logging.error(DB_FETCH_FAILED, e)
         return []
@@ -0,0 +1,452 @@
+"""In-process stand-in for the Gmail REST endpoints used by this project.
+
+`FakeGmail` mimics the googleapiclient service object closely enough to be
+passed anywhere a real service is expected: `users().messages()` list/get/
+modify/batchModify, `users().history().list`, `users().labels()` list/
+create, and multipart batches via `new_batch_http_request()`. Batches run
+their sub-requests on `execute()` (not on `add()`), as the real client
+does.
+
+Mailboxes are synthetic and generated lazily from the message sequence
+number, so 10^5-10^6 message mailboxes cost memory only for messages whose
+labels were modified. Round-trip latency and 429 responses can be
+injected to load-test the fetch and action engines offline.
+"""
+
+import base64
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httplib2
+from googleapiclient.errors import BatchError, HttpError
+
+from gmail_client.labels import SYSTEM_LABELS
+from gmail_client.quota import QUOTA_UNITS
+
+# Gmail rejects batches with more than 100 calls
+MAX_BATCH_SIZE = 100
+MAX_BATCH_MODIFY_IDS = 1000
+
+SENDERS = [
+    "no-reply@rmp.flipkart.com", "newsletter@example.com", "hr@tenmiles.com",
+    "alice@example.com", "bob@example.org", "alerts@bank.example", "team@github.com",
+]
+SUBJECTS = [
+    "Min. 30% Off on Early Bird Deals", "Min. 50% Off on Early Bird Deals",
+    "Interview schedule", "Weekly digest", "Your statement is ready",
+    "Important: account update", "Re: project sync",
+]
+CATEGORIES = ["CATEGORY_PERSONAL", "CATEGORY_SOCIAL", "CATEGORY_PROMOTIONS", "CATEGORY_UPDATES"]
+
+_ID_BASE = 0x18A0000000000000
+
+
+def _http_error(status: int, message: str) -> HttpError:
+    return HttpError(httplib2.Response({"status": status}), message.encode())
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode()
+
+
+class FakeRequest:
+    """A prepared API call; `execute()` performs it like `HttpRequest.execute`."""
+
+    def __init__(self, gmail: "FakeGmail", method: str, handler: Callable[[], Dict]):
+        self.gmail = gmail
+        self.method = method
+        self.handler = handler
+
+    def execute(self, http=None, num_retries: int = 0):
+        self.gmail._round_trip(1)
+        self.gmail._maybe_rate_limit(self.gmail.rate_limit_probability)
+        return self.gmail._call(self)
+
+
+class FakeBatch:
+    """Multipart batch: sub-requests are collected by `add()` and run on `execute()`."""
+
+    def __init__(self, gmail: "FakeGmail", callback: Optional[Callable] = None):
+        self.gmail = gmail
+        self.callback = callback
+        self.requests: List[Tuple[str, FakeRequest, Optional[Callable]]] = []
+
+    def add(self, request: FakeRequest, callback: Optional[Callable] = None, request_id: Optional[str] = None):
+        if len(self.requests) >= MAX_BATCH_SIZE:
+            raise BatchError(f"Exceeded maximum calls({MAX_BATCH_SIZE}) in a single batch")
+        request_id = request_id or str(len(self.requests) + 1)
+        self.requests.append((request_id, request, callback))
+
+    def execute(self, http=None):
+        gmail = self.gmail
+        gmail._round_trip(len(self.requests))
+        gmail._maybe_rate_limit(gmail.rate_limit_probability)
+        with gmail._lock:
+            gmail.calls["batch"] = gmail.calls.get("batch", 0) + 1
+
+        for request_id, request, callback in self.requests:
+            response, exception = None, None
+            try:
+                gmail._maybe_rate_limit(gmail.sub_request_rate_limit_probability)
+                response = gmail._call(request)
+            except HttpError as e:
+                exception = e
+            for cb in (callback, self.callback):
+                if cb:
+                    cb(request_id, response, exception)
+
+
+class _Attachments:
+    def __init__(self, gmail: "FakeGmail"):
+        self.gmail = gmail
+
+    def get(self, userId: str, messageId: str, id: str, **kwargs) -> FakeRequest:
+        return FakeRequest(self.gmail, "messages.attachments.get",
+                           lambda: self.gmail._get_attachment(messageId, id))
+
+
+class _Messages:
+    def __init__(self, gmail: "FakeGmail"):
+        self.gmail = gmail
+
+    def list(self, userId: str, labelIds: Optional[List[str]] = None, maxResults: int = 100,
+             pageToken: Optional[str] = None, **kwargs) -> FakeRequest:
+        return FakeRequest(self.gmail, "messages.list",
+                           lambda: self.gmail._list(labelIds or [], maxResults, pageToken))
+
+    def get(self, userId: str, id: str, format: str = "full",
+            metadataHeaders: Optional[List[str]] = None, **kwargs) -> FakeRequest:
+        return FakeRequest(self.gmail, "messages.get",
+                           lambda: self.gmail._get(id, format, metadataHeaders))
+
+    def modify(self, userId: str, id: str, body: Dict, **kwargs) -> FakeRequest:
+        return FakeRequest(self.gmail, "messages.modify", lambda: self.gmail._modify(id, body))
+
+    def batchModify(self, userId: str, body: Dict, **kwargs) -> FakeRequest:
+        return FakeRequest(self.gmail, "messages.batchModify", lambda: self.gmail._batch_modify(body))
+
+    def attachments(self) -> _Attachments:
+        return _Attachments(self.gmail)
+
+
+class _History:
+    def __init__(self, gmail: "FakeGmail"):
+        self.gmail = gmail
+
+    def list(self, userId: str, startHistoryId: str, maxResults: int = 100,
+             pageToken: Optional[str] = None, **kwargs) -> FakeRequest:
+        return FakeRequest(self.gmail, "history.list",
+                           lambda: self.gmail._history_list(int(startHistoryId), maxResults, pageToken))
+
+
+class _Labels:
+    def __init__(self, gmail: "FakeGmail"):
+        self.gmail = gmail
+
+    def list(self, userId: str, **kwargs) -> FakeRequest:
+        return FakeRequest(self.gmail, "labels.list", self.gmail._labels_list)
+
+    def create(self, userId: str, body: Dict, **kwargs) -> FakeRequest:
+        return FakeRequest(self.gmail, "labels.create", lambda: self.gmail._labels_create(body))
+
+
+class _Users:
+    def __init__(self, gmail: "FakeGmail"):
+        self.gmail = gmail
+
+    def messages(self) -> _Messages:
+        return _Messages(self.gmail)
+
+    def history(self) -> _History:
+        return _History(self.gmail)
+
+    def labels(self) -> _Labels:
+        return _Labels(self.gmail)
+
+
+class FakeGmail:
+    """Synthetic Gmail mailbox exposing the googleapiclient service interface.
+
+    Args:
+        size: Number of messages in the mailbox initially.
+        seed: Seed for message content and fault injection.
+        latency: Seconds slept per HTTP round trip (a batch is one round trip).
+        per_item_latency: Extra seconds per sub-request inside a batch.
+        rate_limit_probability: Chance a round trip fails with HTTP 429.
+        sub_request_rate_limit_probability: Chance a single batched call fails with 429.
+        attachment_ratio: Fraction of messages carrying an attachment in full/raw format.
+    """
+
+    def __init__(
+        self,
+        size: int = 1000,
+        seed: int = 0,
+        latency: float = 0.0,
+        per_item_latency: float = 0.0,
+        rate_limit_probability: float = 0.0,
+        sub_request_rate_limit_probability: float = 0.0,
+        attachment_ratio: float = 0.1,
+        start: Optional[datetime] = None,
+        spacing: timedelta = timedelta(minutes=5),
+    ):
+        self.size = size
+        self.seed = seed
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.rate_limit_probability = rate_limit_probability
+        self.sub_request_rate_limit_probability = sub_request_rate_limit_probability
+        self.attachment_ratio = attachment_ratio
+        # Newest message lands "now"; older ones are `spacing` apart
+        self.spacing = spacing
+        self.start = (start or datetime.now(timezone.utc)) - spacing * size
+
+        self._lock = threading.RLock()
+        self._fault_rng = random.Random(seed)
+        self._label_overrides: Dict[int, Tuple[str, ...]] = {}
+        self._user_labels: Dict[str, str] = {}
+        self._history: List[Dict] = []
+        self.history_id = 1
+        self.calls: Dict[str, int] = {}
+        self.quota_units = 0
+
+    # --- googleapiclient service interface ---
+    def users(self) -> _Users:
+        return _Users(self)
+
+    def new_batch_http_request(self, callback: Optional[Callable] = None) -> FakeBatch:
+        return FakeBatch(self, callback)
+
+    # --- mailbox generation ---
+    @staticmethod
+    def message_id(seq: int) -> str:
+        return format(_ID_BASE + seq, "x")
+
+    def _seq(self, message_id: str) -> int:
+        try:
+            seq = int(message_id, 16) - _ID_BASE
+        except (TypeError, ValueError):
+            seq = -1
+        if not 0 <= seq < self.size:
+            raise _http_error(404, f"Requested entity was not found: {message_id}")
+        return seq
+
+    def _rng(self, seq: int, stream: int = 0) -> random.Random:
+        return random.Random((self.seed << 48) ^ (stream << 40) ^ seq)
+
+    def _default_labels(self, seq: int) -> Tuple[str, ...]:
+        rng = self._rng(seq)
+        labels = ["INBOX", rng.choice(CATEGORIES)]
+        if rng.random() < 0.3:
+            labels.append("UNREAD")
+        if rng.random() < 0.05:
+            labels.append("IMPORTANT")
+        return tuple(labels)
+
+    def labels_of(self, message_id: str) -> Tuple[str, ...]:
+        seq = self._seq(message_id)
+        with self._lock:
+            labels = self._label_overrides.get(seq)
+        return labels if labels is not None else self._default_labels(seq)
+
+    def _content(self, seq: int) -> Dict:
+        rng = self._rng(seq, stream=1)
+        received = self.start + self.spacing * seq
+        sender = rng.choice(SENDERS)
+        subject = f"{rng.choice(SUBJECTS)} #{seq}"
+        return {
+            "from": sender,
+            "to": "me@example.com",
+            "subject": subject,
+            "date": format_datetime(received),
+            "internal_date": str(int(received.timestamp() * 1000)),
+            "body": f"Hello,\n\nThis is synthetic message {seq} from {sender}.\n" * (1 + seq % 5),
+            "has_attachment": rng.random() < self.attachment_ratio,
+            "attachment": bytes([seq % 7]) * 4096,
+        }
+
+    def deliver(self, count: int = 1) -> List[str]:
+        """Add `count` new messages on top of the inbox; returns their IDs."""
+        with self._lock:
+            ids = []
+            for _ in range(count):
+                seq = self.size
+                self.size += 1
+                self.history_id += 1
+                self._history.append({"id": str(self.history_id), "messagesAdded": [
+                    {"message": {"id": self.message_id(seq), "labelIds": list(self._default_labels(seq))}}
+                ]})
+                ids.append(self.message_id(seq))
+            return ids
+
+    # --- transport simulation ---
+    def _round_trip(self, items: int) -> None:
+        delay = self.latency + self.per_item_latency * items
+        if delay:
+            time.sleep(delay)
+
+    def _maybe_rate_limit(self, probability: float) -> None:
+        if probability:
+            with self._lock:
+                hit = self._fault_rng.random() < probability
+            if hit:
+                with self._lock:
+                    self.calls["rate_limited"] = self.calls.get("rate_limited", 0) + 1
+                raise _http_error(429, "Too many concurrent requests for user")
+
+    def _call(self, request: FakeRequest) -> Dict:
+        with self._lock:
+            self.calls[request.method] = self.calls.get(request.method, 0) + 1
+            self.quota_units += QUOTA_UNITS[request.method]
+        return request.handler()
+
+    # --- endpoint handlers ---
+    def _list(self, label_ids: List[str], max_results: int, page_token: Optional[str]) -> Dict:
+        max_results = max(1, min(int(max_results or 100), 500))
+        seq = self.size - 1 if page_token is None else int(page_token)
+        wanted = set(label_ids)
+        messages = []
+        while seq >= 0 and len(messages) < max_results:
+            message_id = self.message_id(seq)
+            if not wanted or wanted.issubset(self.labels_of(message_id)):
+                messages.append({"id": message_id, "threadId": message_id})
+            seq -= 1
+        result: Dict = {"resultSizeEstimate": len(messages)}
+        if messages:
+            result["messages"] = messages
+        if seq >= 0:
+            result["nextPageToken"] = str(seq)
+        return result
+
+    def _headers(self, content: Dict) -> List[Dict]:
+        return [
+            {"name": "From", "value": content["from"]},
+            {"name": "To", "value": content["to"]},
+            {"name": "Subject", "value": content["subject"]},
+            {"name": "Date", "value": content["date"]},
+            {"name": "Message-ID", "value": f"<{content['internal_date']}@example.com>"},
+        ]
+
+    def _raw(self, seq: int, content: Dict) -> bytes:
+        headers = "".join(f"{h['name']}: {h['value']}\r\n" for h in self._headers(content))
+        body = content["body"].replace("\n", "\r\n")
+        if not content["has_attachment"]:
+            return (headers + "Content-Type: text/plain; charset=utf-8\r\n\r\n" + body).encode()
+        attachment = base64.b64encode(content["attachment"]).decode()
+        return (
+            headers
+            + 'Content-Type: multipart/mixed; boundary="b"\r\n\r\n'
+            + "--b\r\nContent-Type: text/plain; charset=utf-8\r\n\r\n" + body + "\r\n"
+            + '--b\r\nContent-Type: application/octet-stream\r\n'
+            + f'Content-Disposition: attachment; filename="report-{seq % 7}.bin"\r\n'
+            + "Content-Transfer-Encoding: base64\r\n\r\n" + attachment + "\r\n--b--\r\n"
+        ).encode()
+
+    def _get(self, message_id: str, fmt: str, metadata_headers: Optional[List[str]]) -> Dict:
+        seq = self._seq(message_id)
+        content = self._content(seq)
+        message = {
+            "id": message_id,
+            "threadId": message_id,
+            "labelIds": list(self.labels_of(message_id)),
+            "snippet": content["body"][:100].replace("\n", " ").strip(),
+            "historyId": str(self.history_id),
+            "internalDate": content["internal_date"],
+            "sizeEstimate": len(content["body"]) + 512,
+        }
+        if fmt == "minimal":
+            return message
+        if fmt == "raw":
+            message["raw"] = _b64(self._raw(seq, content))
+            return message
+
+        headers = self._headers(content)
+        if fmt == "metadata":
+            if metadata_headers:
+                wanted = {name.lower() for name in metadata_headers}
+                headers = [h for h in headers if h["name"].lower() in wanted]
+            message["payload"] = {"mimeType": "text/plain", "headers": headers}
+            return message
+
+        body_part = {
+            "partId": "0", "mimeType": "text/plain", "filename": "", "headers": [],
+            "body": {"size": len(content["body"]), "data": _b64(content["body"].encode())},
+        }
+        parts = [body_part]
+        if content["has_attachment"]:
+            parts.append({
+                "partId": "1", "mimeType": "application/octet-stream",
+                "filename": f"report-{seq % 7}.bin", "headers": [],
+                "body": {"size": len(content["attachment"]), "attachmentId": f"att-{message_id}"},
+            })
+        message["payload"] = {"mimeType": "multipart/mixed", "headers": headers, "parts": parts}
+        return message
+
+    def _get_attachment(self, message_id: str, attachment_id: str) -> Dict:
+        content = self._content(self._seq(message_id))
+        if not content["has_attachment"] or attachment_id != f"att-{message_id}":
+            raise _http_error(404, f"Attachment not found: {attachment_id}")
+        return {"size": len(content["attachment"]), "data": _b64(content["attachment"])}
+
+    def _apply_labels(self, message_id: str, body: Dict) -> Tuple[str, ...]:
+        add = body.get("addLabelIds") or []
+        remove = body.get("removeLabelIds") or []
+        for label in add:
+            if label not in SYSTEM_LABELS and label not in self._user_labels.values():
+                raise _http_error(400, f"Invalid label: {label}")
+        with self._lock:
+            current = list(self.labels_of(message_id))
+            labels = tuple([l for l in current if l not in remove] + [l for l in add if l not in current])
+            self._label_overrides[self._seq(message_id)] = labels
+            self.history_id += 1
+            record = {"id": str(self.history_id)}
+            if add:
+                record["labelsAdded"] = [{"message": {"id": message_id}, "labelIds": list(add)}]
+            if remove:
+                record["labelsRemoved"] = [{"message": {"id": message_id}, "labelIds": list(remove)}]
+            self._history.append(record)
+        return labels
+
+    def _modify(self, message_id: str, body: Dict) -> Dict:
+        labels = self._apply_labels(message_id, body)
+        return {"id": message_id, "threadId": message_id, "labelIds": list(labels)}
+
+    def _batch_modify(self, body: Dict) -> str:
+        ids = body.get("ids") or []
+        if len(ids) > MAX_BATCH_MODIFY_IDS:
+            raise _http_error(400, f"Too many ids: {len(ids)} > {MAX_BATCH_MODIFY_IDS}")
+        for message_id in ids:
+            self._apply_labels(message_id, body)
+        return ""
+
+    def _history_list(self, start_history_id: int, max_results: int, page_token: Optional[str]) -> Dict:
+        with self._lock:
+            if self._history and start_history_id < int(self._history[0]["id"]) - 1:
+                raise _http_error(404, "startHistoryId is too old")
+            records = [r for r in self._history if int(r["id"]) > start_history_id]
+            offset = int(page_token or 0)
+            page = records[offset:offset + max_results]
+            result: Dict = {"historyId": str(self.history_id)}
+            if page:
+                result["history"] = page
+            if offset + max_results < len(records):
+                result["nextPageToken"] = str(offset + max_results)
+            return result
+
+    def _labels_list(self) -> Dict:
+        with self._lock:
+            labels = [{"id": name, "name": name, "type": "system"} for name in SYSTEM_LABELS]
+            labels += [{"id": label_id, "name": name, "type": "user"} for name, label_id in self._user_labels.items()]
+            return {"labels": labels}
+
+    def _labels_create(self, body: Dict) -> Dict:
+        name = body.get("name")
+        with self._lock:
+            if not name or name in self._user_labels or name in SYSTEM_LABELS:
+                raise _http_error(409, f"Label name exists or conflicts: {name}")
+            label_id = f"Label_{len(self._user_labels) + 1}"
+            self._user_labels[name] = label_id
+            return {"id": label_id, "name": name, "type": "user"}
@@ -38,6 +38,42 @@ EMAIL_MAX_RETRIES_EXCEEDED = "Max retries exceeded due to Gmail rate limits"
 DB_INIT_FAILED = "Failed to initialize database: %s"
 DB_SAVE_FAILED = "Failed to save emails: %s"
 DB_FETCH_FAILED = "Failed to fetch emails from DB: %s"
+DB_RETENTION_INVALID = "Retention must keep at least one month, got %s"
+DB_INCREMENTAL_VACUUM_OFF = f"{INFO_MARK} Incremental vacuum is off for this database; run maintain --full-vacuum once to enable it"
+
+# Auth
+AUTH_LOGIN_REQUIRED = "No usable token in %s; run the OAuth login for this account first"
+
+# Labels
+LABELS_LOAD_FAILED = f"{ERROR_MARK} Failed to resolve labels: %s"
+LABEL_CREATE_FAILED = f"{WARN_MARK} Failed to create label %s: %s"
 
 # Gmail service
 GMAIL_SERVICE_FAILED = "Failed to build Gmail service: %s"
+
+# Transport
+TRANSPORT_UNKNOWN_BACKEND = "Unknown HTTP backend: %s"
+TRANSPORT_REFRESH_FAILED = f"{WARN_MARK} Background token refresh failed: %s"
+
+# Daemon
+DAEMON_CYCLE_FAILED = f"{ERROR_MARK} Sync cycle failed: %s"
+
+# Metrics
+METRICS_EXPORT_FAILED = f"{ERROR_MARK} Failed to export metrics: %s"
+
+# Blob store / archive
+PROJECTION_UNKNOWN_FORMAT = "Unknown message format: %s (expected metadata, full or raw)"
+BLOB_UNKNOWN_CODEC = "Unknown blob codec: %s"
+BLOB_ZSTD_MISSING = "The zstd blob codec needs the zstandard package (pip install zstandard)"
+ARCHIVE_ATTACHMENT_FAILED = f"{ERROR_MARK} Failed to download attachment %s of message %s: %s"
+
+# Multi-account orchestrator
+ACCOUNTS_INVALID = "Invalid accounts config %s: %s"
+ACCOUNT_CYCLE_FAILED = f"{ERROR_MARK} Sync cycle failed for account %s: %s"
+ACCOUNT_WORKER_FAILED = f"{ERROR_MARK} Worker running account %s failed: %s"
+ACCOUNT_POOL_RESTARTED = "Worker pool broken (e.g. a worker was killed); starting a new one"
+
+# Export
+EXPORT_UNKNOWN_FORMAT = "Unknown export format: %s (expected jsonl, csv or parquet)"
+EXPORT_PYARROW_MISSING = "Parquet export needs the pyarrow package (pip install pyarrow)"
+EXPORT_PARQUET_NEEDS_PATH = "Parquet export needs a file path, not stdout"
@@ -0,0 +1,221 @@
+"""Streaming export of the email store to JSONL, CSV or Parquet.
+
+Rows are read with `fetchmany` in chunks of `EXPORT_CHUNK_SIZE` and
+written as they arrive. No `Email` records are built, so memory stays
+flat however large the table is. Parquet (when pyarrow is installed) gets
+one row group per chunk.
+
+Exports can be filtered by received date and labels. A named incremental
+export only writes rows saved since that name's previous run: it keeps a
+high-water mark of `updated_at` in the `export_state` table. The mark
+moves only after the output file is complete. Output goes to a temp file
+that is renamed into place.
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from config.db_config import EXPORT_CHUNK_SIZE
+from gmail_client.errors import EXPORT_PARQUET_NEEDS_PATH, EXPORT_PYARROW_MISSING, EXPORT_UNKNOWN_FORMAT
+from gmail_client.metrics import METRICS
+
+COLUMNS = [
+    "id", "sender", "recipient", "subject", "snippet", "received_at", "received_ts", "is_read", "labels",
+    "body_blob", "updated_at",
+]
+FORMATS = ("jsonl", "csv", "parquet")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError(EXPORT_PYARROW_MISSING) from None
+    return pyarrow
+
+
+def build_query(
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    labels: Sequence[str] = (),
+    after: Optional[int] = None,
+):
+    """SELECT for the export filters: received_ts in [since, until), every
+    label in `labels`, and saved after the `after` high-water mark."""
+    where, params = [], []
+    if since is not None:
+        where.append("received_ts >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("received_ts < ?")
+        params.append(until)
+    for label in labels:
+        # labels is stored comma-joined; pad with commas to match whole labels only
+        where.append("instr(',' || labels || ',', ?) > 0")
+        params.append(f",{label},")
+    if after is not None:
+        where.append("updated_at > ?")  # bare column so the updated_at index applies; NULL never matches
+        params.append(after)
+
+    sql = f"SELECT {', '.join(COLUMNS)} FROM emails"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql, params
+
+
+def iter_chunks(conn: sqlite3.Connection, sql: str, params: Sequence, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[tuple]]:
+    """Yield the query's rows `chunk_size` at a time."""
+    cursor = conn.execute(sql, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cursor.close()
+
+
+def get_high_water(conn: sqlite3.Connection, name: str) -> Optional[int]:
+    row = conn.execute("SELECT high_water FROM export_state WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def set_high_water(conn: sqlite3.Connection, name: str, high_water: Optional[int]) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO export_state (name, high_water, exported_at) VALUES (?, ?, ?)",
+        (name, high_water, int(time.time())),
+    )
+    conn.commit()
+
+
+def _labels(value: Optional[str]) -> List[str]:
+    return value.split(",") if value else []
+
+
+class _JsonlWriter:
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, rows: List[tuple]) -> None:
+        labels_at = COLUMNS.index("labels")
+        for row in rows:
+            record = dict(zip(COLUMNS, row))
+            record["labels"] = _labels(row[labels_at])
+            self.f.write(json.dumps(record, ensure_ascii=False))
+            self.f.write("\n")
+
+    def close(self) -> None:
+        pass
+
+
+class _CsvWriter:
+    def __init__(self, f):
+        self.writer = csv.writer(f)
+        self.writer.writerow(COLUMNS)
+
+    def write(self, rows: List[tuple]) -> None:
+        self.writer.writerows(rows)
+
+    def close(self) -> None:
+        pass
+
+
+class _ParquetWriter:
+    def __init__(self, path: str):
+        pa = _pyarrow()
+        self.pa = pa
+        self.schema = pa.schema([
+            ("id", pa.string()), ("sender", pa.string()), ("recipient", pa.string()), ("subject", pa.string()),
+            ("snippet", pa.string()), ("received_at", pa.string()), ("received_ts", pa.int64()),
+            ("is_read", pa.int8()), ("labels", pa.list_(pa.string())), ("body_blob", pa.string()),
+            ("updated_at", pa.int64()),
+        ])
+        self.writer = pa.parquet.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows: List[tuple]) -> None:
+        columns = [list(column) for column in zip(*rows)]
+        labels_at = COLUMNS.index("labels")
+        columns[labels_at] = [_labels(value) for value in columns[labels_at]]
+        # One row group per chunk
+        self.writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(column, type=field.type) for column, field in zip(columns, self.schema)],
+            schema=self.schema,
+        ))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+@contextmanager
+def _open_output(path: str, fmt: str):
+    """Yield a writer for `path` ("-" is stdout); files are renamed into place on success."""
+    if path == "-":
+        if fmt == "parquet":
+            raise ValueError(EXPORT_PARQUET_NEEDS_PATH)
+        writer = _CsvWriter(sys.stdout) if fmt == "csv" else _JsonlWriter(sys.stdout)
+        yield writer
+        writer.close()
+        return
+
+    tmp_path = path + ".tmp"
+    try:
+        if fmt == "parquet":
+            writer = _ParquetWriter(tmp_path)
+            yield writer
+            writer.close()
+        else:
+            with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+                writer = _CsvWriter(f) if fmt == "csv" else _JsonlWriter(f)
+                yield writer
+                writer.close()
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def export_emails(
+    conn: sqlite3.Connection,
+    path: str,
+    fmt: str = "jsonl",
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    labels: Sequence[str] = (),
+    incremental: Optional[str] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Dict:
+    """Stream the matching rows of `emails` to `path` in format `fmt`.
+
+    `since`/`until` are UTC epoch seconds on received time. With
+    `incremental`, only rows saved since that export's previous run are
+    written, and its high-water mark is advanced afterwards. Returns a
+    summary of rows written and the new mark.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(EXPORT_UNKNOWN_FORMAT % fmt)
+
+    after = get_high_water(conn, incremental) if incremental else None
+    sql, params = build_query(since, until, labels, after)
+    updated_at = COLUMNS.index("updated_at")
+    rows_written = 0
+    high_water = after
+
+    with METRICS.timer("export"), _open_output(path, fmt) as writer:
+        for rows in iter_chunks(conn, sql, params, chunk_size):
+            writer.write(rows)
+            rows_written += len(rows)
+            chunk_mark = max((row[updated_at] or 0) for row in rows)
+            high_water = chunk_mark if high_water is None else max(high_water, chunk_mark)
+
+    if incremental:
+        set_high_water(conn, incremental, high_water)
+    METRICS.inc("rows_exported", rows_written)
+    return {"path": path, "format": fmt, "rows": rows_written, "high_water": high_water, "previous_high_water": after}
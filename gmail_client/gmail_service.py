@@ -5,10 +5,17 @@ from googleapiclient.discovery import build
 from google.oauth2.credentials import Credentials
 
 
-def build_service(creds: Credentials):
-    """Build and return Gmail API service client."""
+def build_service(creds: Credentials, http=None):
+    """Build and return Gmail API service client.
+
+    When `http` is given (see `gmail_client.transport.build_http`), the
+    service sends every request over that shared, keep-alive transport.
+    """
     try:
-        service = build("gmail", "v1", credentials=creds)
+        if http is not None:
+            service = build("gmail", "v1", http=http, cache_discovery=False)
+        else:
+            service = build("gmail", "v1", credentials=creds)
         logging.info("Gmail service built successfully.")
         return service
     except Exception as e:
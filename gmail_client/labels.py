@@ -0,0 +1,119 @@
+"""Label name → ID resolution for rule actions.
+
+Rules name their destination labels (`"Archive"`), but `messages.modify`
+takes label IDs (`"Label_12"`). `LabelRegistry` loads `labels.list` once
+and keeps the mapping for `LABEL_CACHE_TTL` seconds. `ensure()` resolves
+every label a rule set needs before any action runs, and creates the
+missing ones in one batch, so actions never look labels up themselves.
+System labels are their own IDs and never trigger a listing.
+"""
+
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config.gmail_config import LABEL_CACHE_TTL
+from gmail_client.errors import LABEL_CREATE_FAILED, LABELS_LOAD_FAILED
+from gmail_client.metrics import METRICS
+from gmail_client.quota import charge
+
+# Gmail rejects batches with more than 100 calls
+CREATE_BATCH_SIZE = 100
+
+SYSTEM_LABELS = [
+    "INBOX", "SPAM", "TRASH", "UNREAD", "STARRED", "IMPORTANT", "SENT", "DRAFT",
+    "YELLOW_STAR", "CATEGORY_PERSONAL", "CATEGORY_SOCIAL", "CATEGORY_PROMOTIONS",
+    "CATEGORY_UPDATES", "CATEGORY_FORUMS",
+]
+
+
+def rule_labels(rules: List[Dict]) -> List[str]:
+    """Labels the rules' `move` actions send mail to, in first-use order."""
+    names = []
+    for rule in rules:
+        for action in rule.get("actions", []):
+            destination = action.get("destination")
+            if action.get("type") == "move" and destination and destination not in names:
+                names.append(destination)
+    return names
+
+
+class LabelRegistry:
+    """Cached label name → ID mapping for one mailbox.
+
+    The listing is loaded on first use and again once it is older than
+    `ttl` seconds. Label IDs map to themselves, so rules may name a label
+    by either.
+    """
+
+    def __init__(self, service, ttl: float = LABEL_CACHE_TTL, clock: Callable[[], float] = time.monotonic):
+        self.service = service
+        self.ttl = ttl
+        self.clock = clock
+        self.ids: Dict[str, str] = {}
+        self.loaded_at: Optional[float] = None
+
+    def _stale(self) -> bool:
+        return self.loaded_at is None or self.clock() - self.loaded_at >= self.ttl
+
+    def refresh(self) -> None:
+        """Reload the mapping from `labels.list`."""
+        charge("labels.list")
+        with METRICS.timer("labels_list"):
+            response = self.service.users().labels().list(userId="me").execute()
+        ids = {}
+        for label in response.get("labels", []):
+            ids[label["name"]] = label["id"]
+            ids[label["id"]] = label["id"]
+        self.ids = ids
+        self.loaded_at = self.clock()
+
+    def _create(self, names: List[str]) -> List[str]:
+        """Create `names` in as few batches as possible; returns the names that failed."""
+        failed = []
+
+        def on_response(request_id, response, exception):
+            name = names[int(request_id)]
+            if exception is not None:
+                failed.append(name)
+                logging.warning(LABEL_CREATE_FAILED, name, exception)
+                return
+            self.ids[response["name"]] = response["id"]
+            self.ids[response["id"]] = response["id"]
+            METRICS.inc("labels_created")
+
+        labels = self.service.users().labels()
+        for start in range(0, len(names), CREATE_BATCH_SIZE):
+            chunk = range(start, min(start + CREATE_BATCH_SIZE, len(names)))
+            batch = self.service.new_batch_http_request()
+            for i in chunk:
+                body = {"name": names[i], "labelListVisibility": "labelShow", "messageListVisibility": "show"}
+                batch.add(labels.create(userId="me", body=body), callback=on_response, request_id=str(i))
+            charge("labels.create", len(chunk))
+            with METRICS.timer("labels_create"):
+                batch.execute()
+        return failed
+
+    def ensure(self, names: Iterable[str]) -> Dict[str, str]:
+        """Map each of `names` to its label ID, creating missing labels.
+
+        Returns the resolved subset; a label that can neither be listed nor
+        created is left out, so callers fall back to the name as given.
+        """
+        names = list(dict.fromkeys(names))
+        resolved = {name: name for name in names if name in SYSTEM_LABELS}
+        wanted = [name for name in names if name not in SYSTEM_LABELS]
+        if not wanted:
+            return resolved
+        try:
+            if self._stale():
+                self.refresh()
+            missing = [name for name in wanted if name not in self.ids]
+            if missing and self._create(missing):
+                # Most likely created elsewhere since the listing was loaded
+                self.refresh()
+        except Exception as e:
+            METRICS.inc("label_errors")
+            logging.error(LABELS_LOAD_FAILED, e)
+        resolved.update({name: self.ids[name] for name in wanted if name in self.ids})
+        return resolved
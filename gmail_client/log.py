@@ -0,0 +1,178 @@
+"""Logging setup: JSON or text records, per-item sampling and a background writer.
+
+Per-item log calls (one per matched rule, action, ...) name their event:
+
+    logger.info("Moved email %s to %s", email_id, label, extra={"event": "action", "email_id": email_id})
+
+`SampleFilter` keeps the first and then every `sample_every`-th record of
+each event, and always keeps warnings and errors and records without an
+event. It counts every event, kept or not, and `LogRuntime.stop()` logs the
+per-run totals. Callers only enqueue records that pass the filter, as they
+are: the stock `QueueHandler` would format them on the calling thread and
+drop their traceback. A `QueueListener` thread formats and writes them, so
+message formatting and slow terminals or files do not hold up the sync.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from config.log_config import LOG_FORMAT, LOG_LEVEL, LOG_SAMPLE_EVERY
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_FIELDS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({
+            key: value for key, value in record.__dict__.items()
+            if key not in _RECORD_FIELDS and not key.startswith("_")
+        })
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """Keeps 1 in `sample_every` records per event, plus every warning/error."""
+
+    def __init__(self, sample_every: int = 1):
+        super().__init__()
+        self.sample_every = max(1, sample_every)
+        self.counts: Counter = Counter()
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        if event is None or getattr(record, "_sampled", False):
+            return True
+        with self._lock:
+            self.counts[event] += 1
+            keep = record.levelno >= logging.WARNING or (self.counts[event] - 1) % self.sample_every == 0
+            if not keep:
+                self.suppressed += 1
+        # Queued records may meet the filter again once handlers are swapped
+        record._sampled = True
+        return keep
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queues records unformatted, with `exc_info`, for the listener to format."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class LogRuntime:
+    """Handle on the installed logging setup; `stop()` flushes and reports counts."""
+
+    def __init__(self, sampler: SampleFilter, listener: Optional[logging.handlers.QueueListener]):
+        self.sampler = sampler
+        self.listener = listener
+
+    def summary(self) -> Dict:
+        return {"events": dict(self.sampler.counts), "suppressed": self.sampler.suppressed}
+
+    def write_directly(self) -> None:
+        """Swap the queue for the listener's own handlers (no background thread)."""
+        if self.listener is None:
+            return
+        root = logging.getLogger()
+        handlers: List[logging.Handler] = list(self.listener.handlers)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in handlers:
+            handler.addFilter(self.sampler)
+            root.addHandler(handler)
+        self.listener = None
+
+    def stop(self) -> None:
+        """Log the run's event counts and flush the queue; later records are written directly."""
+        if self.sampler.counts:
+            logging.info("Log events this run: %s (%d not written)",
+                         dict(self.sampler.counts), self.sampler.suppressed, extra=self.summary())
+            self.sampler.counts.clear()
+            self.sampler.suppressed = 0
+        if self.listener is not None:
+            listener = self.listener
+            self.write_directly()
+            listener.stop()
+
+
+_runtime: Optional[LogRuntime] = None
+
+
+def _after_fork_in_child() -> None:
+    # A forked worker has no listener thread, and would queue records nobody writes
+    if _runtime is not None:
+        _runtime.write_directly()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def setup_logging(
+    level: str = LOG_LEVEL,
+    fmt: str = LOG_FORMAT,
+    sample_every: int = LOG_SAMPLE_EVERY,
+    stream=None,
+    background: bool = True,
+) -> LogRuntime:
+    """Configure the root logger; replaces any previous setup.
+
+    `fmt` is "text" or "json". With `background`, records are written by a
+    `QueueListener` thread (stopped at exit or by `LogRuntime.stop()`).
+    """
+    global _runtime
+    if _runtime is not None:
+        _runtime.stop()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+    sampler = SampleFilter(sample_every)
+
+    listener = None
+    if background:
+        records: queue.Queue = queue.Queue()
+        handler: logging.Handler = DeferredQueueHandler(records)
+        listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+        listener.start()
+    else:
+        handler = output
+    handler.addFilter(sampler)
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _runtime = LogRuntime(sampler, listener)
+    return _runtime
+
+
+@atexit.register
+def _stop_at_exit() -> None:
+    if _runtime is not None:
+        _runtime.stop()
@@ -0,0 +1,172 @@
+"""Storage lifecycle: retention of old mail and database upkeep.
+
+`apply_retention` expires mail received before a cutoff month. On a
+partitioned database (see `gmail_client.email_repository`) each expired
+month is one `DROP TABLE`, which costs the same however many rows it
+holds. A single `emails` table needs a ranged DELETE on the received_ts
+index instead. With an archive directory, expired rows and their
+attachment records are first copied into one SQLite file per month.
+Blobs stay in the blob store, which may share them with newer mail.
+
+`run_maintenance` returns the freed pages to the filesystem with
+`PRAGMA incremental_vacuum`, which moves free pages only, unlike a full
+`VACUUM` rewrite. It then refreshes planner statistics. Databases created
+before auto_vacuum was enabled need one `full_vacuum` run to switch it on.
+"""
+
+import calendar
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, Optional
+
+from gmail_client.email_repository import (
+    EMAIL_FIELDS, UNDATED_PARTITION, create_partition, is_partitioned, list_partitions, partition_range,
+    rebuild_emails_view,
+)
+from gmail_client.errors import DB_INCREMENTAL_VACUUM_OFF, DB_RETENTION_INVALID
+from gmail_client.metrics import METRICS
+
+
+def retention_cutoff(keep_months: int, now: Optional[int] = None) -> int:
+    """Start (UTC epoch seconds) of the oldest month kept.
+
+    The current month and the `keep_months` whole months before it are kept.
+    """
+    if keep_months < 1:
+        raise ValueError(DB_RETENTION_INVALID % keep_months)
+    t = time.gmtime(int(time.time()) if now is None else now)
+    months = t.tm_year * 12 + (t.tm_mon - 1) - keep_months
+    return calendar.timegm((months // 12, months % 12 + 1, 1, 0, 0, 0))
+
+
+def _archive(conn: sqlite3.Connection, path: str, source: str, where: str = "", params=()) -> None:
+    """Copy rows of `source` (and their attachment records) into `emails` of the SQLite file `path`."""
+    fields = ", ".join(EMAIL_FIELDS)
+    conn.commit()  # ATTACH is not allowed inside a transaction
+    conn.execute("ATTACH DATABASE ? AS archive", (path,))
+    try:
+        conn.execute("DROP TABLE IF EXISTS temp.archived_ids")
+        conn.execute(f"CREATE TEMP TABLE archived_ids AS SELECT id FROM {source} {where}", params)
+        create_partition(conn, "emails", schema="archive")
+        conn.execute(f"INSERT OR REPLACE INTO archive.emails ({fields}) SELECT {fields} FROM {source} {where}", params)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS archive.attachments (
+                message_id TEXT,
+                part_id TEXT,
+                filename TEXT,
+                mime_type TEXT,
+                size INTEGER,
+                attachment_id TEXT,
+                blob TEXT,
+                PRIMARY KEY (message_id, part_id)
+            )
+        """)
+        conn.execute(
+            "INSERT OR REPLACE INTO archive.attachments SELECT * FROM main.attachments "
+            "WHERE message_id IN (SELECT id FROM temp.archived_ids)"
+        )
+        conn.execute("DROP TABLE temp.archived_ids")
+        conn.commit()
+    finally:
+        conn.execute("DETACH DATABASE archive")
+
+
+def apply_retention(
+    conn: sqlite3.Connection,
+    keep_months: int,
+    archive_dir: Optional[str] = None,
+    now: Optional[int] = None,
+) -> Dict:
+    """Expire mail received before `retention_cutoff(keep_months, now)`.
+
+    Undated mail is never expired. With `archive_dir`, expired mail is
+    copied there first (`emails_YYYYMM.db` per partition, or
+    `emails_before_YYYYMM.db` for a single table). Returns a summary.
+    """
+    cutoff = retention_cutoff(keep_months, now)
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+
+    expired_rows = 0
+    expired_attachments = 0
+    dropped = []
+    with METRICS.timer("retention"):
+        if is_partitioned(conn):
+            for name in list_partitions(conn):
+                if name == UNDATED_PARTITION or partition_range(name)[1] > cutoff:
+                    continue
+                expired_rows += conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+                if archive_dir:
+                    _archive(conn, os.path.join(archive_dir, f"{name}.db"), name)
+                expired_attachments += conn.execute(
+                    f"DELETE FROM attachments WHERE message_id IN (SELECT id FROM {name})"
+                ).rowcount
+                conn.execute(f"DROP TABLE {name}")
+                dropped.append(name)
+            if dropped:
+                rebuild_emails_view(conn)
+        else:
+            where, params = "WHERE received_ts < ?", (cutoff,)
+            if archive_dir:
+                month = time.strftime("%Y%m", time.gmtime(cutoff))
+                _archive(conn, os.path.join(archive_dir, f"emails_before_{month}.db"), "emails", where, params)
+            expired_attachments = conn.execute(
+                f"DELETE FROM attachments WHERE message_id IN (SELECT id FROM emails {where})", params
+            ).rowcount
+            expired_rows = conn.execute(f"DELETE FROM emails {where}", params).rowcount
+        conn.commit()
+
+    METRICS.inc("emails_expired", expired_rows)
+    logging.info("Retention: expired %d emails received before %s.", expired_rows,
+                 time.strftime("%Y-%m-%d", time.gmtime(cutoff)))
+    return {
+        "cutoff": cutoff,
+        "expired_emails": expired_rows,
+        "dropped_partitions": dropped,
+        "expired_attachments": expired_attachments,
+        "archive_dir": archive_dir,
+    }
+
+
+def _page_stats(conn: sqlite3.Connection) -> Dict:
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return {
+        "pages": conn.execute("PRAGMA page_count").fetchone()[0],
+        "free_pages": conn.execute("PRAGMA freelist_count").fetchone()[0],
+        "page_size": page_size,
+    }
+
+
+def run_maintenance(
+    conn: sqlite3.Connection,
+    vacuum_pages: int = 0,
+    full_vacuum: bool = False,
+    analyze: bool = False,
+) -> Dict:
+    """Reclaim free pages and refresh query planner statistics.
+
+    Frees up to `vacuum_pages` pages (0: all) with an incremental vacuum;
+    `full_vacuum` rebuilds the file instead and enables incremental vacuum
+    for next time. `analyze` runs a full ANALYZE; otherwise
+    `PRAGMA optimize` re-analyzes only the tables that need it.
+    """
+    before = _page_stats(conn)
+    conn.commit()  # VACUUM cannot run inside a transaction
+    with METRICS.timer("maintenance"):
+        if full_vacuum:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        elif conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:  # 2 = incremental
+            # executescript steps the pragma to completion; execute() would free a single page
+            conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)})")
+        else:
+            logging.info(DB_INCREMENTAL_VACUUM_OFF)
+        conn.execute("ANALYZE" if analyze else "PRAGMA optimize")
+        conn.commit()
+    after = _page_stats(conn)
+
+    reclaimed = (before["pages"] - after["pages"]) * before["page_size"]
+    logging.info("Maintenance: reclaimed %d bytes, %d free pages left.", reclaimed, after["free_pages"])
+    return {"before": before, "after": after, "reclaimed_bytes": reclaimed}
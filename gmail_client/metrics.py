@@ -0,0 +1,153 @@
+"""Lightweight counters and timers for the fetch/store/rules pipeline.
+
+All pipeline stages record into the process-wide `METRICS` registry. A run
+summary can be written as JSON, or in Prometheus text format either to a
+file (for the node_exporter textfile collector) or over HTTP.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from gmail_client.errors import METRICS_EXPORT_FAILED
+
+
+class Metrics:
+    """Thread-safe registry of monotonically increasing counters and timers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self.counters: Dict[str, int] = {}
+            # name -> [count, total seconds, max seconds]
+            self.timers: Dict[str, list] = {}
+
+    def inc(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stat = self.timers.get(name)
+            if stat is None:
+                self.timers[name] = [1, seconds, seconds]
+            else:
+                stat[0] += 1
+                stat[1] += seconds
+                if seconds > stat[2]:
+                    stat[2] = seconds
+
+    def merge(self, snapshot: Dict) -> None:
+        """Add the counters and timers of another registry's `snapshot()`."""
+        with self._lock:
+            for name, value in snapshot.get("counters", {}).items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, stat in snapshot.get("timers", {}).items():
+                current = self.timers.setdefault(name, [0, 0.0, 0.0])
+                current[0] += stat["count"]
+                current[1] += stat["total_seconds"]
+                current[2] = max(current[2], stat["max_seconds"])
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time the enclosed block and record it under `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict:
+        """Return a JSON-serialisable summary of the current run."""
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "duration_seconds": round(time.time() - self.started_at, 6),
+                "counters": dict(sorted(self.counters.items())),
+                "timers": {
+                    name: {
+                        "count": count,
+                        "total_seconds": round(total, 6),
+                        "avg_seconds": round(total / count, 6),
+                        "max_seconds": round(peak, 6),
+                    }
+                    for name, (count, total, peak) in sorted(self.timers.items())
+                },
+            }
+
+    def to_prometheus(self, prefix: str = "gmail_fetch") -> str:
+        """Render counters and timers in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = []
+        for name, value in snap["counters"].items():
+            metric = f"{prefix}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, stat in snap["timers"].items():
+            metric = f"{prefix}_{name}_seconds"
+            lines += [
+                f"# TYPE {metric} summary",
+                f"{metric}_count {stat['count']}",
+                f"{metric}_sum {stat['total_seconds']}",
+                f"# TYPE {metric}_max gauge",
+                f"{metric}_max {stat['max_seconds']}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def write_prometheus(self, path: str) -> None:
+        # Write then rename so scrapers never read a half-written file
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+METRICS = Metrics()
+
+
+def export_metrics(json_path=None, prom_path=None, registry: Metrics = METRICS) -> None:
+    """Write the run summary to whichever of the JSON/Prometheus paths are set."""
+    try:
+        if json_path:
+            registry.write_json(json_path)
+        if prom_path:
+            registry.write_prometheus(prom_path)
+    except OSError as e:
+        logging.error(METRICS_EXPORT_FAILED, e)
+
+
+def serve_metrics(port: int, registry: Metrics = METRICS, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Expose `registry` at http://host:port/metrics from a background thread.
+
+    There is no authentication, so the default is loopback only.
+    """
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
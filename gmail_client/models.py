@@ -0,0 +1,160 @@
+"""Compact record type for emails moving through fetch, storage and rules."""
+
+import sys
+from typing import Dict, Iterable, Optional, Tuple
+from gmail_client.dates import iso_to_epoch
+
+# Label combinations repeat across millions of messages: share one tuple per combination
+_LABEL_SETS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+_MAX_LABEL_SETS = 10000
+
+
+def intern_labels(labels: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Return `labels` as a shared tuple of interned label IDs."""
+    if not labels:
+        return ()
+    key = tuple(labels)
+    shared = _LABEL_SETS.get(key)
+    if shared is None:
+        shared = tuple(sys.intern(label) for label in key)
+        if len(_LABEL_SETS) < _MAX_LABEL_SETS:
+            _LABEL_SETS[shared] = shared
+    return shared
+
+
+def labels_from_string(value: Optional[str]) -> Tuple[str, ...]:
+    """Parse the comma-separated `labels` column."""
+    return intern_labels(value.split(",")) if value else ()
+
+
+class Attachment:
+    """An attachment of an archived message; `blob` is its digest in the blob store."""
+
+    __slots__ = ("part_id", "filename", "mime_type", "size", "attachment_id", "blob")
+
+    def __init__(
+        self,
+        part_id: str,
+        filename: str = "",
+        mime_type: str = "",
+        size: int = 0,
+        attachment_id: Optional[str] = None,
+        blob: Optional[str] = None,
+    ):
+        self.part_id = part_id
+        self.filename = filename
+        self.mime_type = mime_type
+        self.size = size
+        self.attachment_id = attachment_id
+        self.blob = blob
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Attachment):
+            return NotImplemented
+        return all(getattr(self, a) == getattr(other, a) for a in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"Attachment(part_id={self.part_id!r}, filename={self.filename!r}, blob={self.blob!r})"
+
+
+class Email:
+    """One email's metadata.
+
+    Uses `__slots__` to keep per-message memory small on large syncs, and
+    carries `received_ts` (UTC epoch seconds) so date rules never re-parse
+    `received_at`. Mapping-style access (`email["from"]`, `email.get(...)`)
+    is kept for callers written against the earlier dict records.
+
+    `recipient` is None when the To header was not fetched, so rules on
+    `To` can tell "unknown" from "no To header" ("").
+
+    In full/raw fetch modes `body_blob` references the message body in the
+    blob store and `attachments` lists its `Attachment`s.
+    """
+
+    __slots__ = (
+        "id", "sender", "recipient", "subject", "snippet", "received_at", "received_ts", "is_read", "labels",
+        "body_blob", "attachments",
+    )
+
+    # Dict-style key -> attribute (`from` is a keyword, so the attribute is `sender`)
+    _KEYS = {
+        "id": "id", "from": "sender", "to": "recipient", "subject": "subject", "snippet": "snippet",
+        "received_at": "received_at", "received_ts": "received_ts", "is_read": "is_read", "labels": "labels",
+        "body_blob": "body_blob", "attachments": "attachments",
+    }
+
+    def __init__(
+        self,
+        id: str,
+        sender: str = "",
+        recipient: Optional[str] = "",
+        subject: str = "",
+        snippet: Optional[str] = None,
+        received_at: Optional[str] = None,
+        received_ts: Optional[int] = None,
+        is_read: int = 0,
+        labels: Iterable[str] = (),
+        body_blob: Optional[str] = None,
+        attachments: Iterable[Attachment] = (),
+    ):
+        self.id = id
+        self.sender = sender
+        self.recipient = recipient
+        self.subject = subject
+        self.snippet = snippet
+        self.received_at = received_at
+        self.received_ts = received_ts
+        self.is_read = is_read
+        self.labels = intern_labels(labels)
+        self.body_blob = body_blob
+        self.attachments = tuple(attachments)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Email":
+        """Build a record from a dict shaped like the legacy email dicts."""
+        received_at = data.get("received_at")
+        received_ts = data.get("received_ts")
+        return cls(
+            id=data.get("id"),
+            sender=data.get("from", ""),
+            recipient=data.get("to", ""),
+            subject=data.get("subject", ""),
+            snippet=data.get("snippet"),
+            received_at=received_at,
+            received_ts=received_ts if received_ts is not None else iso_to_epoch(received_at),
+            is_read=int(data.get("is_read", 0) or 0),
+            labels=data.get("labels", ()),
+            body_blob=data.get("body_blob"),
+            attachments=data.get("attachments", ()),
+        )
+
+    def to_dict(self) -> Dict:
+        return {key: getattr(self, attr) for key, attr in self._KEYS.items()}
+
+    def replace(self, **changes) -> "Email":
+        """Return a copy with the given attributes changed."""
+        values = {attr: getattr(self, attr) for attr in self.__slots__}
+        values.update(changes)
+        return Email(**values)
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, self._KEYS[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._KEYS
+
+    def get(self, key: str, default=None):
+        attr = self._KEYS.get(key)
+        return getattr(self, attr) if attr else default
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Email):
+            return NotImplemented
+        return all(getattr(self, a) == getattr(other, a) for a in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"Email(id={self.id!r}, sender={self.sender!r}, subject={self.subject!r}, received_at={self.received_at!r})"
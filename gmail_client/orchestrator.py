@@ -0,0 +1,301 @@
+"""Multi-account sync: per-account fetch-and-rules cycles on a process pool.
+
+Each account cycle runs in a worker process against the account's own
+token and SQLite shard, so throughput scales with cores. Scheduling is
+fair: an account never has more than one cycle in flight, and a free
+worker always takes the account whose next cycle has been due longest,
+so a huge mailbox cannot starve the others. Each account has its own
+quota `TokenBucket`, handed to whichever worker runs its cycle and
+returned with the result, so one busy mailbox cannot use up the others'
+API budget. Worker metrics are merged into the parent's `METRICS`, and
+`SyncReport` keeps per-account and total progress.
+"""
+
+import heapq
+import logging
+import os
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from config.gmail_config import ACCOUNT_WORKERS, QUOTA_BURST, QUOTA_RATE
+from gmail_client.accounts import Account
+from gmail_client.auth import authenticate
+from gmail_client.blob_store import BlobStore
+from gmail_client.daemon import SyncState, next_delay, run_cycle
+from gmail_client.email_repository import connect, fetch_email_ids, init_db
+from gmail_client.emulator import FakeGmail
+from gmail_client.errors import ACCOUNT_CYCLE_FAILED, ACCOUNT_POOL_RESTARTED, ACCOUNT_WORKER_FAILED
+from gmail_client.gmail_service import build_service
+from gmail_client.metrics import METRICS
+from gmail_client.quota import TokenBucket, set_limiter
+from gmail_client.transport import build_http
+
+# Services built in this worker process, keyed by account name (keeps connections warm)
+_services: Dict[str, object] = {}
+
+# Sync state (DB connection, known IDs, rules) kept by this worker process, keyed by
+# (account name, DB file, fetch format), with the DB's data_version after its last cycle
+_states: Dict[Tuple[str, str, str], Tuple[SyncState, int]] = {}
+
+
+def _ignore_sigint() -> None:
+    # Workers finish their cycle; the parent handles Ctrl+C via its stop event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _service_for(account: Account):
+    service = _services.get(account.name)
+    if service is None:
+        if account.emulator is not None:
+            service = FakeGmail(**account.emulator)
+        else:
+            creds = authenticate(account.token_file, account.credentials_file, interactive=False)
+            service = build_service(creds, http=build_http(creds))
+        _services[account.name] = service
+    return service
+
+
+def _data_version(conn) -> int:
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def _state_for(account: Account, fetch_format: str, rules_mtime: Optional[int]) -> SyncState:
+    """This process's warm `SyncState` for `account`, brought up to date with other workers' cycles."""
+    key = (account.name, account.db_file, fetch_format)
+    cached = _states.get(key)
+    if cached is None:
+        os.makedirs(os.path.dirname(os.path.abspath(account.db_file)), exist_ok=True)
+        conn = connect(account.db_file)
+        init_db(conn)
+        store = BlobStore(account.blob_dir) if fetch_format != "metadata" else None
+        return SyncState(conn, rules_path=account.rules_file, fetch_format=fetch_format, store=store,
+                         rules_mtime=rules_mtime)
+
+    state, version = cached
+    if _data_version(state.conn) != version:
+        # Another worker ran a cycle for this account since
+        state.known_ids = fetch_email_ids(state.conn)
+    if rules_mtime is not None and rules_mtime != state.rule_cache.mtime:
+        # ...and already applied a newer rules file: load it without re-running it over the store
+        state.rule_cache.mtime = rules_mtime
+        state.rule_cache.rules = None
+        state.projection = None
+    return state
+
+
+def _drop_state(account: Account, fetch_format: str) -> None:
+    cached = _states.pop((account.name, account.db_file, fetch_format), None)
+    if cached is not None:
+        cached[0].conn.close()
+
+
+def sync_account(
+    account: Account,
+    batch_size: int = 50,
+    batch_limit: int = 10,
+    fetch_format: str = "metadata",
+    quota_rate: float = QUOTA_RATE,
+    quota_burst: float = QUOTA_BURST,
+    bucket_state=None,
+    rules_mtime: Optional[int] = None,
+) -> Dict:
+    """Run one fetch-and-rules cycle for `account` (in a worker process).
+
+    Returns a picklable result with the new email count, any error, the
+    cycle's metrics and the state (quota bucket, applied rules version)
+    to pass to the account's next cycle. The DB connection and `SyncState`
+    stay open in this process for the account's later cycles; a failed
+    cycle drops them.
+    """
+    METRICS.reset()
+    bucket = TokenBucket(quota_rate, quota_burst, state=bucket_state)
+    set_limiter(bucket)
+    started = time.perf_counter()
+    result = {"account": account.name, "new_emails": 0, "error": None, "rules_mtime": rules_mtime}
+    state = None
+    try:
+        service = _service_for(account)
+        state = _state_for(account, fetch_format, rules_mtime)
+        with METRICS.timer("cycle"):
+            result["new_emails"] = run_cycle(service, state, batch_size=batch_size, batch_limit=batch_limit)
+        result["rules_mtime"] = state.rule_cache.mtime
+        _states[(account.name, account.db_file, fetch_format)] = (state, _data_version(state.conn))
+    except Exception as e:
+        METRICS.inc("cycle_errors")
+        result["error"] = str(e)
+        logging.error(ACCOUNT_CYCLE_FAILED, account.name, e)
+        _drop_state(account, fetch_format)
+        if state is not None:
+            state.conn.close()
+    finally:
+        set_limiter(None)
+
+    result["seconds"] = time.perf_counter() - started
+    result["bucket_state"] = bucket.state()
+    result["metrics"] = METRICS.snapshot()
+    return result
+
+
+class SyncReport:
+    """Per-account and total progress of a multi-account run."""
+
+    def __init__(self, accounts: List[Account]):
+        self.started = time.monotonic()
+        self.accounts = {
+            a.name: {"cycles": 0, "new_emails": 0, "errors": 0, "seconds": 0.0, "last_error": None}
+            for a in accounts
+        }
+
+    def record(self, result: Dict) -> None:
+        stats = self.accounts[result["account"]]
+        stats["cycles"] += 1
+        stats["new_emails"] += result["new_emails"]
+        stats["seconds"] += result["seconds"]
+        if result["error"]:
+            stats["errors"] += 1
+            stats["last_error"] = result["error"]
+
+    def summary(self) -> Dict:
+        elapsed = time.monotonic() - self.started
+        new_emails = sum(s["new_emails"] for s in self.accounts.values())
+        return {
+            "accounts": len(self.accounts),
+            "cycles": sum(s["cycles"] for s in self.accounts.values()),
+            "new_emails": new_emails,
+            "errors": sum(s["errors"] for s in self.accounts.values()),
+            "elapsed_seconds": round(elapsed, 3),
+            "emails_per_second": round(new_emails / elapsed, 1) if elapsed else 0.0,
+            "per_account": {
+                name: dict(stats, seconds=round(stats["seconds"], 3)) for name, stats in self.accounts.items()
+            },
+        }
+
+
+class Orchestrator:
+    """Schedules account cycles fairly across a pool of worker processes."""
+
+    def __init__(
+        self,
+        accounts: List[Account],
+        workers: int = ACCOUNT_WORKERS,
+        batch_size: int = 50,
+        batch_limit: int = 10,
+        fetch_format: str = "metadata",
+        quota_rate: float = QUOTA_RATE,
+        quota_burst: float = QUOTA_BURST,
+    ):
+        self.accounts = {a.name: a for a in accounts}
+        self.workers = max(1, min(workers, len(accounts) or 1))
+        self.cycle_kwargs = {
+            "batch_size": batch_size, "batch_limit": batch_limit, "fetch_format": fetch_format,
+            "quota_rate": quota_rate, "quota_burst": quota_burst,
+        }
+        # State carried between an account's cycles, whichever worker runs them
+        self.carry: Dict[str, Dict] = {name: {"bucket_state": None, "rules_mtime": None} for name in self.accounts}
+        self.report = SyncReport(accounts)
+
+    def run(
+        self,
+        cycles: Optional[int] = 1,
+        interval: float = 0.0,
+        jitter: float = 0.0,
+        stop_event: Optional[threading.Event] = None,
+    ) -> Dict:
+        """Run `cycles` cycles per account (None: until `stop_event` is set).
+
+        Returns `self.report.summary()`. A cycle whose worker dies counts as
+        a failed cycle for that account, and the pool is replaced.
+        """
+        stop_event = stop_event or threading.Event()
+        # (due time, sequence, account name): earliest due first, round-robin on ties
+        due = [(0.0, i, name) for i, name in enumerate(self.accounts)]
+        heapq.heapify(due)
+        sequence = len(due)
+        total = None if cycles is None else cycles * len(self.accounts)
+        in_flight = {}
+
+        pool = self._new_pool()
+        pool_futures = set()  # submitted to the current pool; older ones may still fail after a restart
+        try:
+            while (due or in_flight) and not stop_event.is_set():
+                now = time.monotonic()
+                while due and due[0][0] <= now and len(in_flight) < self.workers:
+                    _, _, name = heapq.heappop(due)
+                    try:
+                        future = self._submit(pool, name)
+                    except BrokenProcessPool:
+                        pool, pool_futures = self._restart(pool), set()
+                        future = self._submit(pool, name)
+                    in_flight[future] = name
+                    pool_futures.add(future)
+
+                timeout = max(0.0, due[0][0] - now) if due else None
+                if len(in_flight) >= self.workers:
+                    timeout = None  # nothing can be dispatched until a worker finishes
+                if not in_flight:
+                    stop_event.wait(timeout)
+                    continue
+                finished, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                broken = False
+                for future in finished:
+                    name = in_flight.pop(future)
+                    result, failed = self._result(future, name)
+                    broken = broken or (failed and future in pool_futures)
+                    pool_futures.discard(future)
+                    self._record(result, total)
+                    if cycles is None or self.report.accounts[name]["cycles"] < cycles:
+                        heapq.heappush(due, (time.monotonic() + next_delay(interval, jitter), sequence, name))
+                        sequence += 1
+                if broken:
+                    pool, pool_futures = self._restart(pool), set()
+
+            # Stopped early: let running cycles finish and count them
+            for future, name in in_flight.items():
+                self._record(self._result(future, name)[0], total)
+        finally:
+            pool.shutdown()
+
+        return self.report.summary()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_ignore_sigint)
+
+    def _submit(self, pool: ProcessPoolExecutor, name: str) -> Future:
+        return pool.submit(sync_account, self.accounts[name], **self.cycle_kwargs, **self.carry[name])
+
+    def _restart(self, pool: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        logging.warning(ACCOUNT_POOL_RESTARTED)
+        METRICS.inc("pool_restarts")
+        pool.shutdown(wait=False)
+        return self._new_pool()
+
+    def _result(self, future: Future, name: str) -> Tuple[Dict, bool]:
+        """The cycle's result, or a failed result if its worker did not return one.
+
+        The second value says whether the pool is broken. The account keeps
+        the quota and rules state carried from its last completed cycle.
+        """
+        try:
+            return future.result(), False
+        except Exception as e:
+            METRICS.inc("cycle_errors")
+            logging.error(ACCOUNT_WORKER_FAILED, name, e)
+            result = {"account": name, "new_emails": 0, "error": str(e) or type(e).__name__, "seconds": 0.0,
+                      "metrics": {}, **self.carry[name]}
+            return result, isinstance(e, BrokenProcessPool)
+
+    def _record(self, result: Dict, total: Optional[int]) -> None:
+        name = result["account"]
+        self.carry[name] = {"bucket_state": result["bucket_state"], "rules_mtime": result["rules_mtime"]}
+        METRICS.merge(result["metrics"])
+        self.report.record(result)
+        done = sum(s["cycles"] for s in self.report.accounts.values())
+        logging.info(
+            "[%d/%s] %s: %d new emails in %.2fs%s", done, total or "∞", name,
+            result["new_emails"], result["seconds"], " (failed)" if result["error"] else "",
+        )
@@ -0,0 +1,78 @@
+"""Works out which message headers and response fields a sync actually needs.
+
+Storage always needs From, Subject and Date; rules may need more (e.g.
+`To`). The projection is sent as `metadataHeaders` and a `fields` mask so
+Gmail only returns what will be used. The `full` and `raw` formats (used
+to archive bodies, see `gmail_client.archive`) ask for the payload or the
+raw message instead of selected headers.
+"""
+
+from typing import Dict, Iterable, List, Optional
+from gmail_client.errors import PROJECTION_UNKNOWN_FORMAT
+
+# Headers stored for every message
+BASE_HEADERS = ("From", "Subject", "Date")
+
+# Rule condition field -> header it reads
+FIELD_HEADERS = {"from": "From", "to": "To", "subject": "Subject", "datereceived": "Date"}
+
+# Partial-response masks for messages.list and messages.get(format="metadata")
+LIST_FIELDS = "messages/id,nextPageToken"
+MESSAGE_FIELDS = "id,labelIds,snippet,internalDate,payload/headers"
+FORMAT_FIELDS = {
+    "metadata": MESSAGE_FIELDS,
+    "full": "id,labelIds,snippet,internalDate,payload",
+    "raw": "id,labelIds,snippet,internalDate,raw",
+}
+
+
+class Projection:
+    """Headers and `fields` masks to request when fetching messages."""
+
+    def __init__(self, headers: Iterable[str] = BASE_HEADERS,
+                 message_fields: str = MESSAGE_FIELDS, list_fields: str = LIST_FIELDS, fmt: str = "metadata"):
+        if fmt not in FORMAT_FIELDS:
+            raise ValueError(PROJECTION_UNKNOWN_FORMAT % fmt)
+        self.headers: List[str] = list(headers)
+        self.message_fields = message_fields
+        self.list_fields = list_fields
+        self.fmt = fmt
+
+    def get_kwargs(self) -> Dict:
+        """Keyword arguments for `messages().get(...)` besides userId/id."""
+        if self.fmt != "metadata":
+            return {"format": self.fmt, "fields": self.message_fields}
+        return {"format": "metadata", "metadataHeaders": self.headers, "fields": self.message_fields}
+
+    def fetches(self, header: str) -> bool:
+        """True if responses carry `header` (full and raw responses carry them all)."""
+        return self.fmt != "metadata" or header in self.headers
+
+    def list_kwargs(self) -> Dict:
+        """Extra keyword arguments for `messages().list(...)`."""
+        return {"fields": self.list_fields}
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Projection) and vars(self) == vars(other)
+
+    def __repr__(self) -> str:
+        return f"Projection(fmt={self.fmt!r}, headers={self.headers!r})"
+
+
+def required_headers(rules: Optional[List[Dict]] = None) -> List[str]:
+    """Storage headers plus any header read by a condition in `rules`."""
+    headers = list(BASE_HEADERS)
+    for rule in rules or []:
+        for condition in rule.get("conditions", []):
+            header = FIELD_HEADERS.get(str(condition.get("field", "")).lower())
+            if header and header not in headers:
+                headers.append(header)
+    return headers
+
+
+def build_projection(rules: Optional[List[Dict]] = None, fmt: str = "metadata") -> Projection:
+    """Projection covering storage and the loaded `rules`, in message format `fmt`."""
+    return Projection(headers=required_headers(rules), message_fields=FORMAT_FIELDS.get(fmt, MESSAGE_FIELDS), fmt=fmt)
+
+
+DEFAULT_PROJECTION = build_projection()
@@ -0,0 +1,87 @@
+"""Gmail API quota accounting and per-account rate limiting.
+
+Every API call site charges its quota units through `charge()`. The units
+are always counted in `METRICS`; when a `TokenBucket` is installed with
+`set_limiter()` (the multi-account orchestrator installs one per account
+cycle), the call also waits until the account's budget allows it, so one
+busy mailbox cannot use up the quota meant for the others.
+"""
+
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+from gmail_client.metrics import METRICS
+
+# Quota units charged per method, per the Gmail API usage limits
+QUOTA_UNITS = {
+    "messages.list": 5,
+    "messages.get": 5,
+    "messages.modify": 5,
+    "messages.batchModify": 50,
+    "messages.attachments.get": 5,
+    "history.list": 2,
+    "labels.list": 1,
+    "labels.create": 5,
+}
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` units/second, holding at most `capacity`.
+
+    `acquire` reserves units immediately and sleeps off any deficit, so
+    callers are paced to `rate` on average with bursts up to `capacity`.
+    `state()`/`state=` carry the bucket between processes.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        state: Optional[Tuple[float, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self.tokens, self.updated = state if state is not None else (self.capacity, clock())
+
+    def state(self) -> Tuple[float, float]:
+        """(tokens, clock reading) to resume this bucket elsewhere."""
+        with self._lock:
+            return self.tokens, self.updated
+
+    def acquire(self, units: float) -> float:
+        """Take `units`, sleeping if the bucket runs short. Returns seconds waited."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= units
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+_limiter: Optional[TokenBucket] = None
+
+
+def set_limiter(bucket: Optional[TokenBucket]) -> None:
+    """Install (or with None, remove) the bucket that paces this process's calls."""
+    global _limiter
+    _limiter = bucket
+
+
+def charge(method: str, calls: int = 1) -> None:
+    """Account for `calls` requests to `method`, waiting on the limiter if set."""
+    units = QUOTA_UNITS.get(method, 0) * calls
+    METRICS.inc("quota_units", units)
+    limiter = _limiter
+    if limiter is not None and units:
+        waited = limiter.acquire(units)
+        if waited:
+            METRICS.observe("quota_wait", waited)
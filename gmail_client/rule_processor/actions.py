@@ -1,4 +1,6 @@
 import logging
+from gmail_client.metrics import METRICS
+from gmail_client.quota import charge
 from gmail_client.errors import (
     ACTIONS_NO_DESTINATION,
     ACTIONS_UNSUPPORTED,
@@ -6,7 +8,6 @@ from gmail_client.errors import (
 )
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
 
 
 def modify_message(service, email_id, add_labels=None, remove_labels=None):
@@ -17,47 +18,73 @@ def modify_message(service, email_id, add_labels=None, remove_labels=None):
     if remove_labels:
         body["removeLabelIds"] = remove_labels
 
-    service.users().messages().modify(
-        userId="me",
-        id=email_id,
-        body=body
-    ).execute()
+    charge("messages.modify")
+    with METRICS.timer("modify"):
+        service.users().messages().modify(
+            userId="me",
+            id=email_id,
+            body=body
+        ).execute()
+    METRICS.inc("modify_calls")
 
 
-def apply_actions(service, email, actions):
-    """Apply Gmail actions (mark read/unread, move)."""
-    logger.info(f"apply_actions → {email.get('id')}")
+def plan_action(action):
+    """Label change an action makes: (add_labels, remove_labels), or None if invalid.
 
+    Shared by `apply_actions` and the offline rule simulator.
+    """
+    atype = action.get("type")
+
+    if atype == "mark_as_read":
+        # Always attempt to remove the UNREAD label in Gmail.
+        return [], ["UNREAD"]
+
+    if atype == "mark_as_unread":
+        # Always attempt to add the UNREAD label in Gmail.
+        return ["UNREAD"], []
+
+    if atype == "move":
+        destination = action.get("destination")
+        if not destination:
+            logger.warning(ACTIONS_NO_DESTINATION)
+            return None
+        # Always attempt to add the destination label and remove INBOX.
+        return [destination], ["INBOX"]
+
+    logger.warning(ACTIONS_UNSUPPORTED, atype)
+    return None
+
+
+def apply_actions(service, email, actions, label_ids=None):
+    """Apply Gmail actions (mark read/unread, move).
+
+    `label_ids` maps label names to IDs (see `gmail_client.labels`);
+    labels not in it are sent as given.
+    """
     email_id = email.get("id")
     # is_read = email.get("is_read", 0)      # default to unread (0)
     # labels = email.get("labels", [])        # default to empty list
 
     for action in actions:
         try:
-            atype = action.get("type")
-
-            if atype == "mark_as_read":
-                # Always attempt to remove the UNREAD label in Gmail.
-                modify_message(service, email_id, remove_labels=["UNREAD"]) 
-                logger.info("📩 Marked email %s as read (requested)", email_id)
-
-            elif atype == "mark_as_unread":
-                # Always attempt to add the UNREAD label in Gmail.
-                modify_message(service, email_id, add_labels=["UNREAD"]) 
-                logger.info("📩 Marked email %s as unread (requested)", email_id)
-
-            elif atype == "move":
-                destination = action.get("destination")
-                if not destination:
-                    logger.warning(ACTIONS_NO_DESTINATION)
-                    continue
-
-                # Always attempt to add the destination label and remove INBOX.
-                modify_message(service, email_id, add_labels=[destination], remove_labels=["INBOX"])
-                logger.info("📂 Moved email %s to %s (requested)", email_id, destination)
+            plan = plan_action(action)
+            if plan is None:
+                continue
+            add_labels, remove_labels = plan
+            if label_ids:
+                add_labels = [label_ids.get(label, label) for label in add_labels]
+                remove_labels = [label_ids.get(label, label) for label in remove_labels]
+            modify_message(service, email_id, add_labels=add_labels, remove_labels=remove_labels)
 
+            atype = action.get("type")
+            if atype == "move":
+                logger.info("📂 Moved email %s to %s (requested)", email_id, add_labels[0],
+                            extra={"event": "action", "email_id": email_id})
             else:
-                logger.warning(ACTIONS_UNSUPPORTED, atype)
+                logger.info("📩 Marked email %s as %s (requested)", email_id,
+                            "read" if atype == "mark_as_read" else "unread",
+                            extra={"event": "action", "email_id": email_id})
 
         except Exception as e:
-            logger.error(ACTIONS_APPLY_FAILED, action, email_id, e)
+            METRICS.inc("action_errors")
+            logger.error(ACTIONS_APPLY_FAILED, action, email_id, e, extra={"event": "action", "email_id": email_id})
@@ -1,7 +1,10 @@
 import json
 import os
 import logging
+import time
+from gmail_client.metrics import METRICS
 from gmail_client.rule_processor.actions import apply_actions
+from gmail_client.labels import LabelRegistry, rule_labels
 from gmail_client.errors import (
     RULES_FILE_NOT_FOUND,
     RULES_PARSE_FAILED,
@@ -14,28 +17,63 @@ from gmail_client.errors import (
     RULE_PROCESS_FAILED,
 )
 from email.utils import parsedate_to_datetime
-from datetime import datetime, timezone
+from datetime import datetime
+from functools import lru_cache
 from gmail_client.email_repository import fetch_all_emails
+from gmail_client.models import Email
+from gmail_client.dates import age_days, to_epoch
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
 
 RULES_FILE = os.path.join(os.path.dirname(__file__), "../..", "config", "rules.json")
 
 
-def load_rules():
+def load_rules(path=None):
     """Load rules from JSON file safely."""
+    path = path or RULES_FILE
     try:
-        with open(RULES_FILE, "r") as f:
+        with open(path, "r") as f:
             return json.load(f)
     except FileNotFoundError:
-        logger.error(RULES_FILE_NOT_FOUND, RULES_FILE)
+        logger.error(RULES_FILE_NOT_FOUND, path)
         return []
     except json.JSONDecodeError as e:
         logger.error(RULES_PARSE_FAILED, e)
         return []
 
 
+class RuleCache:
+    """Keeps loaded rules warm and reloads them when the file's mtime changes.
+
+    `mtime` is the version of the file already applied elsewhere (e.g. by an
+    earlier cycle in another process); it is loaded without being reported
+    as a reload.
+    """
+
+    def __init__(self, path=None, mtime=None):
+        self.path = path or RULES_FILE
+        self.mtime = mtime
+        self.rules = None
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def get(self):
+        """Return (rules, reloaded) where `reloaded` says the file changed."""
+        mtime = self._current_mtime()
+        if mtime is not None and mtime == self.mtime:
+            if self.rules is None:
+                self.rules = load_rules(self.path)
+            return self.rules, False
+        self.rules = load_rules(self.path)
+        self.mtime = mtime
+        logger.info("ℹ️ Loaded %d rules from %s", len(self.rules), self.path)
+        return self.rules, True
+
+
 def parse_date_safe(received_at):
     """Try multiple strategies to parse dates from Gmail headers or stored ISO format."""
     if not received_at:
@@ -55,8 +93,18 @@ def parse_date_safe(received_at):
         return None
 
 
-def check_condition(email, condition):
-    """Evaluate a single condition on an email with error handling."""
+@lru_cache(maxsize=65536)
+def _stored_epoch(received_at):
+    """UTC epoch for a `received_at` string, for emails without `received_ts`."""
+    return to_epoch(parse_date_safe(received_at))
+
+
+def check_condition(email, condition, now=None):
+    """Evaluate a single condition on an email with error handling.
+
+    `now` is the evaluation time in UTC epoch seconds; `process_rules`
+    computes it once per run so every date condition compares integers.
+    """
     try:
         field = condition.get("field", "").lower()
         operator = condition.get("operator")
@@ -66,30 +114,37 @@ def check_condition(email, condition):
             logger.warning(RULE_INVALID_CONDITION, condition)
             return False
 
-        # Extract field value
+        # Extract field value (attribute access for records, keys for legacy dicts)
+        is_record = isinstance(email, Email)
         email_val = ""
         if field == "from":
-            email_val = email.get("from", "")
+            email_val = email.sender if is_record else email.get("from", "")
         elif field == "to":
-            email_val = email.get("to", "")
+            email_val = email.recipient if is_record else email.get("to", "")
+            if email_val is None:
+                # To was never fetched for this email: unknown, so no match either way
+                return False
         elif field == "subject":
-            email_val = email.get("subject", "")
+            email_val = email.subject if is_record else email.get("subject", "")
         elif field == "datereceived":
-            received_at = email.get("received_at")
-            email_date = parse_date_safe(received_at)
-            if not email_date:
-                return False
+            # Pre-parsed epoch: no date parsing in the hot loop
+            received_ts = email.received_ts if is_record else None
+            if received_ts is None:
+                received_at = email.get("received_at")
+                received_ts = _stored_epoch(received_at) if received_at else None
+                if received_ts is None:
+                    return False
 
-            now = datetime.now(timezone.utc)
+            days = age_days(received_ts, int(time.time()) if now is None else now)
 
             if operator == "less_than_days":
-                return (now - email_date).days < int(value)
+                return days < int(value)
             elif operator == "greater_than_days":
-                return (now - email_date).days > int(value)
+                return days > int(value)
             elif operator == "less_than_months":
-                return (now - email_date).days < int(value) * 30
+                return days < int(value) * 30
             elif operator == "greater_than_months":
-                return (now - email_date).days > int(value) * 30
+                return days > int(value) * 30
             else:
                 logger.warning(RULE_UNSUPPORTED_DATE_OPERATOR, operator)
                 return False
@@ -109,38 +164,75 @@ def check_condition(email, condition):
         return False
 
     except Exception as e:
+        METRICS.inc("condition_errors")
         logger.error(RULE_EVAL_ERROR, condition, e)
         return False
 
 
-def process_rules(service):
-    """Process emails against rules and apply actions."""
+def _match(email, rule, now=None):
+    """(matched, conditions checked); "all" stops at the first miss, "any" at the first hit."""
+    predicate = rule.get("predicate", "all").lower()
+    if predicate not in ("all", "any"):
+        logger.warning(RULE_UNSUPPORTED_PREDICATE, predicate)
+        return False, 0
+    stop_on = predicate == "any"
+    checked = 0
+    for condition in rule.get("conditions", []):
+        checked += 1
+        if check_condition(email, condition, now) == stop_on:
+            return stop_on, checked
+    return not stop_on, checked
+
+
+def rule_matches(email, rule, now=None):
+    """True if `email` satisfies `rule`'s conditions under its predicate."""
+    return _match(email, rule, now)[0]
+
+
+def process_rules(service, emails=None, rules=None, labels=None):
+    """Process emails against rules and apply actions.
+
+    `emails` defaults to every stored email and `rules` to `rules.json`;
+    long-running callers pass their warm copies instead, along with the
+    `LabelRegistry` in `labels`. The labels the rules move mail to are
+    resolved (and created if missing) once, before any action runs.
+    """
     # 5. Fetch from DB to verify persistence (optional)
-    stored_emails = fetch_all_emails()
+    stored_emails = fetch_all_emails() if emails is None else emails
     if not stored_emails:
         logger.info("ℹ️ No stored emails to process rules on.")
         return
     
-    rules = load_rules()
+    if rules is None:
+        rules = load_rules()
     if not rules:
         logger.info("ℹ️ No rules found to apply.")
         return
 
+    names = rule_labels(rules)
+    label_ids = (labels or LabelRegistry(service)).ensure(names) if names else {}
+
+    started = time.perf_counter()
+    action_seconds = 0.0
+    conditions_checked = 0  # counted here, not per condition, to keep the registry lock out of the loop
+    now = int(time.time())
     for email in stored_emails:
         for rule in rules:
-            conditions = rule.get("conditions", [])
-            predicate = rule.get("predicate", "all").lower()
             try:
-                if predicate == "all":
-                    match = all(check_condition(email, c) for c in conditions)
-                elif predicate == "any":
-                    match = any(check_condition(email, c) for c in conditions)
-                else:
-                    logger.warning(RULE_UNSUPPORTED_PREDICATE, predicate)
-                    match = False
-                if match:
-                    logger.info("✅ Rule matched: %s", rule.get("description", "Unnamed"))
-                    logger.info(f"apply_action yet to trigger")
-                    apply_actions(service, email, rule.get("actions", []))
+                matched, checked = _match(email, rule, now)
+                conditions_checked += checked
+                if matched:
+                    METRICS.inc("rule_matches")
+                    logger.info("✅ Rule matched: %s", rule.get("description", "Unnamed"),
+                                extra={"event": "rule_match", "email_id": email.get("id")})
+                    action_started = time.perf_counter()
+                    apply_actions(service, email, rule.get("actions", []), label_ids)
+                    action_seconds += time.perf_counter() - action_started
             except Exception as e:
                 logger.error(RULE_PROCESS_FAILED, rule, e)
+
+    # Keep evaluation and Gmail round trips apart so each can be tracked on its own
+    METRICS.observe("rule_evaluation", time.perf_counter() - started - action_seconds)
+    METRICS.observe("actions", action_seconds)
+    METRICS.inc("emails_evaluated", len(stored_emails))
+    METRICS.inc("conditions_evaluated", conditions_checked)
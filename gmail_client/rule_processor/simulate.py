@@ -0,0 +1,117 @@
+"""Offline rule simulation against the stored emails.
+
+Evaluates a rules file against `Email` records (normally the `emails`
+table, or a snapshot copy of it) without a Gmail service. It reports what
+`process_rules` would do: matches per rule, the `messages.modify` calls
+and label changes it would make, the quota they would cost, and how long
+evaluation takes, so large rule sets can be checked before deployment.
+
+Conditions only read sender, recipient, subject and date, so matches do
+not depend on earlier actions. Each rule is timed over all emails, then
+the planned actions are replayed per email, in rule order, against a copy
+of its labels. A change only counts as effective when it actually changes
+the labels.
+"""
+
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from gmail_client.models import Email
+from gmail_client.quota import QUOTA_UNITS
+from gmail_client.rule_processor.actions import plan_action
+from gmail_client.rule_processor.rule_engine import rule_matches
+
+
+def simulate_rules(emails: List[Email], rules: List[Dict], now: Optional[int] = None) -> Dict:
+    """Return a report of what `rules` would do to `emails` at time `now`."""
+    now = int(time.time()) if now is None else now
+    plans = [[p for p in map(plan_action, rule.get("actions", [])) if p is not None] for rule in rules]
+
+    per_rule = []
+    matched_by_rule = []
+    started = time.perf_counter()
+    for rule, plan in zip(rules, plans):
+        rule_started = time.perf_counter()
+        matched = [i for i, email in enumerate(emails) if rule_matches(email, rule, now)]
+        seconds = time.perf_counter() - rule_started
+        matched_by_rule.append(matched)
+        per_rule.append({
+            "description": rule.get("description", "Unnamed"),
+            "matches": len(matched),
+            "modify_calls": len(matched) * len(plan),
+            "eval_seconds": round(seconds, 6),
+        })
+    eval_seconds = time.perf_counter() - started
+
+    # Replay actions per email in rule order (as process_rules applies them)
+    actions_by_email: Dict[int, List] = {}
+    for rule_index, matched in enumerate(matched_by_rule):
+        for i in matched:
+            actions_by_email.setdefault(i, []).append(rule_index)
+
+    requested = Counter()
+    effective = Counter()
+    changed_emails = 0
+    for i, rule_indexes in actions_by_email.items():
+        labels = set(emails[i].labels)
+        before = frozenset(labels)
+        for rule_index in rule_indexes:
+            for add_labels, remove_labels in plans[rule_index]:
+                for label in add_labels:
+                    requested["+" + label] += 1
+                    if label not in labels:
+                        effective["+" + label] += 1
+                        labels.add(label)
+                for label in remove_labels:
+                    requested["-" + label] += 1
+                    if label in labels:
+                        effective["-" + label] += 1
+                        labels.discard(label)
+        if labels != before:
+            changed_emails += 1
+
+    modify_calls = sum(r["modify_calls"] for r in per_rule)
+    return {
+        "emails": len(emails),
+        "rules": len(rules),
+        "now": now,
+        "eval_seconds": round(eval_seconds, 6),
+        "checks_per_second": round(len(emails) * len(rules) / eval_seconds, 1) if eval_seconds else 0.0,
+        "per_rule": per_rule,
+        "matched_emails": len(actions_by_email),
+        "changed_emails": changed_emails,
+        "label_changes": {"requested": dict(requested.most_common()), "effective": dict(effective.most_common())},
+        "modify_calls": modify_calls,
+        "quota_units": modify_calls * QUOTA_UNITS["messages.modify"],
+    }
+
+
+def format_report(report: Dict) -> str:
+    """Human-readable summary of a `simulate_rules` report."""
+    lines = [
+        f"{report['rules']} rules on {report['emails']} emails: "
+        f"evaluated in {report['eval_seconds']:.3f}s ({report['checks_per_second']:.0f} email-rule checks/s)",
+        "",
+        f"{'#':>3}  {'matches':>8}  {'modify':>8}  {'quota':>8}  {'eval ms':>9}  rule",
+    ]
+    for i, rule in enumerate(report["per_rule"], start=1):
+        lines.append(
+            f"{i:>3}  {rule['matches']:>8}  {rule['modify_calls']:>8}  "
+            f"{rule['modify_calls'] * QUOTA_UNITS['messages.modify']:>8}  "
+            f"{rule['eval_seconds'] * 1000:>9.2f}  {rule['description']}"
+        )
+
+    changes = report["label_changes"]
+    lines += [
+        "",
+        f"Emails matched: {report['matched_emails']}, labels actually changed on: {report['changed_emails']}",
+        "Label changes (requested / effective):",
+    ]
+    for change, count in changes["requested"].items():
+        lines.append(f"  {change:<30} {count:>8} / {changes['effective'].get(change, 0)}")
+    lines.append(
+        f"Estimated quota: {report['quota_units']} units "
+        f"({report['modify_calls']} messages.modify calls x {QUOTA_UNITS['messages.modify']})"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,166 @@
+"""Pooled, keep-alive HTTP transport shared by fetch and action calls.
+
+A single authorized HTTP object is built once per run and handed to the
+Gmail service, so every list/get/batch/modify call reuses the same open
+connections instead of paying a TLS handshake each time. A background
+refresher renews the access token before it expires, keeping token
+refreshes off the request path.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+import httplib2
+import google_auth_httplib2
+import requests
+from requests.adapters import HTTPAdapter
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.credentials import Credentials
+
+from config.gmail_config import (
+    HTTP_BACKEND,
+    HTTP_TIMEOUT,
+    HTTP_POOL_SIZE,
+    TOKEN_REFRESH_MARGIN,
+)
+from gmail_client.errors import (
+    TRANSPORT_UNKNOWN_BACKEND,
+    TRANSPORT_REFRESH_FAILED,
+)
+
+_refresh_session: Optional[requests.Session] = None
+_refresh_lock = threading.Lock()
+
+
+def _pooled_session(session: requests.Session, pool_size: int) -> requests.Session:
+    """Mount a keep-alive connection pool of `pool_size` on the session."""
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def refresh_request() -> Request:
+    """Return a token-refresh transport backed by one shared pooled session."""
+    global _refresh_session
+    with _refresh_lock:
+        if _refresh_session is None:
+            _refresh_session = _pooled_session(requests.Session(), HTTP_POOL_SIZE)
+    return Request(session=_refresh_session)
+
+
+class SessionHttp:
+    """httplib2-compatible adapter over a pooled `AuthorizedSession`.
+
+    googleapiclient only needs `request()` and a `credentials` attribute, so
+    this lets the API client run on requests/urllib3 connection pooling.
+    """
+
+    def __init__(self, session: AuthorizedSession, timeout: int = HTTP_TIMEOUT):
+        self.session = session
+        self.timeout = timeout
+
+    @property
+    def credentials(self):
+        return self.session.credentials
+
+    def request(self, uri, method="GET", body=None, headers=None,
+                redirections=None, connection_type=None):
+        """Perform a request and return an httplib2-style (response, content) pair."""
+        resp = self.session.request(method, uri, data=body, headers=headers, timeout=self.timeout)
+        info = {k.lower(): v for k, v in resp.headers.items()}
+        info["status"] = str(resp.status_code)
+        # requests already decoded the body, so the encoding header no longer applies
+        info.pop("content-encoding", None)
+        return httplib2.Response(info), resp.content
+
+    def close(self):
+        self.session.close()
+
+
+def build_http(
+    creds: Credentials,
+    backend: str = HTTP_BACKEND,
+    timeout: int = HTTP_TIMEOUT,
+    pool_size: int = HTTP_POOL_SIZE,
+):
+    """Build the authorized, keep-alive HTTP object shared by all API calls."""
+    if backend == "httplib2":
+        return google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=timeout))
+    if backend == "requests":
+        session = AuthorizedSession(creds, auth_request=refresh_request())
+        return SessionHttp(_pooled_session(session, pool_size), timeout=timeout)
+    raise ValueError(TRANSPORT_UNKNOWN_BACKEND % backend)
+
+
+def http_for_thread(service):
+    """A new authorized HTTP object like `service`'s, for use on another thread.
+
+    Returns None when the service has no HTTP object of its own (e.g. the
+    offline emulator), in which case requests are executed as usual.
+    """
+    http = getattr(service, "_http", None)
+    creds = getattr(http, "credentials", None)
+    if creds is None:
+        return None
+    return build_http(creds, backend="requests" if isinstance(http, SessionHttp) else "httplib2")
+
+
+class CredentialRefresher:
+    """Refresh OAuth credentials in a background thread ahead of expiry."""
+
+    def __init__(
+        self,
+        creds: Credentials,
+        margin: int = TOKEN_REFRESH_MARGIN,
+        on_refresh: Optional[Callable[[Credentials], None]] = None,
+        retry_delay: int = 30,
+    ):
+        self.creds = creds
+        self.margin = margin
+        self.on_refresh = on_refresh
+        self.retry_delay = retry_delay
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def seconds_until_refresh(self, now: Optional[datetime] = None) -> float:
+        """Seconds to wait before the next refresh (0 if it is already due)."""
+        if not self.creds.expiry:
+            return float(self.margin)
+        # google-auth keeps `expiry` as a naive UTC datetime
+        now = now or datetime.utcnow()
+        due = self.creds.expiry - timedelta(seconds=self.margin)
+        return max(0.0, (due - now).total_seconds())
+
+    def refresh_now(self) -> None:
+        """Refresh the token immediately and notify the callback."""
+        self.creds.refresh(refresh_request())
+        logging.info("Refreshed access token (expires %s).", self.creds.expiry)
+        if self.on_refresh:
+            self.on_refresh(self.creds)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.seconds_until_refresh()):
+            if not self.creds.expiry:
+                continue
+            try:
+                self.refresh_now()
+            except Exception as e:
+                logging.warning(TRANSPORT_REFRESH_FAILED, e)
+                if self._stop.wait(self.retry_delay):
+                    break
+
+    def start(self) -> "CredentialRefresher":
+        if not self.creds.refresh_token or self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run, name="token-refresher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -1,14 +1,34 @@
 """Entry point for Gmail client app with CLI options."""
 
+import json
 import logging
+import os
 import argparse
-from gmail_client.auth import authenticate
+import threading
+from gmail_client.auth import authenticate, save_credentials
 from gmail_client.gmail_service import build_service
+from gmail_client.transport import build_http, CredentialRefresher
 from gmail_client.email_fetch import fetch_all_emails_from_gmail, fetch_inbox_messages
-from gmail_client.email_repository import init_db, save_emails
-from gmail_client.rule_processor.rule_engine import process_rules
+from gmail_client.email_repository import connect, init_db, save_emails, fetch_all_emails, open_snapshot
+from gmail_client.rule_processor.rule_engine import load_rules, process_rules
+from gmail_client.rule_processor.simulate import simulate_rules, format_report
+from gmail_client.dates import iso_to_epoch
+from gmail_client.export import export_emails
+from gmail_client.maintenance import apply_retention, run_maintenance
+from gmail_client.daemon import SyncState, run_daemon, install_signal_handlers
+from gmail_client.metrics import export_metrics, serve_metrics
+from gmail_client.log import setup_logging
+from gmail_client.projection import DEFAULT_PROJECTION, build_projection
+from gmail_client.blob_store import BlobStore
+from gmail_client.accounts import load_accounts
+from gmail_client.orchestrator import Orchestrator
+from config.db_config import ARCHIVE_DIR, RETENTION_MONTHS
+from config.log_config import LOG_FORMAT, LOG_LEVEL, LOG_SAMPLE_EVERY
+from config.gmail_config import (
+    ACCOUNTS_FILE, ACCOUNT_WORKERS, FETCH_FORMAT, METRICS_HOST, SYNC_INTERVAL, SYNC_JITTER,
+)
 
-def fetch_emails(service, fetch_all: bool = True, batch_size: int = 50):
+def fetch_emails(service, fetch_all: bool = True, batch_size: int = 50, projection=DEFAULT_PROJECTION, store=None):
     """
     Fetch emails from Gmail based on user choice.
     
@@ -17,30 +37,55 @@ def fetch_emails(service, fetch_all: bool = True, batch_size: int = 50):
         fetch_all (bool): If True, fetch all emails using batching.
                           If False, fetch only the first `batch_size`.
         batch_size (int): Number of emails per page/batch.
+        projection: Headers/fields to request (see `gmail_client.projection`).
+        store: Blob store for bodies/attachments in full/raw format, else None.
     Returns:
-        List of email dictionaries.
+        List of `Email` records.
     """
     if fetch_all:
         logging.info("📩 Fetching ALL emails using batch processing...")
-        return fetch_all_emails_from_gmail(service, batch_size=batch_size)
+        return fetch_all_emails_from_gmail(service, batch_size=batch_size, projection=projection, store=store)
     else:
         logging.info(f"📩 Fetching ONLY first {batch_size} emails...")
-        emails, _ = fetch_inbox_messages(service, max_results=batch_size)
+        emails, _ = fetch_inbox_messages(service, max_results=batch_size, projection=projection, store=store)
         return emails
 
 
-def main(fetch_all: bool = True, batch_size: int = 50):
-    """Authenticate, fetch emails, save to DB, and process rules."""
+def main(
+    fetch_all: bool = True,
+    batch_size: int = 50,
+    metrics_json: str = None,
+    metrics_prom: str = None,
+    service=None,
+    rules_path: str = None,
+    fetch_format: str = FETCH_FORMAT,
+):
+    """Authenticate, fetch emails, save to DB, and process rules.
+
+    If `metrics_json`/`metrics_prom` are given, the per-stage timings and
+    counters of the run are written there at the end. Passing a ready
+    `service` (e.g. the offline emulator) skips authentication, and
+    `rules_path` overrides `config/rules.json`. `fetch_format` "full" or
+    "raw" also archives bodies and attachments in the blob store.
+    """
+    refresher = None
     try:
         # 1. Initialize DB
         init_db()
 
-        # 2. Authenticate and build Gmail service
-        creds = authenticate()
-        service = build_service(creds)
+        # 2. Authenticate and build Gmail service on a shared keep-alive transport
+        if service is None:
+            creds = authenticate()
+            refresher = CredentialRefresher(creds, on_refresh=save_credentials).start()
+            service = build_service(creds, http=build_http(creds))
 
-        # 3. Fetch emails dynamically
-        emails = fetch_emails(service, fetch_all=fetch_all, batch_size=batch_size)
+        # 3. Fetch emails dynamically, requesting only what storage and the rules need
+        rules = load_rules(rules_path)
+        store = BlobStore() if fetch_format != "metadata" else None
+        emails = fetch_emails(
+            service, fetch_all=fetch_all, batch_size=batch_size,
+            projection=build_projection(rules, fetch_format), store=store,
+        )
 
         # 4. Save all emails to DB
         if emails:
@@ -50,24 +95,307 @@ def main(fetch_all: bool = True, batch_size: int = 50):
             logging.info("No emails retrieved from Gmail.")
 
         # 5. Process rules on stored emails
-        process_rules(service)
+        process_rules(service, rules=rules)
 
     except Exception as e:
         logging.error(f"Application error: {e}")
+    finally:
+        if refresher:
+            refresher.stop()
+        export_metrics(metrics_json, metrics_prom)
 
 
-if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+def serve(
+    interval: float = SYNC_INTERVAL,
+    jitter: float = SYNC_JITTER,
+    batch_size: int = 50,
+    metrics_json: str = None,
+    metrics_prom: str = None,
+    metrics_port: int = None,
+    fetch_format: str = FETCH_FORMAT,
+    metrics_host: str = METRICS_HOST,
+):
+    """Run incremental fetch-and-rules cycles until SIGTERM/SIGINT.
+
+    The Gmail service, DB connection, rules and known message IDs are set
+    up once and reused, so each cycle only pays for new mail. Metrics are
+    re-exported after every cycle and optionally served over HTTP.
+    """
+    refresher = None
+    conn = None
+    try:
+        conn = connect()
+        init_db(conn)
+
+        creds = authenticate()
+        refresher = CredentialRefresher(creds, on_refresh=save_credentials).start()
+        service = build_service(creds, http=build_http(creds))
+
+        stop_event = threading.Event()
+        install_signal_handlers(stop_event)
+        if metrics_port:
+            serve_metrics(metrics_port, host=metrics_host)
+
+        state = SyncState(conn, fetch_format=fetch_format)
+        logging.info(f"Serving: {len(state.known_ids)} known emails, syncing every ~{interval:.0f}s")
+        run_daemon(
+            service, state, interval=interval, jitter=jitter, batch_size=batch_size, stop_event=stop_event,
+            after_cycle=lambda: export_metrics(metrics_json, metrics_prom),
+        )
+        logging.info("Shutdown complete.")
+
+    except Exception as e:
+        logging.error(f"Application error: {e}")
+    finally:
+        if refresher:
+            refresher.stop()
+        if conn:
+            conn.close()
+
+
+def sync_accounts(
+    accounts_file: str = ACCOUNTS_FILE,
+    workers: int = ACCOUNT_WORKERS,
+    cycles: int = 1,
+    interval: float = SYNC_INTERVAL,
+    jitter: float = SYNC_JITTER,
+    batch_size: int = 50,
+    metrics_json: str = None,
+    metrics_prom: str = None,
+    report_path: str = None,
+    login: str = None,
+    fetch_format: str = FETCH_FORMAT,
+):
+    """Sync every mailbox in `accounts_file` on a pool of worker processes.
+
+    Each account runs `cycles` fetch-and-rules cycles (0: until SIGTERM/
+    SIGINT) against its own token and DB shard. `login` instead runs the
+    interactive OAuth flow for one account so its workers can start.
+    """
+    try:
+        accounts = load_accounts(accounts_file)
+        if login:
+            account = next((a for a in accounts if a.name == login), None)
+            if account is None:
+                raise ValueError(f"Unknown account: {login}")
+            authenticate(account.token_file, account.credentials_file)
+            return
+
+        stop_event = threading.Event()
+        install_signal_handlers(stop_event)
+        orchestrator = Orchestrator(accounts, workers=workers, batch_size=batch_size, fetch_format=fetch_format)
+        logging.info(f"Syncing {len(accounts)} accounts on {orchestrator.workers} worker processes")
+        summary = orchestrator.run(
+            cycles=cycles or None, interval=interval, jitter=jitter, stop_event=stop_event
+        )
+        logging.info(
+            f"Done: {summary['cycles']} cycles, {summary['new_emails']} new emails, "
+            f"{summary['errors']} errors in {summary['elapsed_seconds']}s"
+        )
+        if report_path:
+            with open(report_path, "w") as f:
+                json.dump(summary, f, indent=2)
+
+    except Exception as e:
+        logging.error(f"Application error: {e}")
+    finally:
+        export_metrics(metrics_json, metrics_prom)
+
+def simulate(rules_path: str = None, db_file: str = None, as_of: str = None, output: str = None):
+    """Dry-run a rules file against the stored emails; no network, no changes.
 
+    `db_file` may point at a snapshot of the database (opened read-only),
+    `as_of` (ISO 8601) replays date conditions as of that time, and
+    `output` also writes the full report as JSON.
+    """
+    conn = None
+    try:
+        now = None
+        if as_of:
+            now = iso_to_epoch(as_of)
+            if now is None:
+                raise ValueError(f"Invalid --as-of date: {as_of}")
+        conn = open_snapshot(db_file)
+        emails = fetch_all_emails(conn)
+        if not emails:
+            logging.info("No stored emails to simulate rules on.")
+            return None
+        rules = load_rules(rules_path)
+        if not rules:
+            logging.info("No rules found to simulate.")
+            return None
+
+        report = simulate_rules(emails, rules, now=now)
+        print(format_report(report))
+        if output:
+            with open(output, "w") as f:
+                json.dump(report, f, indent=2)
+        return report
+
+    except Exception as e:
+        logging.error(f"Application error: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+def _epoch_arg(value: str, name: str):
+    epoch = iso_to_epoch(value) if value else None
+    if value and epoch is None:
+        raise ValueError(f"Invalid {name} date: {value}")
+    return epoch
+
+
+def export(
+    output: str,
+    fmt: str = None,
+    since: str = None,
+    until: str = None,
+    labels=(),
+    incremental: str = None,
+    db_file: str = None,
+    chunk_size: int = None,
+):
+    """Stream the stored emails to a JSONL/CSV/Parquet file (see `gmail_client.export`).
+
+    `fmt` defaults to the output file's extension. `since`/`until` are ISO
+    8601 received-date bounds; `incremental` names a high-water mark so
+    repeated runs only export rows saved since the previous one.
+    """
+    conn = None
+    try:
+        if fmt is None:
+            extension = os.path.splitext(output)[1].lstrip(".").lower()
+            fmt = extension if extension in ("csv", "parquet") else "jsonl"
+        conn = connect(db_file)
+        init_db(conn)
+        options = {"chunk_size": chunk_size} if chunk_size else {}
+        summary = export_emails(
+            conn, output, fmt=fmt, since=_epoch_arg(since, "--since"), until=_epoch_arg(until, "--until"),
+            labels=labels or (), incremental=incremental, **options,
+        )
+        logging.info(f"Exported {summary['rows']} emails to {output} ({fmt})")
+        return summary
+
+    except Exception as e:
+        logging.error(f"Application error: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+def maintain(
+    db_file: str = None,
+    partition: bool = False,
+    keep_months: int = RETENTION_MONTHS,
+    archive_dir: str = ARCHIVE_DIR,
+    vacuum_pages: int = 0,
+    full_vacuum: bool = False,
+    analyze: bool = False,
+):
+    """Storage upkeep (see `gmail_client.maintenance`): optionally convert to
+    monthly partitions, expire mail older than `keep_months` (0 keeps all,
+    `archive_dir` keeps a copy), then reclaim free pages and refresh the
+    query planner statistics."""
+    conn = None
+    try:
+        conn = connect(db_file)
+        init_db(conn, partitioned=partition or None)
+        summary = {}
+        if keep_months:
+            summary["retention"] = apply_retention(conn, keep_months, archive_dir=archive_dir)
+        summary["maintenance"] = run_maintenance(
+            conn, vacuum_pages=vacuum_pages, full_vacuum=full_vacuum, analyze=analyze
+        )
+        return summary
+
+    except Exception as e:
+        logging.error(f"Application error: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Gmail Fetch Client")
-    group = parser.add_mutually_exclusive_group(required=True)
+    group = parser.add_mutually_exclusive_group()
     group.add_argument("--all", action="store_true", help="Fetch ALL emails with batch processing")
     group.add_argument("--first", type=int, help="Fetch only the first N emails")
     parser.add_argument("--batch-size", type=int, default=50, help="Batch size for fetching emails")
+    parser.add_argument("--metrics-json", help="Write a JSON run summary (timings and counters) to this path")
+    parser.add_argument("--metrics-prom", help="Write metrics in Prometheus text format to this path")
+    parser.add_argument("--format", dest="fetch_format", choices=["metadata", "full", "raw"], default=FETCH_FORMAT,
+                        help="Message format to fetch; full (recommended) or raw also archive bodies and attachments")
+    parser.add_argument("--log-level", default=LOG_LEVEL, help="Log level (DEBUG, INFO, WARNING, ...)")
+    parser.add_argument("--log-format", choices=["text", "json"], default=LOG_FORMAT, help="Log record format")
+    parser.add_argument("--log-sample-every", type=int, default=LOG_SAMPLE_EVERY,
+                        help="Write 1 in N per-item log events (rule matches, actions); errors are always written")
+
+    subparsers = parser.add_subparsers(dest="command")
+    serve_parser = subparsers.add_parser("serve", help="Run continuously, syncing new mail on an interval")
+    serve_parser.add_argument("--interval", type=float, default=SYNC_INTERVAL, help="Seconds between sync cycles")
+    serve_parser.add_argument("--jitter", type=float, default=SYNC_JITTER, help="Random +/- fraction applied to the interval")
+    serve_parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port at /metrics")
+    serve_parser.add_argument("--metrics-host", default=METRICS_HOST,
+                              help="Interface for --metrics-port (default: GMAIL_METRICS_HOST or 127.0.0.1; 0.0.0.0 for all)")
+    simulate_parser = subparsers.add_parser("simulate", help="Dry-run a rules file against stored emails (offline)")
+    simulate_parser.add_argument("--rules", help="Candidate rules file (default: config/rules.json)")
+    simulate_parser.add_argument("--db", help="Database file or snapshot to read (default: the configured DB)")
+    simulate_parser.add_argument("--as-of", help="Evaluate date conditions as of this ISO 8601 time")
+    simulate_parser.add_argument("--output", help="Also write the full report as JSON to this path")
+    export_parser = subparsers.add_parser("export", help="Stream stored emails to JSONL, CSV or Parquet")
+    export_parser.add_argument("output", help="Output file ('-' for stdout)")
+    export_parser.add_argument("--format", dest="export_format", choices=["jsonl", "csv", "parquet"],
+                               help="Output format (default: from the file extension, else jsonl)")
+    export_parser.add_argument("--since", help="Only emails received at/after this ISO 8601 time")
+    export_parser.add_argument("--until", help="Only emails received before this ISO 8601 time")
+    export_parser.add_argument("--label", action="append", dest="labels", help="Only emails with this label (repeatable)")
+    export_parser.add_argument("--incremental", metavar="NAME",
+                               help="Only rows saved since the last export with this name, then advance its mark")
+    export_parser.add_argument("--db", help="Database file (default: the configured DB)")
+    export_parser.add_argument("--chunk-size", type=int, help="Rows per cursor fetch / Parquet row group")
+    maintain_parser = subparsers.add_parser("maintain", help="Expire old mail, reclaim space and refresh DB statistics")
+    maintain_parser.add_argument("--db", help="Database file (default: the configured DB)")
+    maintain_parser.add_argument("--partition", action="store_true",
+                                 help="Convert the emails table to monthly partitions (one-time)")
+    maintain_parser.add_argument("--keep-months", type=int, default=RETENTION_MONTHS,
+                                 help="Keep the current month and this many before it (0: keep everything)")
+    maintain_parser.add_argument("--archive-dir", default=ARCHIVE_DIR,
+                                 help="Copy expired months to SQLite files here instead of discarding them")
+    maintain_parser.add_argument("--vacuum-pages", type=int, default=0, help="Free pages to reclaim (0: all)")
+    maintain_parser.add_argument("--full-vacuum", action="store_true",
+                                 help="Rebuild the file with VACUUM (also enables incremental vacuum)")
+    maintain_parser.add_argument("--analyze", action="store_true",
+                                 help="Run a full ANALYZE instead of PRAGMA optimize")
+    accounts_parser = subparsers.add_parser("accounts", help="Sync many mailboxes in parallel worker processes")
+    accounts_parser.add_argument("--config", default=ACCOUNTS_FILE, help="Accounts JSON file")
+    accounts_parser.add_argument("--workers", type=int, default=ACCOUNT_WORKERS, help="Worker processes")
+    accounts_parser.add_argument("--cycles", type=int, default=1, help="Cycles per account (0: run until stopped)")
+    accounts_parser.add_argument("--interval", type=float, default=SYNC_INTERVAL, help="Seconds between an account's cycles")
+    accounts_parser.add_argument("--jitter", type=float, default=SYNC_JITTER, help="Random +/- fraction applied to the interval")
+    accounts_parser.add_argument("--report", help="Write the per-account JSON report to this path")
+    accounts_parser.add_argument("--login", metavar="NAME", help="Run the OAuth login for one account and exit")
 
     args = parser.parse_args()
+    setup_logging(level=args.log_level, fmt=args.log_format, sample_every=args.log_sample_every)
 
-    if args.all:
-        main(fetch_all=True, batch_size=args.batch_size)
+    metrics = {"metrics_json": args.metrics_json, "metrics_prom": args.metrics_prom, "fetch_format": args.fetch_format}
+    if args.command == "serve":
+        serve(interval=args.interval, jitter=args.jitter, batch_size=args.batch_size,
+              metrics_port=args.metrics_port, metrics_host=args.metrics_host, **metrics)
+    elif args.command == "simulate":
+        simulate(rules_path=args.rules, db_file=args.db, as_of=args.as_of, output=args.output)
+    elif args.command == "export":
+        export(args.output, fmt=args.export_format, since=args.since, until=args.until, labels=args.labels,
+               incremental=args.incremental, db_file=args.db, chunk_size=args.chunk_size)
+    elif args.command == "maintain":
+        maintain(db_file=args.db, partition=args.partition, keep_months=args.keep_months,
+                 archive_dir=args.archive_dir, vacuum_pages=args.vacuum_pages, full_vacuum=args.full_vacuum,
+                 analyze=args.analyze)
+    elif args.command == "accounts":
+        sync_accounts(accounts_file=args.config, workers=args.workers, cycles=args.cycles, interval=args.interval,
+                      jitter=args.jitter, batch_size=args.batch_size, report_path=args.report, login=args.login,
+                      **metrics)
+    elif args.all:
+        main(fetch_all=True, batch_size=args.batch_size, **metrics)
     elif args.first:
-        main(fetch_all=False, batch_size=args.first)
+        main(fetch_all=False, batch_size=args.first, **metrics)
+    else:
+        parser.error("one of the arguments --all --first or a command is required")
@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import unittest
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.accounts import load_accounts
+
+
+class TestLoadAccounts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "accounts.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, entries):
+        with open(self.path, "w") as f:
+            json.dump(entries, f)
+
+    def test_paths_resolved_against_config_dir(self):
+        self._write([
+            {"name": "alice", "token_file": "tokens/alice.json", "db_file": "/abs/alice.db"},
+            {"name": "bob", "rules_file": "rules-bob.json", "emulator": {"size": 5}},
+        ])
+        alice, bob = load_accounts(self.path)
+        self.assertEqual(alice.token_file, os.path.join(self.tmp.name, "tokens/alice.json"))
+        self.assertEqual(alice.db_file, "/abs/alice.db")
+        self.assertEqual(bob.token_file, os.path.join(self.tmp.name, "tokens", "bob.json"))
+        self.assertTrue(bob.db_file.endswith(os.path.join("accounts", "bob.db")))
+        self.assertEqual(bob.rules_file, os.path.join(self.tmp.name, "rules-bob.json"))
+        self.assertEqual(bob.emulator, {"size": 5})
+
+    def test_rejects_missing_and_duplicate_names(self):
+        self._write([{"token_file": "t.json"}])
+        with self.assertRaises(ValueError):
+            load_accounts(self.path)
+        self._write([{"name": "a"}, {"name": "a"}])
+        with self.assertRaises(ValueError):
+            load_accounts(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
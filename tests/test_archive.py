@@ -0,0 +1,103 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.archive import archive_message, raw_headers
+from gmail_client.blob_store import BlobStore
+from gmail_client.emulator import FakeGmail
+from gmail_client.email_fetch import fetch_inbox_messages, get_messages
+from gmail_client.email_repository import init_db, save_emails, fetch_all_emails, fetch_email_attachments
+from gmail_client.projection import build_projection
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = BlobStore(os.path.join(self.tmp.name, "blobs"))
+        self.conn = sqlite3.connect(os.path.join(self.tmp.name, "emails.db"))
+        init_db(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_full_format_stores_body_and_deduplicates_attachments(self):
+        gmail = FakeGmail(size=20, attachment_ratio=1.0)
+        emails, _ = fetch_inbox_messages(
+            gmail, max_results=20, projection=build_projection(fmt="full"), store=self.store
+        )
+        self.assertEqual(len(emails), 20)
+        self.assertEqual(gmail.calls["messages.attachments.get"], 20)
+
+        first = emails[0]
+        self.assertIn(b"This is synthetic message", self.store.read(first.body_blob))
+
+        # 20 attachments drawn from 7 distinct payloads
+        blobs = {a.blob for e in emails for a in e.attachments}
+        self.assertEqual(len(blobs), 7)
+        self.assertNotIn(None, blobs)
+
+        save_emails(emails, conn=self.conn)
+        stored = {e.id: e for e in fetch_all_emails(self.conn)}
+        self.assertEqual(stored[first.id].body_blob, first.body_blob)
+        self.assertEqual(fetch_email_attachments(first.id, self.conn), list(first.attachments))
+
+    def test_metadata_resync_keeps_archived_body(self):
+        gmail = FakeGmail(size=5, attachment_ratio=0.0)
+        full, _ = fetch_inbox_messages(gmail, max_results=5, projection=build_projection(fmt="full"), store=self.store)
+        save_emails(full, conn=self.conn)
+        metadata, _ = fetch_inbox_messages(gmail, max_results=5)
+        self.assertIsNone(metadata[0].body_blob)
+        save_emails(metadata, conn=self.conn)
+
+        stored = {e.id: e.body_blob for e in fetch_all_emails(self.conn)}
+        self.assertEqual(stored, {e.id: e.body_blob for e in full})
+        self.assertNotIn(None, stored.values())
+
+    def test_raw_format_reads_headers_from_blob(self):
+        gmail = FakeGmail(size=3, attachment_ratio=1.0)
+        emails, _ = fetch_inbox_messages(
+            gmail, max_results=3, projection=build_projection(fmt="raw"), store=self.store
+        )
+        metadata, _ = fetch_inbox_messages(gmail, max_results=3)
+        self.assertEqual([(e.sender, e.subject, e.received_ts) for e in emails],
+                         [(e.sender, e.subject, e.received_ts) for e in metadata])
+        raw = self.store.read(emails[0].body_blob)
+        self.assertTrue(raw.startswith(b"From: "))
+        self.assertEqual(emails[0].attachments, ())
+
+    def test_raw_batches_are_capped(self):
+        gmail = FakeGmail(size=12)
+        ids = [FakeGmail.message_id(seq) for seq in range(12)]
+        emails = get_messages(gmail, ids, batch_limit=10, projection=build_projection(fmt="raw"), store=self.store)
+        self.assertEqual(len(emails), 12)
+        self.assertEqual(gmail.calls["batch"], 3)  # RAW_BATCH_LIMIT of 5, not batch_limit
+
+        get_messages(gmail, ids, batch_limit=10, projection=build_projection(fmt="full"), store=self.store)
+        self.assertEqual(gmail.calls["batch"], 5)
+
+    def test_archived_content_is_dropped_from_response(self):
+        response = {"id": "1", "raw": "RnJvbTogYUBleGFtcGxlLmNvbQ0KDQpib2R5"}
+        headers, digest, _ = archive_message(response, self.store)
+        self.assertNotIn("raw", response)
+        self.assertEqual(headers, [{"name": "From", "value": "a@example.com"}])
+        self.assertEqual(self.store.read(digest), b"From: a@example.com\r\n\r\nbody")
+
+    def test_raw_headers_parses_header_block_only(self):
+        headers = raw_headers(b"From: a@example.com\r\nSubject: Hi\r\n\r\nSubject: body text")
+        self.assertEqual(headers, [{"name": "From", "value": "a@example.com"}, {"name": "Subject", "value": "Hi"}])
+
+    def test_metadata_records_have_no_blob(self):
+        emails, _ = fetch_inbox_messages(FakeGmail(size=2), max_results=2)
+        self.assertEqual([(e.body_blob, e.attachments) for e in emails], [(None, ()), (None, ())])
+
+
+if __name__ == "__main__":
+    unittest.main()
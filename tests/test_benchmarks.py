@@ -0,0 +1,65 @@
+import contextlib
+import io
+import os
+import json
+import tempfile
+import unittest
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.bench import BENCHMARKS, run_suite, compare_results, cli
+
+
+def _result(name, seconds, size=1000, rules=None):
+    return {"name": name, "size": size, "rules": rules, "seconds": seconds}
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_suite_runs_every_benchmark(self):
+        data = run_suite([50], [2], repeat=1, progress=False)
+        names = {r["name"] for r in data["results"]}
+        self.assertEqual(names, set(BENCHMARKS))
+        for result in data["results"]:
+            self.assertGreater(result["ops"], 0)
+            self.assertGreaterEqual(result["seconds"], 0)
+
+    def test_compare_flags_regressions(self):
+        baseline = {"results": [_result("save_emails", 1.0), _result("process_rules", 2.0, rules=10)]}
+        current = {"results": [_result("save_emails", 1.05), _result("process_rules", 3.0, rules=10),
+                               _result("main", 1.0)]}
+        rows = compare_results(baseline, current, threshold=0.10)
+        self.assertEqual([(r["name"], r["regression"]) for r in rows],
+                         [("save_emails", False), ("process_rules", True)])
+
+    def test_compare_uses_medians_and_ignores_short_benchmarks(self):
+        baseline = {"results": [dict(_result("main", 0.5), median_seconds=1.0),
+                                _result("parse_headers", 0.001)]}
+        current = {"results": [dict(_result("main", 0.4), median_seconds=1.2),
+                               _result("parse_headers", 0.003)]}
+        rows = compare_results(baseline, current)  # default threshold 25%, floor 100ms
+        self.assertEqual([(r["name"], r["change"], r["too_short"], r["regression"]) for r in rows],
+                         [("main", 0.2, False, False), ("parse_headers", 2.0, True, False)])
+
+    def test_compare_command_exit_code(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base_path = os.path.join(tmp, "baseline.json")
+            cur_path = os.path.join(tmp, "current.json")
+            with open(base_path, "w") as f:
+                json.dump({"results": [_result("parse_headers", 1.0)]}, f)
+            with open(cur_path, "w") as f:
+                json.dump({"results": [_result("parse_headers", 0.9)]}, f)
+            self.assertEqual(cli(["compare", "--baseline", base_path, "--current", cur_path]), 0)
+            with open(cur_path, "w") as f:
+                json.dump({"results": [_result("parse_headers", 2.0)]}, f)
+            self.assertEqual(cli(["compare", "--baseline", base_path, "--current", cur_path]), 1)
+            missing = os.path.join(tmp, "missing.json")
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(cli(["compare", "--baseline", missing, "--current", cur_path]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
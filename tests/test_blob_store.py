@@ -0,0 +1,53 @@
+import base64
+import os
+import tempfile
+import unittest
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.blob_store import BlobStore, b64_chunks
+
+
+class TestBlobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = BlobStore(self.tmp.name, codec="zlib")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _files(self):
+        return [name for _, _, names in os.walk(self.tmp.name) for name in names]
+
+    def test_round_trip_compressed(self):
+        data = b"hello archive\n" * 10000
+        digest, size = self.store.put_bytes(data)
+        self.assertEqual(size, len(data))
+        self.assertEqual(self.store.read(digest), data)
+        self.assertLess(os.path.getsize(self.store.path(digest)), len(data) // 10)
+        self.assertEqual(self.store.read_head(digest, 5), b"hello")
+
+    def test_identical_content_stored_once(self):
+        first, _ = self.store.put_bytes(b"same attachment")
+        second, _ = self.store.put_stream(iter([b"same ", b"attachment"]))
+        self.assertEqual(first, second)
+        self.assertEqual(len(self._files()), 1)  # no temp files left behind
+
+    def test_put_base64_decodes_in_slices(self):
+        data = os.urandom(10000)
+        encoded = base64.urlsafe_b64encode(data).decode().rstrip("=")
+        self.assertEqual(b"".join(b64_chunks(encoded, chunk_size=400)), data)
+        digest, size = self.store.put_base64(encoded)
+        self.assertEqual((self.store.read(digest), size), (data, len(data)))
+
+    def test_unknown_codec_rejected(self):
+        with self.assertRaises(ValueError):
+            BlobStore(self.tmp.name, codec="lz4")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+import os
+import json
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.email_repository import init_db, fetch_all_emails, save_emails
+from gmail_client.email_fetch import get_messages
+from gmail_client.daemon import SyncState, run_cycle, run_daemon, next_delay
+from gmail_client.rule_processor.rule_engine import RuleCache
+
+
+# --- Mock Classes ---
+class MockRequest:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        return self.result
+
+
+class MockMessages:
+    def __init__(self, mailbox):
+        self.mailbox = mailbox  # newest first
+        self.gets = []
+        self.modified = []
+
+    def list(self, userId, labelIds, maxResults, pageToken=None, **kwargs):
+        start = int(pageToken or 0)
+        page = self.mailbox[start:start + maxResults]
+        result = {"messages": [{"id": m} for m in page]}
+        if start + maxResults < len(self.mailbox):
+            result["nextPageToken"] = str(start + maxResults)
+        return MockRequest(result)
+
+    def get(self, userId, id, format, metadataHeaders=(), **kwargs):
+        self.gets.append(id)
+        headers = [
+            {"name": "From", "value": "news@example.com"},
+            {"name": "Subject", "value": "Subject " + id},
+            {"name": "Date", "value": "Mon, 08 Sep 2025 12:00:00 +0000"},
+        ]
+        if "To" in metadataHeaders:
+            headers.append({"name": "To", "value": "me@example.com"})
+        return MockRequest({
+            "id": id,
+            "snippet": "snippet " + id,
+            "labelIds": ["INBOX", "UNREAD"],
+            "payload": {"headers": headers},
+        })
+
+    def modify(self, userId, id, body):
+        self.modified.append(id)
+        return MockRequest({})
+
+
+class MockUsers:
+    def __init__(self, messages):
+        self._messages = messages
+
+    def messages(self):
+        return self._messages
+
+
+class MockBatch:
+    def __init__(self):
+        self.requests = []
+
+    def add(self, request, callback=None):
+        self.requests.append((request, callback))
+
+    def execute(self):
+        for request, callback in self.requests:
+            response = request.execute()
+            callback(request_id=response["id"], response=response, exception=None)
+
+
+class MockService:
+    def __init__(self, mailbox):
+        self.msgs = MockMessages(mailbox)
+
+    def users(self):
+        return MockUsers(self.msgs)
+
+    def new_batch_http_request(self):
+        return MockBatch()
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rules_path = os.path.join(self.tmp.name, "rules.json")
+        self._write_rules("Subject")
+        self.conn = sqlite3.connect(os.path.join(self.tmp.name, "emails.db"))
+        init_db(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def _write_rules(self, value, field="Subject", operator="contains"):
+        with open(self.rules_path, "w") as f:
+            json.dump([{
+                "description": "news",
+                "predicate": "all",
+                "conditions": [{"field": field, "operator": operator, "value": value}],
+                "actions": [{"type": "mark_as_read"}],
+            }], f)
+
+    def test_cycles_fetch_only_new_mail(self):
+        service = MockService(["m3", "m2", "m1"])
+        state = SyncState(self.conn, rules_path=self.rules_path)
+
+        self.assertEqual(run_cycle(service, state, batch_size=2), 3)
+        self.assertEqual(len(fetch_all_emails(self.conn)), 3)
+
+        # Idle mailbox: one list call, no gets, rules not re-run
+        service.msgs.gets.clear()
+        service.msgs.modified.clear()
+        self.assertEqual(run_cycle(service, state, batch_size=2), 0)
+        self.assertEqual(service.msgs.gets, [])
+        self.assertEqual(service.msgs.modified, [])
+
+        # New mail arrives on top: only it is fetched and has rules applied
+        service.msgs.mailbox.insert(0, "m4")
+        self.assertEqual(run_cycle(service, state, batch_size=2), 1)
+        self.assertEqual(service.msgs.gets, ["m4"])
+        self.assertEqual(service.msgs.modified, ["m4"])
+
+    def test_known_ids_loaded_from_db(self):
+        service = MockService(["m2", "m1"])
+        run_cycle(service, SyncState(self.conn, rules_path=self.rules_path))
+        self.assertEqual(SyncState(self.conn).known_ids, {"m1", "m2"})
+
+    def test_rules_change_reapplies_to_stored_mail(self):
+        service = MockService(["m2", "m1"])
+        state = SyncState(self.conn, rules_path=self.rules_path)
+        run_cycle(service, state)
+
+        service.msgs.modified.clear()
+        self._write_rules("m1")
+        os.utime(self.rules_path, ns=(1, 1))
+        run_cycle(service, state)
+        self.assertEqual(service.msgs.modified, ["m1"])
+
+    def test_rules_reading_to_backfill_stored_mail(self):
+        service = MockService(["m2", "m1"])
+        state = SyncState(self.conn, rules_path=self.rules_path)
+        run_cycle(service, state)
+        self.assertEqual([e.recipient for e in fetch_all_emails(self.conn)], [None, None])
+
+        # Unknown recipients must not satisfy a negative To condition...
+        service.msgs.modified.clear()
+        service.msgs.gets.clear()
+        self._write_rules("other@example.com", field="To", operator="not_equals")
+        os.utime(self.rules_path, ns=(1, 1))
+        run_cycle(service, state)
+
+        # ...so the stored mail is refetched with To before the rules run
+        self.assertEqual(sorted(service.msgs.gets), ["m1", "m2"])
+        self.assertEqual([e.recipient for e in fetch_all_emails(self.conn)], ["me@example.com"] * 2)
+        self.assertEqual(sorted(service.msgs.modified), ["m1", "m2"])
+
+        # Back to rules without To: new mail has no recipient, a re-save keeps the stored one
+        self._write_rules("Subject")
+        os.utime(self.rules_path, ns=(2, 2))
+        service.msgs.mailbox.insert(0, "m3")
+        run_cycle(service, state)
+        save_emails(get_messages(service, ["m1"], projection=state.projection), conn=self.conn)
+        recipients = {e.id: e.recipient for e in fetch_all_emails(self.conn)}
+        self.assertEqual(recipients, {"m1": "me@example.com", "m2": "me@example.com", "m3": None})
+
+    def test_rule_cache_reloads_on_mtime_change(self):
+        cache = RuleCache(self.rules_path)
+        rules, reloaded = cache.get()
+        self.assertTrue(reloaded)
+        self.assertEqual(cache.get(), (rules, False))
+
+        self._write_rules("Other")
+        os.utime(self.rules_path, ns=(1, 1))
+        rules, reloaded = cache.get()
+        self.assertTrue(reloaded)
+        self.assertEqual(rules[0]["conditions"][0]["value"], "Other")
+
+    def test_run_daemon_stops_when_event_set(self):
+        service = MockService(["m1"])
+        state = SyncState(self.conn, rules_path=self.rules_path)
+        stop_event = threading.Event()
+        stop_event.set()
+        self.assertEqual(run_daemon(service, state, stop_event=stop_event), 0)
+        self.assertEqual(run_daemon(service, state, interval=0, max_cycles=2), 2)
+
+    def test_next_delay_within_jitter(self):
+        for _ in range(100):
+            delay = next_delay(100, 0.2)
+            self.assertGreaterEqual(delay, 80)
+            self.assertLessEqual(delay, 120)
+
+
+if __name__ == "__main__":
+    unittest.main()
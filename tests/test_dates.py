@@ -0,0 +1,70 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from email.utils import parsedate_to_datetime
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.dates import parse_email_date, to_epoch, age_days, epoch_to_iso
+from gmail_client.email_fetch import normalize_received
+from gmail_client.email_repository import init_db, fetch_all_emails
+
+SAMPLES = [
+    "Mon, 01 Jan 2024 10:00:00 +0000",
+    "Mon, 1 Jan 2024 10:00:00 +0530",
+    "1 Jan 2024 23:59:59 -0800",
+    "Tue, 29 Feb 2024 00:00 +0100",
+    "Wed, 31 Dec 2025 18:30:00 GMT",
+    "Wed, 31 Dec 2025 18:30:00 +0000 (UTC)",
+    "Thu, 02 Jan 2025 08:00:00 -0000",
+    "Fri, 03 Jan 2025 08:00:00",
+    "Fri, 03 Jan 2025 08:00:00 EST",
+    "Sat, 4 Jan 2025 8:05:09 +1245",
+]
+
+
+class TestDates(unittest.TestCase):
+    def test_matches_email_utils(self):
+        for sample in SAMPLES:
+            expected = parsedate_to_datetime(sample)
+            self.assertEqual(parse_email_date(sample), (expected.isoformat(), to_epoch(expected)), sample)
+
+    def test_invalid_dates(self):
+        self.assertIsNone(parse_email_date("not a date"))
+        self.assertIsNone(parse_email_date("Mon, 31 Feb 2024 10:00:00 +0000"))
+
+    def test_repeated_headers_hit_cache(self):
+        parse_email_date.cache_clear()
+        for _ in range(3):
+            parse_email_date(SAMPLES[0])
+        self.assertEqual(parse_email_date.cache_info().hits, 2)
+
+    def test_internal_date_fallback_is_utc(self):
+        iso, epoch = normalize_received(None, {"internalDate": "1700000000123"})
+        self.assertEqual(epoch, 1700000000)
+        self.assertEqual(iso, "2023-11-14T22:13:20+00:00")
+        self.assertEqual(epoch_to_iso(epoch), iso)
+
+    def test_age_days_floors(self):
+        self.assertEqual(age_days(0, 86399), 0)
+        self.assertEqual(age_days(0, 86400 * 3), 3)
+        self.assertEqual(age_days(10, 0), -1)
+
+    def test_init_db_backfills_epoch_column(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = sqlite3.connect(os.path.join(tmp, "old.db"))
+            conn.execute("""CREATE TABLE emails (id TEXT PRIMARY KEY, sender TEXT, subject TEXT, snippet TEXT,
+                            received_at DATETIME, is_read INTEGER, labels TEXT)""")
+            conn.execute("INSERT INTO emails VALUES ('m1', 'a', 's', 'x', '2024-01-01T05:30:00+05:30', 0, 'INBOX')")
+            conn.commit()
+            init_db(conn)
+            self.assertEqual(fetch_all_emails(conn)[0].received_ts, 1704067200)
+            conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
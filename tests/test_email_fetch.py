@@ -1,5 +1,7 @@
 import os
+import threading
 import unittest
+from unittest import mock
 from datetime import datetime, timezone
 
 # Ensure project root is on sys.path
@@ -12,7 +14,35 @@ from gmail_client.email_fetch import (
     parse_headers,
     extract_received_at,
     process_message_response,
+    fetch_all_emails_from_gmail,
+    fetch_all_pipelined,
 )
+from gmail_client.emulator import FakeGmail
+
+
+class OverlapGmail(FakeGmail):
+    """Emulator whose batches wait (up to 2s) for the second page's listing to start."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.next_page_listed = threading.Event()
+        self.overlapped = []
+
+    def _list(self, label_ids, max_results, page_token):
+        if page_token:
+            self.next_page_listed.set()
+        return super()._list(label_ids, max_results, page_token)
+
+    def new_batch_http_request(self, callback=None):
+        batch = super().new_batch_http_request(callback)
+        execute = batch.execute
+
+        def execute_after_listing(http=None):
+            self.overlapped.append(self.next_page_listed.wait(timeout=2))
+            return execute(http)
+
+        batch.execute = execute_after_listing
+        return batch
 
 
 class TestEmailFetch(unittest.TestCase):
@@ -60,5 +90,49 @@ class TestEmailFetch(unittest.TestCase):
         self.assertEqual(emails[0]["is_read"], 0)  # unread
 
 
+class TestPipelinedFetch(unittest.TestCase):
+    def test_same_records_as_serial_fetch(self):
+        serial = fetch_all_emails_from_gmail(FakeGmail(size=230), batch_size=50, batch_limit=10, pipeline=False)
+        gmail = FakeGmail(size=230)
+        pipelined = fetch_all_pipelined(gmail, batch_size=50, batch_limit=10)
+        self.assertEqual([e.id for e in pipelined], [e.id for e in serial])
+        self.assertEqual(pipelined, serial)
+        self.assertEqual(gmail.calls["messages.list"], 5)
+        self.assertEqual(gmail.calls["batch"], 23)
+
+    def test_next_page_is_listed_while_batches_run(self):
+        gmail = OverlapGmail(size=100)
+        emails = fetch_all_pipelined(gmail, batch_size=50, batch_limit=10)
+        self.assertEqual(len(emails), 100)
+        # Every batch of the first page found the second page's listing already under way
+        self.assertEqual(gmail.overlapped, [True] * 10)
+
+    def test_unparsed_batches_are_bounded(self):
+        import gmail_client.email_fetch as email_fetch
+        lock = threading.Lock()
+        pending = {"now": 0, "max": 0}
+        execute_gets, parse_responses = email_fetch._execute_gets, email_fetch._parse_responses
+
+        def counted_gets(*args):
+            responses = execute_gets(*args)
+            with lock:
+                pending["now"] += 1
+                pending["max"] = max(pending["max"], pending["now"])
+            return responses
+
+        def slow_parse(*args):
+            threading.Event().wait(0.005)  # a parser slower than the network
+            emails = parse_responses(*args)
+            with lock:
+                pending["now"] -= 1
+            return emails
+
+        with mock.patch.object(email_fetch, "_execute_gets", counted_gets), \
+                mock.patch.object(email_fetch, "_parse_responses", slow_parse):
+            emails = fetch_all_pipelined(FakeGmail(size=200), batch_size=100, batch_limit=5)
+        self.assertEqual(len(emails), 200)
+        self.assertLessEqual(pending["max"], 2)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -73,5 +73,14 @@ class TestEmailRepository(unittest.TestCase):
         self.assertEqual(fetched[0]["from"], "a@example.com")
         self.assertIn("INBOX", fetched[0]["labels"])
 
+    def test_records_round_trip(self):
+        from gmail_client.models import Email
+        email = Email(id="m3", sender="c@example.com", subject="Read", received_at="2025-09-08T12:00:00+00:00",
+                      received_ts=1757332800, is_read=1, labels=["INBOX"])
+        self.repo.save_emails([email])
+        fetched = self.repo.fetch_all_emails()[0]
+        self.assertIsInstance(fetched, Email)
+        self.assertEqual(fetched, email)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from googleapiclient.errors import BatchError, HttpError
+from gmail_client.emulator import FakeGmail, MAX_BATCH_SIZE
+from gmail_client.email_fetch import fetch_all_emails_from_gmail, fetch_inbox_messages
+from gmail_client.email_repository import init_db
+from gmail_client.daemon import SyncState, run_cycle
+
+
+class TestEmulator(unittest.TestCase):
+    def test_list_paginates_newest_first(self):
+        gmail = FakeGmail(size=25)
+        messages = gmail.users().messages()
+        seen = []
+        token = None
+        while True:
+            page = messages.list(userId="me", labelIds=["INBOX"], maxResults=10, pageToken=token).execute()
+            seen += [m["id"] for m in page.get("messages", [])]
+            token = page.get("nextPageToken")
+            if not token:
+                break
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+        self.assertEqual(seen[0], FakeGmail.message_id(24))
+        self.assertEqual(gmail.calls["messages.list"], 3)
+
+    def test_get_metadata_filters_headers(self):
+        gmail = FakeGmail(size=3)
+        msg = gmail.users().messages().get(
+            userId="me", id=FakeGmail.message_id(1), format="metadata", metadataHeaders=["From", "Date"]
+        ).execute()
+        names = [h["name"] for h in msg["payload"]["headers"]]
+        self.assertEqual(names, ["From", "Date"])
+        self.assertIn("INBOX", msg["labelIds"])
+
+    def test_get_unknown_message_is_404(self):
+        with self.assertRaises(HttpError) as ctx:
+            FakeGmail(size=3).users().messages().get(userId="me", id="nope").execute()
+        self.assertEqual(ctx.exception.resp.status, 404)
+
+    def test_modify_and_batch_modify_update_labels_and_history(self):
+        gmail = FakeGmail(size=5)
+        messages = gmail.users().messages()
+        first, second = FakeGmail.message_id(0), FakeGmail.message_id(1)
+        start = gmail.history_id
+
+        messages.modify(userId="me", id=first, body={"removeLabelIds": ["INBOX"]}).execute()
+        messages.batchModify(userId="me", body={"ids": [second], "addLabelIds": ["STARRED"]}).execute()
+
+        self.assertNotIn("INBOX", gmail.labels_of(first))
+        self.assertIn("STARRED", gmail.labels_of(second))
+        listed = messages.list(userId="me", labelIds=["INBOX"], maxResults=10).execute()["messages"]
+        self.assertNotIn(first, [m["id"] for m in listed])
+
+        history = gmail.users().history().list(userId="me", startHistoryId=str(start)).execute()
+        self.assertEqual(len(history["history"]), 2)
+        self.assertEqual(history["history"][0]["labelsRemoved"][0]["message"]["id"], first)
+
+    def test_modify_with_unknown_label_fails(self):
+        gmail = FakeGmail(size=1)
+        with self.assertRaises(HttpError) as ctx:
+            gmail.users().messages().modify(
+                userId="me", id=FakeGmail.message_id(0), body={"addLabelIds": ["Archive"]}
+            ).execute()
+        self.assertEqual(ctx.exception.resp.status, 400)
+
+    def test_labels_create_and_list(self):
+        gmail = FakeGmail(size=1)
+        created = gmail.users().labels().create(userId="me", body={"name": "Archive"}).execute()
+        labels = gmail.users().labels().list(userId="me").execute()["labels"]
+        self.assertIn({"id": created["id"], "name": "Archive", "type": "user"}, labels)
+
+    def test_batch_runs_on_execute_and_enforces_limit(self):
+        gmail = FakeGmail(size=200)
+        responses = []
+        batch = gmail.new_batch_http_request()
+        for seq in range(MAX_BATCH_SIZE):
+            batch.add(gmail.users().messages().get(userId="me", id=FakeGmail.message_id(seq)),
+                      callback=lambda rid, resp, exc: responses.append(resp))
+        self.assertEqual(responses, [])
+        with self.assertRaises(BatchError):
+            batch.add(gmail.users().messages().get(userId="me", id=FakeGmail.message_id(0)))
+        batch.execute()
+        self.assertEqual(len(responses), MAX_BATCH_SIZE)
+        self.assertEqual(gmail.calls["batch"], 1)
+
+    def test_rate_limit_injection(self):
+        gmail = FakeGmail(size=10, rate_limit_probability=1.0)
+        with self.assertRaises(HttpError) as ctx:
+            gmail.users().messages().list(userId="me").execute()
+        self.assertEqual(ctx.exception.resp.status, 429)
+
+        gmail = FakeGmail(size=10, sub_request_rate_limit_probability=1.0)
+        errors = []
+        batch = gmail.new_batch_http_request()
+        batch.add(gmail.users().messages().get(userId="me", id=FakeGmail.message_id(0)),
+                  callback=lambda rid, resp, exc: errors.append(exc.resp.status))
+        batch.execute()
+        self.assertEqual(errors, [429])
+
+    def test_latency_is_per_round_trip(self):
+        gmail = FakeGmail(size=10, latency=0.05)
+        with mock.patch("gmail_client.emulator.time.sleep") as sleep:
+            batch = gmail.new_batch_http_request()
+            for seq in range(5):
+                batch.add(gmail.users().messages().get(userId="me", id=FakeGmail.message_id(seq)))
+            batch.execute()
+        sleep.assert_called_once_with(0.05)
+
+    def test_large_mailbox_is_lazy(self):
+        gmail = FakeGmail(size=1_000_000)
+        started = time.perf_counter()
+        page = gmail.users().messages().list(userId="me", maxResults=500).execute()
+        oldest = gmail.users().messages().get(userId="me", id=FakeGmail.message_id(0), format="raw").execute()
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(len(page["messages"]), 500)
+        self.assertIn("raw", oldest)
+
+    def test_fetch_engine_against_emulator(self):
+        gmail = FakeGmail(size=120, sub_request_rate_limit_probability=0.0)
+        emails = fetch_all_emails_from_gmail(gmail, batch_size=50, batch_limit=10)
+        self.assertEqual(len(emails), 120)
+        self.assertEqual(gmail.calls["messages.list"], 3)
+        self.assertEqual(gmail.calls["batch"], 12)
+
+        emails, _ = fetch_inbox_messages(gmail, max_results=1)
+        self.assertTrue(emails[0]["received_at"].startswith("20"))
+
+    def test_daemon_picks_up_delivered_mail(self):
+        gmail = FakeGmail(size=30)
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = sqlite3.connect(os.path.join(tmp, "emails.db"))
+            init_db(conn)
+            state = SyncState(conn, rules_path=os.path.join(tmp, "missing.json"))
+            self.assertEqual(run_cycle(gmail, state), 30)
+            new_ids = gmail.deliver(3)
+            self.assertEqual(run_cycle(gmail, state), 3)
+            self.assertTrue(set(new_ids) <= state.known_ids)
+            conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.email_repository import init_db, save_emails
+from gmail_client.export import export_emails, iter_chunks, build_query
+from gmail_client.models import Email
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+DAY = 86400
+START = 1756684800  # 2025-09-01T00:00:00Z
+
+
+def make_email(i, labels=("INBOX",)):
+    return Email(id=f"m{i}", sender=f"s{i}@example.com", subject=f"Subject {i}",
+                 received_ts=START + i * DAY, labels=labels)
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(os.path.join(self.tmp.name, "emails.db"))
+        init_db(self.conn)
+        save_emails([make_email(i, ("INBOX", "Label_1") if i % 2 else ("INBOX",)) for i in range(10)], conn=self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def _jsonl(self, path):
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_jsonl_with_date_and_label_filters(self):
+        path = self._path("out.jsonl")
+        summary = export_emails(self.conn, path, since=START + 2 * DAY, until=START + 8 * DAY, labels=["Label_1"])
+        records = self._jsonl(path)
+        self.assertEqual(summary["rows"], 3)
+        self.assertEqual([r["id"] for r in records], ["m3", "m5", "m7"])
+        self.assertEqual(records[0]["labels"], ["INBOX", "Label_1"])
+        # "_" is not a wildcard: Label21 must not match Label_1
+        save_emails([make_email(20, ("Label21",))], conn=self.conn)
+        self.assertEqual(export_emails(self.conn, path, labels=["Label_1"])["rows"], 5)
+
+    def test_csv_has_header_and_all_rows(self):
+        path = self._path("out.csv")
+        export_emails(self.conn, path, fmt="csv", chunk_size=3)
+        with open(path, newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0][:3], ["id", "sender", "recipient"])
+        self.assertEqual(len(rows), 11)
+
+    def test_incremental_exports_only_new_saves(self):
+        path = self._path("inc.jsonl")
+        self.assertEqual(export_emails(self.conn, path, incremental="nightly")["rows"], 10)
+        self.assertEqual(export_emails(self.conn, path, incremental="nightly")["rows"], 0)
+
+        save_emails([make_email(3, ("INBOX",)), make_email(11)], conn=self.conn)
+        summary = export_emails(self.conn, path, incremental="nightly")
+        self.assertEqual(sorted(r["id"] for r in self._jsonl(path)), ["m11", "m3"])
+        self.assertGreater(summary["high_water"], summary["previous_high_water"])
+        # Other export names keep their own mark
+        self.assertEqual(export_emails(self.conn, path, incremental="weekly")["rows"], 11)
+
+    def test_incremental_filter_uses_index(self):
+        sql, params = build_query(after=0)
+        plan = " ".join(row[-1] for row in self.conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        self.assertIn("USING INDEX idx_emails_updated_at", plan)
+
+    def test_chunked_cursor(self):
+        sql, params = build_query()
+        self.assertEqual([len(c) for c in iter_chunks(self.conn, sql, params, chunk_size=4)], [4, 4, 2])
+
+    def test_unknown_format_rejected(self):
+        with self.assertRaises(ValueError):
+            export_emails(self.conn, self._path("out.xml"), fmt="xml")
+
+    @unittest.skipUnless(pq, "pyarrow not installed")
+    def test_parquet_row_groups(self):
+        path = self._path("out.parquet")
+        export_emails(self.conn, path, fmt="parquet", chunk_size=4)
+        parquet = pq.ParquetFile(path)
+        self.assertEqual(parquet.metadata.num_row_groups, 3)
+        table = parquet.read()
+        self.assertEqual(table.num_rows, 10)
+        self.assertEqual(table.column("labels")[1].as_py(), ["INBOX", "Label_1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
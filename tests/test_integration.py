@@ -32,9 +32,9 @@ class MockGetRequest:
         }
 
 class MockMessages:
-    def list(self, userId, labelIds, maxResults, pageToken=None):
+    def list(self, userId, labelIds, maxResults, pageToken=None, **kwargs):
         return MockListRequest()
-    def get(self, userId, id, format):
+    def get(self, userId, id, format, **kwargs):
         return MockGetRequest()
 
 class MockUsers:
@@ -73,7 +73,9 @@ class TestEndToEnd(unittest.TestCase):
             os.remove(self.db_path)
         os.environ["GMAIL_DB_FILE"] = self.db_path
 
-        # reload repository to pick up env var
+        # reload config and repository to pick up env var
+        from config import db_config
+        reload(db_config)
         from gmail_client import email_repository as repo
         reload(repo)
         self.repo = repo
@@ -0,0 +1,91 @@
+import os
+import unittest
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.emulator import FakeGmail
+from gmail_client.labels import LabelRegistry, rule_labels
+from gmail_client.models import Email
+from gmail_client.rule_processor.rule_engine import process_rules
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def move_rule(destination):
+    return {
+        "description": f"to {destination}",
+        "predicate": "all",
+        "conditions": [{"field": "Subject", "operator": "contains", "value": "Weekly"}],
+        "actions": [{"type": "mark_as_read"}, {"type": "move", "destination": destination}],
+    }
+
+
+class TestLabelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.gmail = FakeGmail(size=10)
+        self.clock = FakeClock()
+        self.registry = LabelRegistry(self.gmail, ttl=60, clock=self.clock)
+
+    def test_rule_labels(self):
+        rules = [move_rule("Archive"), move_rule("IMPORTANT"), move_rule("Archive")]
+        self.assertEqual(rule_labels(rules), ["Archive", "IMPORTANT"])
+
+    def test_system_labels_need_no_listing(self):
+        self.assertEqual(self.registry.ensure(["IMPORTANT", "INBOX"]), {"IMPORTANT": "IMPORTANT", "INBOX": "INBOX"})
+        self.assertNotIn("labels.list", self.gmail.calls)
+
+    def test_creates_missing_labels_in_one_batch(self):
+        ids = self.registry.ensure(["Archive", "Receipts", "IMPORTANT"])
+        self.assertEqual(ids, {"IMPORTANT": "IMPORTANT", "Archive": "Label_1", "Receipts": "Label_2"})
+        self.assertEqual(self.gmail.calls, {"labels.list": 1, "batch": 1, "labels.create": 2})
+
+        # Cached: no further calls within the TTL, and IDs resolve to themselves
+        self.assertEqual(self.registry.ensure(["Archive", "Label_2"]), {"Archive": "Label_1", "Label_2": "Label_2"})
+        self.assertEqual(self.gmail.calls["labels.list"], 1)
+
+    def test_reloads_after_ttl(self):
+        self.registry.ensure(["Archive"])
+        self.gmail.users().labels().create(userId="me", body={"name": "Elsewhere"}).execute()
+        self.clock.now = 30
+        self.assertEqual(self.registry.ensure(["Archive"]), {"Archive": "Label_1"})
+        self.assertEqual(self.gmail.calls["labels.list"], 1)
+
+        self.clock.now = 61
+        self.assertEqual(self.registry.ensure(["Elsewhere"]), {"Elsewhere": "Label_2"})
+        self.assertEqual(self.gmail.calls["labels.list"], 2)
+        self.assertEqual(self.gmail.calls["labels.create"], 2)  # Archive, and the one made above
+
+    def test_label_created_elsewhere_since_listing(self):
+        self.registry.ensure(["Archive"])
+        self.gmail.users().labels().create(userId="me", body={"name": "Receipts"}).execute()
+        self.assertEqual(self.registry.ensure(["Receipts"]), {"Receipts": "Label_2"})
+        self.assertEqual(self.gmail.calls["labels.list"], 2)
+
+
+class TestProcessRulesLabels(unittest.TestCase):
+    def test_move_to_user_label_resolves_once(self):
+        gmail = FakeGmail(size=10)
+        emails = [Email(id=gmail.message_id(i), subject="Weekly digest", received_ts=0) for i in range(3)]
+        registry = LabelRegistry(gmail)
+        process_rules(gmail, emails=emails, rules=[move_rule("Archive")], labels=registry)
+        process_rules(gmail, emails=emails, rules=[move_rule("Archive")], labels=registry)
+
+        self.assertEqual(gmail.calls["labels.list"], 1)
+        self.assertEqual(gmail.calls["labels.create"], 1)
+        self.assertEqual(gmail.calls["messages.modify"], 12)
+        self.assertIn("Label_1", gmail.labels_of(emails[0].id))
+        self.assertNotIn("INBOX", gmail.labels_of(emails[0].id))
+
+
+if __name__ == "__main__":
+    unittest.main()
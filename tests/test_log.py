@@ -0,0 +1,103 @@
+import io
+import json
+import logging
+import os
+import threading
+import unittest
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.log import JsonFormatter, SampleFilter, setup_logging
+
+
+def make_record(level=logging.INFO, event=None, msg="Moved email %s", args=("m1",)):
+    record = logging.LogRecord("gmail_client.test", level, __file__, 1, msg, args, None)
+    if event:
+        record.event = event
+        record.email_id = "m1"
+    return record
+
+
+class TestSampleFilter(unittest.TestCase):
+    def test_keeps_one_in_n_per_event_and_every_error(self):
+        sampler = SampleFilter(sample_every=10)
+        kept = [sampler.filter(make_record(event="action")) for _ in range(25)]
+        self.assertEqual([i for i, k in enumerate(kept) if k], [0, 10, 20])
+        self.assertTrue(sampler.filter(make_record(logging.ERROR, event="action")))
+        self.assertTrue(sampler.filter(make_record()))  # not a per-item event
+        self.assertEqual(sampler.counts, {"action": 26})
+        self.assertEqual(sampler.suppressed, 22)
+
+
+class TestJsonFormatter(unittest.TestCase):
+    def test_record_with_extra_fields(self):
+        entry = json.loads(JsonFormatter().format(make_record(event="action")))
+        self.assertEqual(entry["message"], "Moved email m1")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["event"], "action")
+        self.assertEqual(entry["email_id"], "m1")
+        self.assertNotIn("args", entry)
+
+
+class TestSetupLogging(unittest.TestCase):
+    def setUp(self):
+        self.root = logging.getLogger()
+        self.saved = (list(self.root.handlers), self.root.level)
+
+    def tearDown(self):
+        self.runtime.stop()
+        for handler in list(self.root.handlers):
+            self.root.removeHandler(handler)
+        for handler in self.saved[0]:
+            self.root.addHandler(handler)
+        self.root.setLevel(self.saved[1])
+
+    def test_background_json_with_sampling_and_summary(self):
+        stream = io.StringIO()
+        self.runtime = setup_logging(level="INFO", fmt="json", sample_every=100, stream=stream)
+        logger = logging.getLogger("gmail_client.test")
+        for i in range(250):
+            logger.info("Rule matched: %s", "r", extra={"event": "rule_match", "email_id": f"m{i}"})
+        logger.debug("not written")
+        self.runtime.stop()
+
+        entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([e.get("email_id") for e in entries[:-1]], ["m0", "m100", "m200"])
+        self.assertEqual(entries[-1]["events"], {"rule_match": 250})
+        self.assertEqual(entries[-1]["suppressed"], 247)
+
+        # After stop, records are still written (directly)
+        logger.warning("late")
+        self.assertIn("late", stream.getvalue().splitlines()[-1])
+
+    def test_listener_formats_messages_and_tracebacks(self):
+        stream = io.StringIO()
+        self.runtime = setup_logging(level="INFO", fmt="json", stream=stream)
+        formatted_on = []
+
+        class Arg:
+            def __str__(self):
+                formatted_on.append(threading.current_thread().name)
+                return "arg"
+
+        logger = logging.getLogger("gmail_client.test")
+        logger.info("Deferred %s", Arg())
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception("Failed %s", "m1")
+        self.runtime.stop()
+
+        entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(entries[0]["message"], "Deferred arg")
+        self.assertNotIn(threading.current_thread().name, formatted_on)
+        self.assertEqual(entries[1]["message"], "Failed m1")
+        self.assertIn("ZeroDivisionError", entries[1]["exc"])
+
+
+if __name__ == "__main__":
+    unittest.main()
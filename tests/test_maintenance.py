@@ -0,0 +1,166 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.email_repository import (
+    fetch_all_emails, fetch_email_attachments, init_db, is_partitioned, list_partitions, partition_name, save_emails,
+)
+from gmail_client.maintenance import apply_retention, retention_cutoff, run_maintenance
+from gmail_client.models import Attachment, Email
+
+DAY = 86400
+JAN_2025 = 1735689600  # 2025-01-01T00:00:00Z
+NOW = 1760000000  # 2025-10-09T08:53:20Z
+
+
+def make_email(i, received_ts, **kwargs):
+    return Email(id=f"m{i}", sender=f"s{i}@example.com", subject=f"Subject {i}", received_ts=received_ts,
+                 labels=["INBOX"], **kwargs)
+
+
+def monthly_emails():
+    # Two emails in each month Jan..Oct 2025, plus one undated
+    emails = [make_email(i, JAN_2025 + (i // 2) * 31 * DAY + i) for i in range(20)]
+    return emails + [make_email(99, None)]
+
+
+class TestPartitions(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(os.path.join(self.tmp.name, "emails.db"))
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_partition_name(self):
+        self.assertEqual(partition_name(JAN_2025), "emails_202501")
+        self.assertEqual(partition_name(JAN_2025 - 1), "emails_202412")
+        self.assertEqual(partition_name(None), "emails_undated")
+
+    def test_converts_existing_table_and_routes_new_saves(self):
+        init_db(self.conn, partitioned=False)
+        save_emails(monthly_emails()[:10], conn=self.conn)
+        init_db(self.conn, partitioned=True)
+
+        self.assertTrue(is_partitioned(self.conn))
+        self.assertEqual(list_partitions(self.conn), [f"emails_20250{m}" for m in range(1, 6)] + ["emails_undated"])
+        save_emails(monthly_emails()[10:], conn=self.conn)
+        self.assertIn("emails_202510", list_partitions(self.conn))
+        self.assertEqual(sorted(e.id for e in fetch_all_emails(self.conn)), sorted(e.id for e in monthly_emails()))
+
+        # A repeated save updates the row in its partition
+        save_emails([make_email(3, JAN_2025 + 31 * DAY + 3, is_read=1)], conn=self.conn)
+        rows = self.conn.execute("SELECT is_read FROM emails WHERE id = 'm3'").fetchall()
+        self.assertEqual(rows, [(1,)])
+
+        # Stays partitioned when opened with the default setting
+        init_db(self.conn, partitioned=False)
+        self.assertTrue(is_partitioned(self.conn))
+
+    def test_save_with_new_date_moves_row_between_partitions(self):
+        init_db(self.conn, partitioned=True)
+        save_emails([make_email(1, None, recipient="me@example.com", body_blob="b1")], conn=self.conn)
+
+        # The date is now known (and, later, corrected): one row, in the matching month
+        save_emails([make_email(1, JAN_2025 + DAY, recipient=None)], conn=self.conn)
+        save_emails([make_email(1, JAN_2025 + 40 * DAY, recipient=None, is_read=1)], conn=self.conn)
+
+        rows = self.conn.execute("SELECT id, received_ts, is_read, recipient, body_blob FROM emails").fetchall()
+        self.assertEqual(rows, [("m1", JAN_2025 + 40 * DAY, 1, "me@example.com", "b1")])
+        for name in ("emails_undated", "emails_202501"):
+            self.assertEqual(self.conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0], 0)
+
+        # Duplicates within one save resolve to the last one
+        save_emails([make_email(2, None), make_email(2, JAN_2025)], conn=self.conn)
+        self.assertEqual(self.conn.execute("SELECT received_ts FROM emails WHERE id = 'm2'").fetchall(), [(JAN_2025,)])
+
+    def test_date_filters_use_partition_indexes(self):
+        init_db(self.conn, partitioned=True)
+        save_emails(monthly_emails(), conn=self.conn)
+        plan = " ".join(row[-1] for row in self.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM emails WHERE received_ts >= ?", (JAN_2025,)
+        ))
+        self.assertIn("USING INDEX idx_emails_202501_received_ts", plan)
+
+
+class TestRetention(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(os.path.join(self.tmp.name, "emails.db"))
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def _save(self, partitioned):
+        init_db(self.conn, partitioned=partitioned)
+        emails = monthly_emails()
+        emails[0].attachments = (Attachment(part_id="1", filename="a.pdf", blob="abc"),)
+        save_emails(emails, conn=self.conn)
+
+    def test_cutoff(self):
+        self.assertEqual(retention_cutoff(3, NOW), 1751328000)  # 2025-07-01
+        self.assertEqual(retention_cutoff(12, JAN_2025), 1704067200)  # 2024-01-01
+        with self.assertRaises(ValueError):
+            retention_cutoff(0, NOW)
+
+    def test_drops_and_archives_old_partitions(self):
+        self._save(partitioned=True)
+        archive_dir = os.path.join(self.tmp.name, "archive")
+        summary = apply_retention(self.conn, 3, archive_dir=archive_dir, now=NOW)
+
+        self.assertEqual(summary["dropped_partitions"], [f"emails_20250{m}" for m in range(1, 7)])
+        self.assertEqual(summary["expired_emails"], 12)
+        self.assertEqual(summary["expired_attachments"], 1)
+        kept = sorted(e.id for e in fetch_all_emails(self.conn))
+        self.assertEqual(kept, sorted(f"m{i}" for i in list(range(12, 20)) + [99]))
+        self.assertEqual(fetch_email_attachments("m0", self.conn), [])
+
+        archive = sqlite3.connect(os.path.join(archive_dir, "emails_202501.db"))
+        self.assertEqual(archive.execute("SELECT id FROM emails ORDER BY id").fetchall(), [("m0",), ("m1",)])
+        self.assertEqual(archive.execute("SELECT message_id, blob FROM attachments").fetchall(), [("m0", "abc")])
+        archive.close()
+
+    def test_deletes_old_rows_without_partitions(self):
+        self._save(partitioned=False)
+        summary = apply_retention(self.conn, 3, now=NOW)
+        self.assertEqual(summary["expired_emails"], 12)
+        self.assertEqual(summary["dropped_partitions"], [])
+        self.assertEqual(len(fetch_all_emails(self.conn)), 9)
+
+
+class TestMaintenance(unittest.TestCase):
+    def test_incremental_vacuum_reclaims_dropped_pages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = sqlite3.connect(os.path.join(tmp, "emails.db"))
+            init_db(conn, partitioned=True)
+            save_emails([make_email(i, JAN_2025, snippet="x" * 2000) for i in range(200)], conn=conn)
+            apply_retention(conn, 1, now=NOW)
+            self.assertGreater(conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+
+            summary = run_maintenance(conn)
+            self.assertGreater(summary["reclaimed_bytes"], 0)
+            self.assertEqual(summary["after"]["free_pages"], 0)
+            conn.close()
+
+    def test_full_vacuum_enables_incremental_mode(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = sqlite3.connect(os.path.join(tmp, "emails.db"))
+            conn.execute("CREATE TABLE emails (id TEXT PRIMARY KEY)")  # created by an older version
+            init_db(conn)
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 0)
+            run_maintenance(conn, full_vacuum=True, analyze=True)
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+            conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
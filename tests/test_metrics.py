@@ -0,0 +1,114 @@
+import os
+import json
+import tempfile
+import unittest
+import urllib.request
+from unittest import mock
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import httplib2
+from googleapiclient.errors import HttpError
+from gmail_client.metrics import Metrics, METRICS, export_metrics, serve_metrics
+from gmail_client.email_fetch import safe_execute, process_message_response
+
+
+class RateLimitedBatch:
+    """Fails with 429 `failures` times, then succeeds."""
+    def __init__(self, failures):
+        self.failures = failures
+
+    def execute(self):
+        if self.failures:
+            self.failures -= 1
+            raise HttpError(httplib2.Response({"status": 429}), b"rate limited")
+        return "ok"
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        METRICS.reset()
+
+    def test_counters_and_timers(self):
+        metrics = Metrics()
+        metrics.inc("emails")
+        metrics.inc("emails", 4)
+        with metrics.timer("stage"):
+            pass
+        metrics.observe("stage", 2.0)
+
+        snap = metrics.snapshot()
+        self.assertEqual(snap["counters"], {"emails": 5})
+        self.assertEqual(snap["timers"]["stage"]["count"], 2)
+        self.assertEqual(snap["timers"]["stage"]["max_seconds"], 2.0)
+
+    def test_merge_adds_other_snapshot(self):
+        worker = Metrics()
+        worker.inc("emails", 3)
+        worker.observe("cycle", 2.0)
+        parent = Metrics()
+        parent.inc("emails")
+        parent.observe("cycle", 1.0)
+        parent.merge(worker.snapshot())
+        snap = parent.snapshot()
+        self.assertEqual(snap["counters"]["emails"], 4)
+        self.assertEqual(snap["timers"]["cycle"]["count"], 2)
+        self.assertEqual(snap["timers"]["cycle"]["total_seconds"], 3.0)
+        self.assertEqual(snap["timers"]["cycle"]["max_seconds"], 2.0)
+
+    def test_prometheus_text_format(self):
+        metrics = Metrics()
+        metrics.inc("rate_limited_429", 3)
+        metrics.observe("db_write", 0.5)
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE gmail_fetch_rate_limited_429_total counter", text)
+        self.assertIn("gmail_fetch_rate_limited_429_total 3", text)
+        self.assertIn("gmail_fetch_db_write_seconds_count 1", text)
+        self.assertIn("gmail_fetch_db_write_seconds_sum 0.5", text)
+
+    def test_export_writes_json_and_prometheus_files(self):
+        metrics = Metrics()
+        metrics.inc("messages_fetched", 7)
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, "run.json")
+            prom_path = os.path.join(tmp, "run.prom")
+            export_metrics(json_path, prom_path, registry=metrics)
+            with open(json_path) as f:
+                self.assertEqual(json.load(f)["counters"]["messages_fetched"], 7)
+            with open(prom_path) as f:
+                self.assertIn("gmail_fetch_messages_fetched_total 7", f.read())
+
+    def test_http_endpoint(self):
+        metrics = Metrics()
+        metrics.inc("modify_calls", 2)
+        server = serve_metrics(0, registry=metrics)
+        try:
+            self.assertEqual(server.server_address[0], "127.0.0.1")  # loopback unless asked otherwise
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            body = urllib.request.urlopen(url, timeout=5).read().decode()
+        finally:
+            server.shutdown()
+        self.assertIn("gmail_fetch_modify_calls_total 2", body)
+
+    def test_safe_execute_counts_rate_limits(self):
+        with mock.patch("gmail_client.email_fetch.time.sleep"):
+            self.assertEqual(safe_execute(RateLimitedBatch(failures=2)), "ok")
+        snap = METRICS.snapshot()
+        self.assertEqual(snap["counters"]["rate_limited_429"], 2)
+        self.assertEqual(snap["counters"]["batch_retries"], 2)
+        self.assertEqual(snap["timers"]["batch_execute"]["count"], 3)
+
+    def test_failed_message_counted_as_dropped(self):
+        emails = []
+        process_message_response(emails, "1", None, Exception("boom"))
+        process_message_response(emails, "2", {"no-id": True}, None)
+        self.assertEqual(emails, [])
+        self.assertEqual(METRICS.snapshot()["counters"]["messages_dropped"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
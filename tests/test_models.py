@@ -0,0 +1,57 @@
+import unittest
+from datetime import datetime, timezone, timedelta
+# Ensure project root is on sys.path
+import os, sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.models import Email, intern_labels, labels_from_string
+from gmail_client.dates import to_epoch, iso_to_epoch
+from gmail_client.rule_processor.rule_engine import check_condition
+
+
+class TestModels(unittest.TestCase):
+    def test_label_combinations_are_shared(self):
+        first = intern_labels(["INBOX", "UNREAD"])
+        second = labels_from_string("INBOX,UNREAD")
+        self.assertEqual(first, ("INBOX", "UNREAD"))
+        self.assertIs(first, second)
+        self.assertEqual(intern_labels(None), ())
+
+    def test_record_has_no_instance_dict(self):
+        email = Email(id="1")
+        self.assertFalse(hasattr(email, "__dict__"))
+        with self.assertRaises(AttributeError):
+            email.body = "x"
+
+    def test_mapping_style_access(self):
+        email = Email(id="1", sender="a@example.com", subject="Hi", labels=["INBOX"], is_read=1)
+        self.assertEqual(email["from"], "a@example.com")
+        self.assertEqual(email.get("subject"), "Hi")
+        self.assertEqual(email.get("to", ""), "")
+        self.assertIn("INBOX", email["labels"])
+        with self.assertRaises(KeyError):
+            email["body"]
+
+    def test_from_dict_parses_epoch(self):
+        email = Email.from_dict({"id": "1", "from": "a", "received_at": "2024-01-01T00:00:00+00:00"})
+        self.assertEqual(email.received_ts, 1704067200)
+        self.assertEqual(email.to_dict()["from"], "a")
+        self.assertEqual(email.replace(id="2").id, "2")
+
+    def test_naive_datetimes_are_utc(self):
+        self.assertEqual(to_epoch(datetime(2024, 1, 1)), 1704067200)
+        self.assertEqual(iso_to_epoch("2024-01-01 00:00:00"), 1704067200)
+        self.assertIsNone(iso_to_epoch("not a date"))
+
+    def test_date_condition_uses_epoch(self):
+        old = datetime.now(timezone.utc) - timedelta(days=10)
+        email = Email(id="1", received_at="garbage", received_ts=to_epoch(old))
+        self.assertTrue(check_condition(email, {"field": "DateReceived", "operator": "greater_than_days", "value": 9}))
+        self.assertTrue(check_condition(email, {"field": "DateReceived", "operator": "less_than_days", "value": 11}))
+        self.assertTrue(check_condition(email, {"field": "From", "operator": "equals", "value": ""}))
+
+
+if __name__ == "__main__":
+    unittest.main()
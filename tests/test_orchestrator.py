@@ -0,0 +1,141 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.accounts import Account
+from gmail_client.metrics import METRICS
+from gmail_client.orchestrator import Orchestrator, _states, sync_account
+
+
+def _crash_once(account, **kwargs):
+    """`sync_account` whose worker dies on the "crash" account's first cycle (like an OOM kill)."""
+    marker = account.token_file + ".crashed"
+    if account.name == "crash" and not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return sync_account(account, **kwargs)
+
+
+class TestOrchestrator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rules_path = os.path.join(self.tmp.name, "rules.json")
+        with open(self.rules_path, "w") as f:
+            json.dump([{
+                "description": "digest",
+                "predicate": "all",
+                "conditions": [{"field": "Subject", "operator": "contains", "value": "Weekly digest"}],
+                "actions": [{"type": "mark_as_read"}],
+            }], f)
+
+    def tearDown(self):
+        for state, _ in _states.values():
+            state.conn.close()
+        _states.clear()
+        self.tmp.cleanup()
+
+    def _account(self, name, size):
+        return Account(
+            name=name,
+            db_file=os.path.join(self.tmp.name, f"{name}.db"),
+            token_file=os.path.join(self.tmp.name, f"{name}.json"),
+            rules_file=self.rules_path,
+            emulator={"size": size, "seed": len(name)},
+        )
+
+    def _count(self, account):
+        with sqlite3.connect(account.db_file) as conn:
+            return conn.execute("SELECT COUNT(*) FROM emails").fetchone()[0]
+
+    def test_accounts_sync_into_their_own_shards(self):
+        accounts = [self._account(f"user{i}", 20 + i) for i in range(4)]
+        METRICS.reset()
+        summary = Orchestrator(accounts, workers=2, batch_size=10).run(cycles=2)
+
+        self.assertEqual(summary["cycles"], 8)
+        self.assertEqual(summary["errors"], 0)
+        self.assertEqual(summary["new_emails"], sum(20 + i for i in range(4)))
+        for i, account in enumerate(accounts):
+            self.assertEqual(self._count(account), 20 + i)
+            self.assertEqual(summary["per_account"][account.name]["cycles"], 2)
+        # Worker metrics are merged into the parent registry
+        self.assertEqual(METRICS.snapshot()["counters"]["emails_saved"], summary["new_emails"])
+        self.assertGreater(METRICS.snapshot()["counters"]["quota_units"], 0)
+
+    def test_sync_account_carries_state_and_reports_errors(self):
+        account = self._account("solo", 5)
+        first = sync_account(account, quota_rate=1000, quota_burst=1000)
+        self.assertEqual((first["new_emails"], first["error"]), (5, None))
+        self.assertIsNotNone(first["rules_mtime"])
+
+        # Same rules version: the second cycle does not re-run rules over the store
+        second = sync_account(account, bucket_state=first["bucket_state"], rules_mtime=first["rules_mtime"])
+        self.assertEqual(second["new_emails"], 0)
+        self.assertNotIn("rule_evaluation", second["metrics"]["timers"])
+
+        broken = Account(name="broken", db_file=account.db_file, token_file=os.path.join(self.tmp.name, "none.json"))
+        result = sync_account(broken)
+        self.assertIn("token", result["error"])
+
+    def test_dead_worker_fails_its_cycle_and_pool_is_replaced(self):
+        accounts = [self._account("crash", 5), self._account("ok", 6)]
+        METRICS.reset()
+        with mock.patch("gmail_client.orchestrator.sync_account", _crash_once):
+            summary = Orchestrator(accounts, workers=2).run(cycles=2)
+
+        self.assertEqual(summary["cycles"], 4)
+        crashed = summary["per_account"]["crash"]
+        self.assertEqual(crashed["errors"], 1)
+        self.assertIn("terminated abruptly", crashed["last_error"])
+        # The run went on: both shards are complete after the second cycle
+        self.assertEqual([self._count(a) for a in accounts], [5, 6])
+        self.assertGreaterEqual(METRICS.snapshot()["counters"]["pool_restarts"], 1)
+
+    def test_full_pool_blocks_instead_of_polling(self):
+        import gmail_client.orchestrator as orchestrator
+        timeouts = []
+        real_wait = orchestrator.wait
+
+        def recording_wait(futures, timeout=None, return_when=None):
+            timeouts.append(timeout)
+            return real_wait(futures, timeout=timeout, return_when=return_when)
+
+        accounts = [self._account(f"busy{i}", 3) for i in range(3)]
+        with mock.patch.object(orchestrator, "wait", recording_wait):
+            summary = Orchestrator(accounts, workers=1).run(cycles=1)
+        self.assertEqual(summary["cycles"], 3)
+        # Overdue accounts are queued behind the only worker: every wait blocks
+        self.assertEqual(timeouts, [None] * 3)
+
+    def test_sync_state_is_kept_between_cycles(self):
+        account = self._account("warm", 5)
+        first = sync_account(account)
+        state, _ = _states[(account.name, account.db_file, "metadata")]
+        second = sync_account(account, rules_mtime=first["rules_mtime"])
+        self.assertIs(_states[(account.name, account.db_file, "metadata")][0], state)
+        self.assertNotIn("rule_evaluation", second["metrics"]["timers"])
+
+        # A row committed by another worker's connection is picked up as known
+        with sqlite3.connect(account.db_file) as other:
+            other.execute("INSERT INTO emails (id) VALUES ('from-elsewhere')")
+        sync_account(account, rules_mtime=first["rules_mtime"])
+        self.assertIn("from-elsewhere", state.known_ids)
+
+        # A newer rules version applied elsewhere is loaded without re-running it
+        os.utime(self.rules_path, ns=(1, 1))
+        third = sync_account(account, rules_mtime=1)
+        self.assertEqual(third["rules_mtime"], 1)
+        self.assertNotIn("rule_evaluation", third["metrics"]["timers"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import unittest
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.emulator import FakeGmail
+from gmail_client.email_fetch import fetch_inbox_messages
+from gmail_client.projection import (
+    BASE_HEADERS, DEFAULT_PROJECTION, LIST_FIELDS, MESSAGE_FIELDS, build_projection, required_headers,
+)
+from gmail_client.rule_processor.rule_engine import check_condition
+
+
+TO_RULE = [{
+    "description": "to me",
+    "predicate": "all",
+    "conditions": [
+        {"field": "To", "operator": "contains", "value": "me@"},
+        {"field": "Subject", "operator": "contains", "value": "x"},
+    ],
+    "actions": [],
+}]
+
+
+class RecordingMessages:
+    """Wraps the emulator's messages resource and records call kwargs."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.list_kwargs = []
+        self.get_kwargs = []
+
+    def list(self, **kwargs):
+        self.list_kwargs.append(kwargs)
+        return self.messages.list(**kwargs)
+
+    def get(self, **kwargs):
+        self.get_kwargs.append(kwargs)
+        return self.messages.get(**kwargs)
+
+
+class RecordingService:
+    def __init__(self, gmail):
+        self.gmail = gmail
+        self.msgs = RecordingMessages(gmail.users().messages())
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self.msgs
+
+    def new_batch_http_request(self, callback=None):
+        return self.gmail.new_batch_http_request(callback)
+
+
+class TestProjection(unittest.TestCase):
+    def test_default_headers_cover_storage(self):
+        self.assertEqual(required_headers(), list(BASE_HEADERS))
+        self.assertEqual(DEFAULT_PROJECTION.get_kwargs(),
+                         {"format": "metadata", "metadataHeaders": list(BASE_HEADERS), "fields": MESSAGE_FIELDS})
+        self.assertEqual(DEFAULT_PROJECTION.list_kwargs(), {"fields": LIST_FIELDS})
+
+    def test_rules_add_headers_once(self):
+        self.assertEqual(required_headers(TO_RULE), ["From", "Subject", "Date", "To"])
+        self.assertEqual(build_projection(TO_RULE).headers, ["From", "Subject", "Date", "To"])
+
+    def test_fetch_sends_projection_and_stores_recipient(self):
+        service = RecordingService(FakeGmail(size=3))
+        emails, _ = fetch_inbox_messages(service, max_results=3, projection=build_projection(TO_RULE))
+
+        self.assertEqual(service.msgs.list_kwargs[0]["fields"], LIST_FIELDS)
+        self.assertEqual(len(service.msgs.get_kwargs), 3)
+        for kwargs in service.msgs.get_kwargs:
+            self.assertEqual(kwargs["format"], "metadata")
+            self.assertIn("To", kwargs["metadataHeaders"])
+            self.assertEqual(kwargs["fields"], MESSAGE_FIELDS)
+
+        self.assertTrue(all(email.recipient for email in emails))
+        self.assertTrue(check_condition(
+            emails[0], {"field": "To", "operator": "equals", "value": emails[0].recipient}))
+
+    def test_default_projection_skips_unused_headers(self):
+        emails, _ = fetch_inbox_messages(FakeGmail(size=2), max_results=2)
+        # Not requested: unknown (None), not an empty To header
+        self.assertEqual([email.recipient for email in emails], [None, None])
+        self.assertFalse(check_condition(emails[0], {"field": "To", "operator": "not_contains", "value": "x"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
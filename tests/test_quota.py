@@ -0,0 +1,66 @@
+import os
+import unittest
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.metrics import METRICS
+from gmail_client.quota import TokenBucket, charge, set_limiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_paced(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=20, clock=clock, sleep=clock.sleep)
+        self.assertEqual(bucket.acquire(20), 0.0)
+        self.assertAlmostEqual(bucket.acquire(5), 0.5)
+        clock.now += 10  # refills, but never above capacity
+        self.assertEqual(bucket.acquire(20), 0.0)
+        self.assertAlmostEqual(bucket.acquire(10), 1.0)
+
+    def test_state_resumes_elsewhere(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=10, clock=clock, sleep=clock.sleep)
+        bucket.acquire(10)
+        resumed = TokenBucket(rate=10, capacity=10, state=bucket.state(), clock=clock, sleep=clock.sleep)
+        self.assertAlmostEqual(resumed.acquire(5), 0.5)
+
+
+class TestCharge(unittest.TestCase):
+    def tearDown(self):
+        set_limiter(None)
+
+    def test_counts_units_and_waits_on_limiter(self):
+        METRICS.reset()
+        clock = FakeClock()
+        set_limiter(TokenBucket(rate=5, capacity=5, clock=clock, sleep=clock.sleep))
+        charge("messages.get", 3)
+        charge("messages.list")
+        self.assertEqual(METRICS.snapshot()["counters"]["quota_units"], 20)
+        self.assertAlmostEqual(sum(clock.slept), 3.0)
+
+    def test_no_limiter_only_counts(self):
+        METRICS.reset()
+        charge("messages.modify", 2)
+        self.assertEqual(METRICS.snapshot()["counters"]["quota_units"], 10)
+        self.assertNotIn("quota_wait", METRICS.snapshot()["timers"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,9 @@ import os, sys
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
-from gmail_client.rule_processor.rule_engine import check_condition
+from gmail_client.metrics import METRICS
+from gmail_client.models import Email
+from gmail_client.rule_processor.rule_engine import check_condition, process_rules, rule_matches
 
 class TestRuleEngine(unittest.TestCase):
     def setUp(self):
@@ -50,6 +52,51 @@ class TestRuleEngine(unittest.TestCase):
         result = check_condition(old_email, cond)
         self.assertTrue(result)
 
+    def test_predicates_stop_at_deciding_condition(self):
+        hit = {"field": "Subject", "operator": "contains", "value": "Test"}
+        miss = {"field": "Subject", "operator": "contains", "value": "xyz"}
+        self.assertFalse(rule_matches(self.email, {"predicate": "all", "conditions": [hit, miss]}))
+        self.assertTrue(rule_matches(self.email, {"predicate": "any", "conditions": [miss, hit]}))
+        self.assertTrue(rule_matches(self.email, {"predicate": "all", "conditions": []}))
+        self.assertFalse(rule_matches(self.email, {"predicate": "none", "conditions": [hit]}))
+
+    def test_process_rules_counts_checked_conditions(self):
+        miss = {"field": "Subject", "operator": "contains", "value": "xyz"}
+        hit = {"field": "From", "operator": "contains", "value": "sender"}
+        rules = [
+            {"predicate": "all", "conditions": [miss, hit], "actions": []},  # stops after the miss
+            {"predicate": "any", "conditions": [miss, hit], "actions": []},
+        ]
+        METRICS.reset()
+        process_rules(None, emails=[Email.from_dict(self.email)] * 3, rules=rules)
+        counters = METRICS.snapshot()["counters"]
+        self.assertEqual(counters["conditions_evaluated"], 9)
+        self.assertEqual(counters["rule_matches"], 3)
+
+    def test_process_rules_applies_actions_to_dict_emails(self):
+        class Service:
+            def __init__(self):
+                self.modified = []
+
+            def users(self):
+                return self
+
+            def messages(self):
+                return self
+
+            def modify(self, userId, id, body):
+                self.modified.append((id, body))
+                return self
+
+            def execute(self):
+                return {}
+
+        service = Service()
+        rules = [{"predicate": "all", "actions": [{"type": "mark_as_read"}],
+                  "conditions": [{"field": "Subject", "operator": "contains", "value": "Test"}]}]
+        process_rules(service, emails=[self.email], rules=rules)
+        self.assertEqual(service.modified, [("123", {"removeLabelIds": ["UNREAD"]})])
+
 
 if __name__ == "__main__":
     unittest.main()
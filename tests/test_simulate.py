@@ -0,0 +1,104 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+# Ensure project root is on sys.path
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gmail_client.email_repository import init_db, save_emails, open_snapshot, fetch_all_emails
+from gmail_client.models import Email
+from gmail_client.rule_processor.actions import plan_action
+from gmail_client.rule_processor.simulate import simulate_rules, format_report
+
+NOW = 1757332800  # 2025-09-08T12:00:00Z
+DAY = 86400
+
+EMAILS = [
+    Email(id="1", sender="deals@shop.com", subject="Big sale", received_ts=NOW - DAY, labels=["INBOX", "UNREAD"]),
+    Email(id="2", sender="deals@shop.com", subject="Another sale", received_ts=NOW - 40 * DAY, labels=["INBOX"]),
+    Email(id="3", sender="boss@work.com", subject="Interview", received_ts=NOW - 2 * DAY, labels=["INBOX", "UNREAD"]),
+]
+
+RULES = [
+    {
+        "description": "shop",
+        "predicate": "all",
+        "conditions": [{"field": "From", "operator": "contains", "value": "shop.com"}],
+        "actions": [{"type": "mark_as_read"}, {"type": "move", "destination": "Deals"}],
+    },
+    {
+        "description": "old",
+        "predicate": "any",
+        "conditions": [{"field": "DateReceived", "operator": "greater_than_days", "value": 30}],
+        "actions": [{"type": "mark_as_read"}],
+    },
+    {
+        "description": "nothing",
+        "predicate": "all",
+        "conditions": [{"field": "Subject", "operator": "contains", "value": "zzz"}],
+        "actions": [{"type": "mark_as_unread"}],
+    },
+]
+
+
+class TestSimulate(unittest.TestCase):
+    def test_report_counts_matches_changes_and_quota(self):
+        report = simulate_rules(EMAILS, RULES, now=NOW)
+
+        self.assertEqual([r["matches"] for r in report["per_rule"]], [2, 1, 0])
+        self.assertEqual([r["modify_calls"] for r in report["per_rule"]], [4, 1, 0])
+        self.assertEqual(report["modify_calls"], 5)
+        self.assertEqual(report["quota_units"], 25)
+        self.assertEqual(report["matched_emails"], 2)
+        self.assertEqual(report["changed_emails"], 2)
+
+        changes = report["label_changes"]
+        self.assertEqual(changes["requested"], {"-UNREAD": 3, "+Deals": 2, "-INBOX": 2})
+        # Only email 1 was unread; the old-mail rule re-marks email 2 with no effect
+        self.assertEqual(changes["effective"], {"+Deals": 2, "-INBOX": 2, "-UNREAD": 1})
+        self.assertIn("Estimated quota: 25 units", format_report(report))
+
+    def test_as_of_time_changes_date_matches(self):
+        report = simulate_rules(EMAILS, RULES, now=NOW - 20 * DAY)
+        self.assertEqual(report["per_rule"][1]["matches"], 0)
+
+    def test_plan_action(self):
+        self.assertEqual(plan_action({"type": "move", "destination": "X"}), (["X"], ["INBOX"]))
+        self.assertIsNone(plan_action({"type": "move"}))
+        self.assertIsNone(plan_action({"type": "delete"}))
+
+    def test_snapshot_opened_without_modifying_file(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "old.db")
+            with sqlite3.connect(path) as conn:
+                conn.execute("CREATE TABLE emails (id TEXT PRIMARY KEY, sender TEXT, subject TEXT, snippet TEXT, "
+                             "received_at DATETIME, is_read INTEGER, labels TEXT)")
+                conn.execute("INSERT INTO emails VALUES ('a', 'x@y.com', 'hi', '', '2025-09-01T00:00:00+00:00', 0, 'INBOX')")
+            before = open(path, "rb").read()
+
+            conn = open_snapshot(path)
+            emails = fetch_all_emails(conn)
+            conn.close()
+            self.assertEqual(emails[0].received_ts, 1756684800)
+            self.assertEqual(open(path, "rb").read(), before)
+
+            current = os.path.join(tmp, "current.db")
+            with sqlite3.connect(current) as conn:
+                init_db(conn)
+                save_emails(EMAILS, conn=conn)
+            conn = open_snapshot(current)
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM emails")
+            conn.close()
+        finally:
+            shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+from datetime import datetime, timedelta
+# Ensure project root is on sys.path
+import os, sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from google.oauth2.credentials import Credentials
+from gmail_client.transport import build_http, CredentialRefresher, SessionHttp
+from gmail_client.gmail_service import build_service
+
+
+class MockCreds:
+    def __init__(self, expiry=None):
+        self.expiry = expiry
+        self.refresh_token = "refresh"
+        self.refreshed = 0
+
+    def refresh(self, request):
+        self.refreshed += 1
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+
+
+class MockResponse:
+    status_code = 200
+    headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    content = b'{"ok": true}'
+
+
+class MockSession:
+    credentials = "creds"
+
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, uri, data=None, headers=None, timeout=None):
+        self.calls.append((method, uri, data, timeout))
+        return MockResponse()
+
+
+class TestTransport(unittest.TestCase):
+    def test_refresh_scheduled_before_expiry(self):
+        now = datetime(2025, 1, 1, 12, 0, 0)
+        creds = MockCreds(expiry=now + timedelta(minutes=30))
+        refresher = CredentialRefresher(creds, margin=300)
+        self.assertEqual(refresher.seconds_until_refresh(now=now), 25 * 60)
+
+    def test_refresh_due_when_inside_margin(self):
+        now = datetime(2025, 1, 1, 12, 0, 0)
+        creds = MockCreds(expiry=now + timedelta(minutes=1))
+        refresher = CredentialRefresher(creds, margin=300)
+        self.assertEqual(refresher.seconds_until_refresh(now=now), 0)
+
+    def test_refresh_now_notifies_callback(self):
+        creds = MockCreds(expiry=datetime.utcnow())
+        saved = []
+        CredentialRefresher(creds, on_refresh=saved.append).refresh_now()
+        self.assertEqual(creds.refreshed, 1)
+        self.assertEqual(saved, [creds])
+
+    def test_background_thread_refreshes_expiring_token(self):
+        creds = MockCreds(expiry=datetime.utcnow())
+        refresher = CredentialRefresher(creds, margin=300).start()
+        try:
+            for _ in range(100):
+                if creds.refreshed:
+                    break
+                refresher._stop.wait(0.01)
+        finally:
+            refresher.stop()
+        self.assertEqual(creds.refreshed, 1)
+
+    def test_session_http_returns_httplib2_style_response(self):
+        session = MockSession()
+        http = SessionHttp(session, timeout=5)
+        resp, content = http.request("https://example.com", "POST", body="x")
+        self.assertEqual(resp.status, 200)
+        self.assertNotIn("content-encoding", resp)
+        self.assertEqual(content, b'{"ok": true}')
+        self.assertEqual(session.calls, [("POST", "https://example.com", "x", 5)])
+        self.assertEqual(http.credentials, "creds")
+
+    def test_unknown_backend_raises(self):
+        with self.assertRaises(ValueError):
+            build_http(MockCreds(), backend="carrier-pigeon")
+
+    def test_service_uses_shared_http(self):
+        creds = Credentials(token="t")
+        for backend in ("httplib2", "requests"):
+            http = build_http(creds, backend=backend)
+            service = build_service(creds, http=http)
+            self.assertIs(service._http, http)
+
+
+if __name__ == "__main__":
+    unittest.main()